@@ -5,6 +5,22 @@ Pytest configuration for stuff4friends.
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def _raise_on_query_budget(settings):
+    """Fail tests whose requests exceed LIBRARY_QUERY_BUDGETS."""
+    settings.LIBRARY_QUERY_BUDGET_ACTION = "raise"
+
+
+@pytest.fixture(autouse=True)
+def _clear_owner_cache():
+    """Don't let lending hash lookups cached by one test leak into the next."""
+    from library import owners
+
+    owners.clear()
+    yield
+    owners.clear()
+
+
 @pytest.fixture
 def user_factory(db):
     """Factory for creating test users."""
@@ -50,3 +66,51 @@ def item_factory(db, approved_user):
         )
 
     return create_item
+
+
+@pytest.fixture
+def assert_constant_queries(db):
+    """Assert that a callable issues the same number of queries as data grows.
+
+    Usage::
+
+        assert_constant_queries(
+            lambda: client.get(url),
+            grow=lambda: [item_factory() for _ in range(10)],
+        )
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    def check(func, grow):
+        with CaptureQueriesContext(connection) as before:
+            func()
+        grow()
+        with CaptureQueriesContext(connection) as after:
+            func()
+        assert len(after) == len(before), (
+            f"Query count grew from {len(before)} to {len(after)}:\n"
+            + "\n".join(q["sql"] for q in after.captured_queries)
+        )
+
+    return check
+
+
+@pytest.fixture
+def large_library(db):
+    """A synthetic library from ``library.datasets``, scaled down for tests.
+
+    Returns the ``Dataset`` with the heavy lender, its item with a long
+    history, and ids of its active borrows.
+    """
+    from library import datasets
+
+    datasets.seed(
+        users=20,
+        items_per_user=3,
+        heavy_lenders=1,
+        items_per_heavy_lender=200,
+        borrows=2000,
+        batch_size=1000,
+    )
+    return datasets.Dataset.load()
@@ -0,0 +1,22 @@
+"""
+Gunicorn settings, picked up automatically from the working directory.
+
+SERVER_INTERFACE chooses between the WSGI app on gunicorn's sync workers
+("wsgi", the default) and the ASGI app on uvicorn workers ("asgi"), where
+the public pages run as async views. The worker count comes from gunicorn's
+usual WEB_CONCURRENCY.
+"""
+
+import os
+
+interface = os.environ.get("SERVER_INTERFACE", "wsgi").lower()
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+
+if interface == "asgi":
+    wsgi_app = "stuff4friends.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+elif interface == "wsgi":
+    wsgi_app = "stuff4friends.wsgi:application"
+else:
+    raise RuntimeError(f"SERVER_INTERFACE must be 'wsgi' or 'asgi', not {interface!r}")
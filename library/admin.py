@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Item, Borrow
+from .models import User, Item, Borrow, BorrowArchive, ItemStats, Job, Blob
+from .search import search_items
 
 
 @admin.register(User)
@@ -46,6 +47,12 @@ class ItemAdmin(admin.ModelAdmin):
     list_filter = ["is_available", "owner"]
     search_fields = ["title", "short_description"]
     ordering = ["-created_at"]
+    readonly_fields = ["active_borrow", "active_borrow_status"]
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return search_items(queryset, search_term), False
 
 
 @admin.register(Borrow)
@@ -54,3 +61,41 @@ class BorrowAdmin(admin.ModelAdmin):
     list_filter = ["status"]
     search_fields = ["borrower_name", "item__title"]
     ordering = ["-requested_at"]
+
+
+@admin.register(BorrowArchive)
+class BorrowArchiveAdmin(admin.ModelAdmin):
+    """Read-only view of borrows moved out by `manage.py archive_borrows`."""
+
+    list_display = ["item", "borrower_name", "status", "requested_at", "returned_at"]
+    list_filter = ["status"]
+    search_fields = ["borrower_name", "item__title"]
+    ordering = ["-requested_at"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["name", "status", "attempts", "run_after", "created_at"]
+    list_filter = ["status", "name"]
+    ordering = ["run_after"]
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ["name", "size", "refcount", "updated_at"]
+    search_fields = ["name"]
+    ordering = ["-updated_at"]
+    readonly_fields = ["name", "size", "refcount"]
+
+
+@admin.register(ItemStats)
+class ItemStatsAdmin(admin.ModelAdmin):
+    list_display = ["item", "times_borrowed", "longest_loan", "last_returned_at"]
+    ordering = ["-last_returned_at"]
+    readonly_fields = ["item", "times_borrowed", "total_loan_time", "longest_loan", "last_returned_at"]
@@ -5,3 +5,11 @@ class LibraryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "library"
     verbose_name = "Stuff for Friends Library"
+
+    def ready(self):
+        from django.db.models.signals import pre_migrate
+
+        from . import checks, signals, tasks  # noqa: F401
+        from .search import create_extensions
+
+        pre_migrate.connect(create_extensions, sender=self)
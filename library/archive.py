@@ -0,0 +1,119 @@
+"""
+Archived borrows.
+
+Denied and returned borrows only matter for lending history, yet every owner
+page scans the Borrow table by item and status. ``archive`` moves old
+terminal borrows into ``BorrowArchive`` in batches, keeping their ids, so
+the live table only grows with recent activity.
+
+Lending history reads both tables: ``history_page`` pages through the union
+of live and archived returned borrows by ``(-returned_at, -id)``, nulls
+last, the same order and cursor as ``pagination.keyset_page``. Callers
+can't tell which table a row came from.
+"""
+
+from django.db import connections, transaction
+from django.db.models import F, Q
+
+from .models import Borrow, BorrowArchive, Item
+from .pagination import keyset_queryset, keyset_result
+
+TERMINAL_STATUSES = [Borrow.Status.DENIED, Borrow.Status.RETURNED]
+ARCHIVED_FIELDS = [
+    "id", "item_id", "borrower_name", "status",
+    "requested_at", "approved_at", "lent_at", "returned_at",
+]
+HISTORY_FIELDS = ["id", "borrower_name", "lent_at", "returned_at"]
+
+
+def archivable(cutoff):
+    """Live borrows that finished before ``cutoff``.
+
+    Returned borrows count from their return and denied ones from their
+    request. Borrows an item still points at (stale pointers awaiting
+    ``rebuild_active_borrows``) stay put.
+    """
+    return Borrow.objects.filter(
+        Q(status=Borrow.Status.RETURNED, returned_at__lt=cutoff)
+        | Q(status=Borrow.Status.DENIED, requested_at__lt=cutoff)
+    ).exclude(
+        pk__in=Item.objects.filter(active_borrow__isnull=False).values("active_borrow")
+    )
+
+
+def archive(cutoff, batch_size=1000):
+    """Move one batch of borrows finished before ``cutoff``; returns the count.
+
+    Each batch is copied and deleted in one transaction. Borrow signals are
+    bypassed on purpose: nothing a visitor can see changes, so there is no
+    cache to invalidate.
+    """
+    with transaction.atomic():
+        batch = list(
+            archivable(cutoff)
+            .order_by("pk")
+            .select_for_update(skip_locked=True)
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not batch:
+            return 0
+        BorrowArchive.objects.bulk_create(
+            [BorrowArchive(**row) for row in batch], ignore_conflicts=True
+        )
+        _delete_borrows([row["id"] for row in batch])
+    return len(batch)
+
+
+def _delete_borrows(ids):
+    # A plain DELETE rather than QuerySet.delete(): that would load every
+    # row to send post_delete, whose receivers invalidate the owner's pages
+    # for a change no visitor can see. Nothing else references these rows;
+    # archivable() leaves out active borrows.
+    connection = connections[Borrow.objects.db]
+    quote_name = connection.ops.quote_name
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote_name(Borrow._meta.db_table)} "
+            f"WHERE {quote_name(Borrow._meta.pk.column)} IN ({placeholders})",
+            ids,
+        )
+
+
+def _history_queryset(item, cursor, page_size):
+    parts = []
+    for model in (Borrow, BorrowArchive):
+        part = keyset_queryset(
+            model.objects.filter(item=item, status=Borrow.Status.RETURNED),
+            "returned_at",
+            cursor,
+        ).values_list(*HISTORY_FIELDS)
+        if connections[part.db].features.supports_slicing_ordering_in_compound:
+            # Each side only needs to contribute one page
+            part = part[:page_size + 1]
+        else:
+            part = part.order_by()
+        parts.append(part)
+    live, archived = parts
+    return live.union(archived, all=True).order_by(
+        F("returned_at").desc(nulls_last=True), "-id"
+    )[:page_size + 1]
+
+
+def _history_borrows(rows):
+    return [
+        Borrow(status=Borrow.Status.RETURNED, **dict(zip(HISTORY_FIELDS, row)))
+        for row in rows
+    ]
+
+
+def history_page(item, cursor=None, page_size=20):
+    """A page of ``item``'s returned borrows, live and archived, newest first."""
+    rows = list(_history_queryset(item, cursor, page_size))
+    return keyset_result(_history_borrows(rows), "returned_at", page_size)
+
+
+async def ahistory_page(item, cursor=None, page_size=20):
+    """Async version of ``history_page``."""
+    rows = [row async for row in _history_queryset(item, cursor, page_size)]
+    return keyset_result(_history_borrows(rows), "returned_at", page_size)
@@ -0,0 +1,200 @@
+"""
+Async versions of the public read-only views, for ASGI deployments.
+
+library/urls.py routes the public pages here when ``LIBRARY_ASYNC_VIEWS`` is
+on (the default when ``SERVER_INTERFACE=asgi``). They do the same work as
+their counterparts in ``views`` through the async ORM and cache APIs, so
+a request waiting on PostgreSQL doesn't hold a worker thread. Templates
+and cache keys are shared with the sync views, so both paths render and
+cache identical pages.
+"""
+
+import secrets
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from django.utils.safestring import mark_safe
+from django.views.decorators.cache import cache_control
+
+from . import archive
+from .borrowers import get_borrower_name
+from .cache import (
+    aget_gallery_fragment,
+    aget_owner_version,
+    aset_gallery_fragment,
+    version_etag,
+    version_last_modified,
+)
+from .models import Item
+from .owners import aget_public_owner
+from .pagination import akeyset_page, canonical_cursor
+from .views import (
+    HISTORY_PAGE_SIZE,
+    _gallery_items_html,
+    _public_gallery_items,
+    _public_search_results,
+    _split_template,
+)
+
+
+async def _aget_owner(lending_hash):
+    owner, _ = await aget_public_owner(lending_hash)
+    if owner is None:
+        raise Http404("No User matches the given query.")
+    return owner
+
+
+async def _arender_gallery_items(owner, lending_hash, borrower_name, cursor=""):
+    """Async ``views._render_gallery_items``."""
+    cursor = canonical_cursor(cursor)
+    version = await aget_owner_version(owner.pk)
+    named = bool(borrower_name)
+    html = await aget_gallery_fragment(owner.pk, version, named, cursor)
+    if html is None:
+        page = await akeyset_page(_public_gallery_items(owner), "created_at", cursor)
+        html = _gallery_items_html(owner, lending_hash, borrower_name, page, cursor)
+        await aset_gallery_fragment(owner.pk, version, named, html, cursor)
+    return mark_safe(html)
+
+
+async def _validators(owner, *parts):
+    """``(etag, last_modified)`` as ``views._public_etag`` etc. compute them."""
+    version = await aget_owner_version(owner.pk)
+    etag = quote_etag(version_etag(version, *parts))
+    return etag, int(version_last_modified(version).timestamp())
+
+
+def _add_validators(request, response, etag, last_modified):
+    # What @condition does for the sync views
+    if request.method in ("GET", "HEAD"):
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault("Last-Modified", http_date(last_modified))
+    return response
+
+
+@cache_control(private=True, no_cache=True)
+async def public_lending_page(request, lending_hash):
+    """Public gallery view of a user's lending library."""
+    owner = await _aget_owner(lending_hash)
+    borrower_name = get_borrower_name(request, lending_hash)
+    etag, last_modified = await _validators(owner, borrower_name, "")
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        return _add_validators(request, response, etag, last_modified)
+
+    context = {
+        "owner": owner,
+        "borrower_name": borrower_name,
+        "lending_hash": lending_hash,
+        "request_token": secrets.token_urlsafe(16),
+    }
+
+    if settings.LIBRARY_STREAM_FIRST_PAGE:
+        head, tail = _split_template(
+            request, "library/public/gallery.html", context, "items_html"
+        )
+
+        async def chunks():
+            yield head
+            yield await _arender_gallery_items(owner, lending_hash, borrower_name)
+            yield tail
+
+        response = StreamingHttpResponse(chunks())
+    else:
+        context["items_html"] = await _arender_gallery_items(
+            owner, lending_hash, borrower_name
+        )
+        response = render(request, "library/public/gallery.html", context)
+    return _add_validators(request, response, etag, last_modified)
+
+
+async def public_gallery_page(request, lending_hash):
+    """HTMX endpoint returning the next page of gallery items."""
+    owner = await _aget_owner(lending_hash)
+    borrower_name = get_borrower_name(request, lending_hash)
+    cursor = request.GET.get("cursor", "")
+    return HttpResponse(
+        await _arender_gallery_items(owner, lending_hash, borrower_name, cursor)
+    )
+
+
+async def public_search(request, lending_hash):
+    """HTMX search-as-you-type endpoint for the public gallery."""
+    owner = await _aget_owner(lending_hash)
+    borrower_name = get_borrower_name(request, lending_hash)
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return HttpResponse(
+            await _arender_gallery_items(owner, lending_hash, borrower_name)
+        )
+
+    # The non-PostgreSQL fallback scores rows eagerly, so run it in a thread
+    items = await sync_to_async(_public_search_results)(owner, query)
+    return render(request, "library/public/partials/gallery_items.html", {
+        "owner": owner,
+        "items": items,
+        "query": query,
+        "borrower_name": borrower_name,
+        "lending_hash": lending_hash,
+    })
+
+
+@cache_control(private=True, no_cache=True)
+async def public_item_detail(request, lending_hash, item_id):
+    """Public detail view of a single item."""
+    owner = await _aget_owner(lending_hash)
+    borrower_name = get_borrower_name(request, lending_hash)
+    etag, last_modified = await _validators(owner, borrower_name, str(item_id))
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        return _add_validators(request, response, etag, last_modified)
+
+    item = await Item.objects.with_borrow_state().select_related("stats").filter(
+        id=item_id, owner=owner, is_available=True
+    ).afirst()
+    if item is None:
+        raise Http404("No Item matches the given query.")
+
+    lending_history = history_more_url = None
+    if owner.show_lending_history:
+        page = await archive.ahistory_page(item, page_size=HISTORY_PAGE_SIZE)
+        lending_history = page.items
+        history_more_url = page.next_url(
+            reverse("library:public_item_history", args=[lending_hash, item.pk])
+        )
+
+    response = render(request, "library/public/item_detail.html", {
+        "owner": owner,
+        "item": item,
+        "borrower_name": borrower_name,
+        "lending_hash": lending_hash,
+        "lending_history": lending_history,
+        "history_more_url": history_more_url,
+        "request_token": secrets.token_urlsafe(16),
+    })
+    return _add_validators(request, response, etag, last_modified)
+
+
+async def public_item_history(request, lending_hash, item_id):
+    """HTMX endpoint returning the next page of an item's lending history."""
+    owner = await _aget_owner(lending_hash)
+    item = await Item.objects.filter(id=item_id, owner=owner, is_available=True).afirst()
+    if item is None or not owner.show_lending_history:
+        raise Http404("No Item matches the given query.")
+    page = await archive.ahistory_page(item, request.GET.get("cursor"), HISTORY_PAGE_SIZE)
+    return render(request, "library/public/partials/history_items.html", {
+        "owner": owner,
+        "lending_history": page.items,
+        "more_url": page.next_url(request.path),
+    })
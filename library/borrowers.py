@@ -0,0 +1,50 @@
+"""
+Borrower identity for anonymous visitors.
+
+Friends browsing a lending page identify themselves by name only. The name
+lives in a signed cookie scoped to that lending page's path, so browsers
+only send it back to that lender's pages. The lending hash salts the
+signature, so a cookie can't be replayed against another lender. Reading
+the name needs no session, and no session row or query, on the public
+pages.
+"""
+
+from django.conf import settings
+from django.urls import reverse
+
+COOKIE_NAME = "borrower"
+
+
+def _salt(lending_hash):
+    return f"library.borrower:{lending_hash}"
+
+
+def _path(lending_hash):
+    return reverse("library:public_lending", args=[lending_hash])
+
+
+def get_borrower_name(request, lending_hash):
+    """The name this visitor gave on ``lending_hash``'s pages, or ""."""
+    return request.get_signed_cookie(
+        COOKIE_NAME,
+        default="",
+        salt=_salt(lending_hash),
+        max_age=settings.LIBRARY_BORROWER_COOKIE_AGE,
+    )
+
+
+def set_borrower_name(response, lending_hash, borrower_name):
+    """Remember ``borrower_name`` on ``response``; an empty name forgets it."""
+    if not borrower_name:
+        response.delete_cookie(COOKIE_NAME, path=_path(lending_hash), samesite="Lax")
+        return
+    response.set_signed_cookie(
+        COOKIE_NAME,
+        borrower_name,
+        salt=_salt(lending_hash),
+        max_age=settings.LIBRARY_BORROWER_COOKIE_AGE,
+        path=_path(lending_hash),
+        secure=settings.SESSION_COOKIE_SECURE,
+        httponly=True,
+        samesite="Lax",
+    )
@@ -0,0 +1,110 @@
+"""
+Per-owner cache versioning for the public lending pages.
+
+Each owner has a version number that changes whenever something visible on
+their public pages changes (items, borrows, visibility settings). Rendered
+fragments are cached under the current version, and the version doubles as
+the ETag/Last-Modified source, so stale entries are never read and simply
+expire.
+
+Versions are microsecond timestamps rather than counters: if a version key
+is evicted, the regenerated one is still newer than anything cached before.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "library:owner-version:{owner_id}"
+# ``cursor`` must come from pagination.canonical_cursor, never the raw query string
+GALLERY_KEY = "library:gallery:{owner_id}:{version}:{named}:{cursor}"
+GALLERY_TIMEOUT = 60 * 60 * 24
+
+
+def _now_version():
+    return time.time_ns() // 1000
+
+
+def get_owner_version(owner_id):
+    """Return the current cache version for an owner's public pages."""
+    key = VERSION_KEY.format(owner_id=owner_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _now_version(), timeout=None)
+        version = cache.get(key, _now_version())
+    return version
+
+
+def bump_owner_version(owner_id):
+    """Move an owner's pages to a new version right away."""
+    key = VERSION_KEY.format(owner_id=owner_id)
+    version = max(_now_version(), (cache.get(key) or 0) + 1)
+    cache.set(key, version, timeout=None)
+    return version
+
+
+def invalidate_owner(owner_id):
+    """Bump an owner's version now and again once the transaction commits.
+
+    The immediate bump stops anything cached before the change from being
+    served. The second bump discards renders that a concurrent request cached
+    while the transaction was still uncommitted.
+    """
+    bump_owner_version(owner_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump_owner_version(owner_id))
+
+
+def version_last_modified(version):
+    return datetime.fromtimestamp(version / 1_000_000, tz=timezone.utc)
+
+
+def version_etag(version, *parts):
+    """Strong ETag for a versioned page, varied by per-visitor ``parts``."""
+    digest = hashlib.sha256("\0".join(parts).encode()).hexdigest()[:16]
+    return f"{version}-{digest}"
+
+
+def _gallery_key(owner_id, version, named, cursor):
+    return GALLERY_KEY.format(
+        owner_id=owner_id, version=version, named=int(named), cursor=cursor,
+    )
+
+
+def get_gallery_fragment(owner_id, version, named, cursor=""):
+    return cache.get(_gallery_key(owner_id, version, named, cursor))
+
+
+def set_gallery_fragment(owner_id, version, named, html, cursor=""):
+    cache.set(
+        _gallery_key(owner_id, version, named, cursor),
+        html,
+        timeout=GALLERY_TIMEOUT,
+    )
+
+
+# Async variants for the ASGI views in library.async_views
+
+
+async def aget_owner_version(owner_id):
+    key = VERSION_KEY.format(owner_id=owner_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _now_version(), timeout=None)
+        version = await cache.aget(key, _now_version())
+    return version
+
+
+async def aget_gallery_fragment(owner_id, version, named, cursor=""):
+    return await cache.aget(_gallery_key(owner_id, version, named, cursor))
+
+
+async def aset_gallery_fragment(owner_id, version, named, html, cursor=""):
+    await cache.aset(
+        _gallery_key(owner_id, version, named, cursor),
+        html,
+        timeout=GALLERY_TIMEOUT,
+    )
@@ -0,0 +1,144 @@
+"""
+System checks for database connection settings, the PostgreSQL extensions
+search needs, and the settings profile.
+
+``connection_budget`` estimates how many PostgreSQL connections the
+configured web and job workers can hold at once. The database check compares
+that with the server's ``max_connections``. It runs as part of ``migrate``,
+so container startup reports the numbers needed to size WEB_CONCURRENCY,
+JOB_WORKERS and the pool.
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Info, Tags, Warning, register
+from django.db import DatabaseError, connections
+
+from .search import EXTENSIONS
+
+
+def connection_budget(settings_dict):
+    """``(total, per_web_worker)`` connections the deployment may open."""
+    pool = settings_dict.get("OPTIONS", {}).get("pool")
+    if pool:
+        per_web_worker = (pool if isinstance(pool, dict) else {}).get("max_size", 4)
+    else:
+        # One persistent (or per-request) connection per serving thread
+        per_web_worker = settings.LIBRARY_DB_CONNECTIONS_PER_WORKER
+    # Each job worker process holds a single connection
+    total = settings.LIBRARY_WEB_WORKERS * per_web_worker + settings.LIBRARY_JOB_WORKERS
+    return total, per_web_worker
+
+
+@register(Tags.database)
+def check_connection_budget(app_configs, databases=None, **kwargs):
+    messages = []
+    for alias in databases or []:
+        connection = connections[alias]
+        if connection.vendor != "postgresql":
+            continue
+
+        total, per_web_worker = connection_budget(connection.settings_dict)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT current_setting('max_connections')::int"
+                    " - current_setting('superuser_reserved_connections')::int"
+                )
+                available = cursor.fetchone()[0]
+        except DatabaseError as e:
+            messages.append(Warning(
+                f"Could not read max_connections for database '{alias}': {e}",
+                id="library.W002",
+            ))
+            continue
+
+        summary = (
+            f"Workers may hold up to {total} connection(s) to '{alias}' "
+            f"({settings.LIBRARY_WEB_WORKERS} web x {per_web_worker} + "
+            f"{settings.LIBRARY_JOB_WORKERS} job); the server allows {available}."
+        )
+        if total > available:
+            messages.append(Warning(
+                summary,
+                hint=(
+                    "Lower WEB_CONCURRENCY, JOB_WORKERS or DB_POOL_MAX_SIZE, "
+                    "or raise max_connections in PostgreSQL."
+                ),
+                id="library.W001",
+            ))
+        else:
+            messages.append(Info(summary, id="library.I001"))
+    return messages
+
+
+@register()
+def check_pool_installed(app_configs, **kwargs):
+    for alias, settings_dict in settings.DATABASES.items():
+        if settings_dict.get("OPTIONS", {}).get("pool"):
+            try:
+                import psycopg_pool  # noqa: F401
+            except ImportError:
+                return [Error(
+                    f"Connection pooling is enabled for '{alias}' but "
+                    "psycopg_pool is not installed.",
+                    hint="Install psycopg[pool] or unset DB_POOL.",
+                    id="library.E001",
+                )]
+    return []
+
+
+@register(Tags.database)
+def check_search_extensions(app_configs, databases=None, **kwargs):
+    messages = []
+    for alias in databases or []:
+        connection = connections[alias]
+        if connection.vendor != "postgresql":
+            continue
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT extname FROM pg_extension WHERE extname = ANY(%s)", [EXTENSIONS]
+                )
+                installed = {row[0] for row in cursor.fetchall()}
+        except DatabaseError:
+            # Reported by check_connection_budget
+            continue
+        missing = [name for name in EXTENSIONS if name not in installed]
+        if missing:
+            # A warning, not an error: migrate runs this check before it
+            # creates the extensions
+            messages.append(Warning(
+                f"Database '{alias}' is missing the {', '.join(missing)} extension(s) "
+                "that item search and its title index need.",
+                hint=(
+                    "Run `manage.py migrate`, which creates them, or run "
+                    "CREATE EXTENSION pg_trgm as a database superuser."
+                ),
+                id="library.W004",
+            ))
+    return messages
+
+
+# Installed by the dev settings profile only
+DEV_ONLY_COMPONENTS = {
+    "django_browser_reload",
+    "django_browser_reload.middleware.BrowserReloadMiddleware",
+    "whitenoise.runserver_nostatic",
+}
+
+
+@register()
+def check_dev_only_components(app_configs, **kwargs):
+    if settings.DEBUG:
+        return []
+    enabled = [
+        name for name in [*settings.INSTALLED_APPS, *settings.MIDDLEWARE]
+        if name in DEV_ONLY_COMPONENTS
+    ]
+    if not enabled:
+        return []
+    return [Warning(
+        f"Development-only components are enabled with DEBUG off: {', '.join(enabled)}.",
+        hint="Use SETTINGS_PROFILE=prod (the default when DEBUG is false).",
+        id="library.W003",
+    )]
@@ -0,0 +1,250 @@
+"""
+Synthetic datasets for benchmarks.
+
+``seed`` bulk-creates a library shaped like a long-running instance:
+- many small lenders;
+- a few heavy lenders with thousands of items each;
+- a deep borrow history, mostly returned or denied, under a thin layer of
+  open requests, approvals and loans.
+
+Rows come from a seeded random generator, so the same arguments always
+produce the same data and benchmark runs stay comparable. ``Dataset.load``
+finds the rows a benchmark exercises, including in data seeded by an
+earlier run.
+"""
+
+import random
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .models import Borrow, Item, ItemStats, User
+from .search import update_search_vectors
+from .services.item_stats import expected_stats
+
+USERNAME_PREFIX = "bench-"
+HEAVY_LENDER = f"{USERNAME_PREFIX}heavy-0"
+
+# Each heavy lender's newest item gets this many returned borrows, so the
+# item detail page has a full lending history to show
+HEAVY_ITEM_HISTORY = 200
+# Share of items with each kind of active borrow
+ACTIVE_SHARES = {
+    Borrow.Status.LENT_OUT: 0.02,
+    Borrow.Status.APPROVED: 0.01,
+    Borrow.Status.REQUESTED: 0.03,
+}
+HISTORY_WEIGHTS = {Borrow.Status.RETURNED: 84, Borrow.Status.DENIED: 16}
+# How far back creation times are spread (about ten years)
+SPREAD_MINUTES = 5_000_000
+
+ADJECTIVES = (
+    "cordless", "camping", "folding", "vintage", "portable", "electric",
+    "kids'", "travel", "heavy-duty", "compact", "waterproof", "wooden",
+)
+NOUNS = (
+    "drill", "tent", "ladder", "projector", "board game", "sleeping bag",
+    "kayak", "camera", "tripod", "sewing machine", "bike rack", "cookbook",
+    "pressure washer", "guitar", "stand mixer", "telescope", "snowshoes",
+    "lawn mower", "ice cream maker", "novel",
+)
+
+
+class Dataset(namedtuple("Dataset", ["lender", "item", "requested", "approved", "lent_out"])):
+    """The seeded rows a benchmark requests pages for.
+
+    ``lender`` is the first heavy lender and ``item`` its newest item, which
+    is lendable and has a long history. The borrow fields are ids of the
+    lender's borrows in each active status, oldest first.
+    """
+
+    @classmethod
+    def load(cls):
+        lender = User.objects.filter(username=HEAVY_LENDER).first()
+        if lender is None:
+            return None
+
+        def borrow_ids(status):
+            return list(
+                Borrow.objects.filter(item__owner=lender, status=status)
+                .order_by("pk").values_list("pk", flat=True)[:50]
+            )
+
+        return cls(
+            lender=lender,
+            item=lender.items.order_by("-created_at", "-pk").first(),
+            requested=borrow_ids(Borrow.Status.REQUESTED),
+            approved=borrow_ids(Borrow.Status.APPROVED),
+            lent_out=borrow_ids(Borrow.Status.LENT_OUT),
+        )
+
+
+def _spread(queryset, field, minutes=SPREAD_MINUTES):
+    """Move ``field`` back by a pseudo-random, per-row number of minutes."""
+    offset = f"(id * 7919) %% {minutes}"
+    if connection.vendor == "postgresql":
+        expression = RawSQL(f"{field} - ({offset}) * interval '1 minute'", [])
+    else:
+        expression = RawSQL(f"datetime({field}, '-' || ({offset}) || ' minutes')", [])
+    queryset.update(**{field: expression})
+
+
+def seed(
+    users=2000,
+    items_per_user=5,
+    heavy_lenders=3,
+    items_per_heavy_lender=10_000,
+    borrows=1_000_000,
+    batch_size=10_000,
+    seed=508,
+    log=None,
+):
+    """Bulk-create a synthetic library and return the number of rows made.
+
+    ``borrows`` is the number of historical (returned or denied) borrows;
+    active borrows are added on top, per ``ACTIVE_SHARES``.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    now = timezone.now()
+
+    log(f"Seeding {heavy_lenders} heavy lender(s) and {users} other user(s)...")
+    lenders = User.objects.bulk_create(
+        [
+            User(
+                username=f"{USERNAME_PREFIX}heavy-{i}",
+                lending_hash=f"bench{rng.getrandbits(64):016x}",
+                is_approved=True,
+                show_lending_history=True,
+            )
+            for i in range(heavy_lenders)
+        ] + [
+            User(
+                username=f"{USERNAME_PREFIX}user-{i}",
+                lending_hash=f"bench{rng.getrandbits(64):016x}",
+                is_approved=True,
+            )
+            for i in range(users)
+        ],
+        batch_size=batch_size,
+    )
+
+    log("Seeding items...")
+    items = []
+    for position, lender in enumerate(lenders):
+        count = items_per_heavy_lender if position < heavy_lenders else items_per_user
+        for i in range(count):
+            adjective, noun = rng.choice(ADJECTIVES), rng.choice(NOUNS)
+            items.append(Item(
+                owner=lender,
+                title=f"{adjective.capitalize()} {noun} {i}",
+                short_description=f"A {adjective} {noun}, lightly used.",
+                is_available=rng.random() > 0.1,
+            ))
+    items = Item.objects.bulk_create(items, batch_size=batch_size)
+    # auto_now_add gives every row the same time; spread them out
+    _spread(Item.objects.filter(owner__in=lenders), "created_at")
+    update_search_vectors(Item.objects.filter(owner__in=lenders))
+
+    item_ids = [item.pk for item in items]
+    # The newest item after spreading, per heavy lender
+    heavy_items = {
+        lender.items.order_by("-created_at", "-pk").values_list("pk", flat=True).first()
+        for lender in lenders[:heavy_lenders]
+    }
+
+    log(f"Seeding {borrows} historical borrows...")
+    statuses, weights = list(HISTORY_WEIGHTS), list(HISTORY_WEIGHTS.values())
+    borrow_count = 0
+    batch = []
+
+    def history(item_id, status):
+        at = now - timedelta(minutes=rng.randint(60 * 24 * 30, SPREAD_MINUTES))
+        returned = status == Borrow.Status.RETURNED
+        lent_at = at + timedelta(days=1) if returned else None
+        return Borrow(
+            item_id=item_id,
+            borrower_name=f"Friend {rng.randint(0, 5000)}",
+            status=status,
+            approved_at=at if returned else None,
+            lent_at=lent_at,
+            returned_at=lent_at + timedelta(days=rng.randint(1, 30)) if returned else None,
+        )
+
+    def flush():
+        nonlocal batch, borrow_count
+        created = Borrow.objects.bulk_create(batch)
+        borrow_count += len(created)
+        batch = []
+        return created
+
+    for item_id in heavy_items:
+        batch.extend(history(item_id, Borrow.Status.RETURNED) for _ in range(HEAVY_ITEM_HISTORY))
+    for _ in range(borrows):
+        batch.append(history(rng.choice(item_ids), rng.choices(statuses, weights)[0]))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    log("Seeding active borrows...")
+    lent_out = []
+    for item_id in item_ids:
+        if item_id in heavy_items:
+            continue
+        roll = rng.random()
+        for status, share in ACTIVE_SHARES.items():
+            if roll < share:
+                break
+            roll -= share
+        else:
+            continue
+        at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        if status == Borrow.Status.REQUESTED:
+            # Distinct names: one pending request per borrower and item
+            for friend in rng.sample(range(5000), rng.randint(1, 3)):
+                batch.append(Borrow(
+                    item_id=item_id, borrower_name=f"Friend {friend}", status=status,
+                ))
+        else:
+            batch.append(Borrow(
+                item_id=item_id,
+                borrower_name=f"Friend {rng.randint(0, 5000)}",
+                status=status,
+                approved_at=at,
+                lent_at=at + timedelta(hours=2) if status == Borrow.Status.LENT_OUT else None,
+            ))
+        if len(batch) >= batch_size:
+            lent_out += [b for b in flush() if b.status == Borrow.Status.LENT_OUT]
+    lent_out += [b for b in flush() if b.status == Borrow.Status.LENT_OUT]
+
+    seeded = Borrow.objects.filter(item__owner__in=lenders)
+    # requested_at is auto_now_add too: put it shortly before approval, or
+    # spread it out for requests that were denied or are still open
+    seeded.filter(approved_at__isnull=False).update(
+        requested_at=F("approved_at") - timedelta(hours=6)
+    )
+    _spread(seeded.filter(status=Borrow.Status.DENIED), "requested_at")
+    _spread(seeded.filter(status=Borrow.Status.REQUESTED), "requested_at", 60 * 24 * 30)
+
+    Item.objects.bulk_update(
+        [
+            Item(pk=borrow.item_id, active_borrow=borrow, active_borrow_status=borrow.status)
+            for borrow in lent_out
+        ],
+        ["active_borrow", "active_borrow_status"],
+        batch_size=batch_size,
+    )
+    Item.objects.filter(pk__in=heavy_items).update(is_available=True)
+    for start in range(0, len(item_ids), batch_size):
+        ItemStats.objects.bulk_create(
+            expected_stats(item_ids[start:start + batch_size]).values()
+        )
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    return {"users": len(lenders), "items": len(items), "borrows": borrow_count}
@@ -0,0 +1,3 @@
+"""
+Database backends for the library app.
+"""
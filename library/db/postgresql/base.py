@@ -0,0 +1,24 @@
+"""
+PostgreSQL backend that times connection acquisition.
+
+Identical to Django's backend except that ``get_new_connection`` is timed.
+That covers opening a new psycopg connection, or checking one out of the
+pool when pooling is on. A reused persistent connection costs nothing and
+isn't counted. ``library.middleware.ConnectionTimingMiddleware`` reports
+the totals for each request.
+"""
+
+import time
+
+from django.db.backends.postgresql import base
+
+from library.middleware import connection_acquired
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        start = time.perf_counter()
+        try:
+            return super().get_new_connection(conn_params)
+        finally:
+            connection_acquired(time.perf_counter() - start)
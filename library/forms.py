@@ -94,7 +94,28 @@ class UserSettingsForm(forms.ModelForm):
         }
 
 
-class ItemForm(forms.ModelForm):
+class UploadErrorsMixin:
+    """Report files that an upload handler rejected mid-stream.
+
+    Such uploads never reach FILES, so the handlers in library.uploads
+    record why on ``request.upload_errors``; pass ``request=request`` to
+    have them shown on the matching fields.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.request = kwargs.pop("request", None)
+        super().__init__(*args, **kwargs)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        upload_errors = getattr(self.request, "upload_errors", {})
+        for field, message in upload_errors.items():
+            if field in self.fields:
+                self.add_error(field, message)
+        return cleaned_data
+
+
+class ItemForm(UploadErrorsMixin, forms.ModelForm):
     """Form for creating/editing items."""
 
     class Meta:
@@ -110,3 +131,15 @@ class ItemForm(forms.ModelForm):
             "short_description": forms.Textarea(attrs={"rows": 2}),
             "long_description": forms.Textarea(attrs={"rows": 5}),
         }
+
+
+class ItemImportForm(UploadErrorsMixin, forms.Form):
+    """Form for importing items in bulk (see library.transfer)."""
+
+    manifest = forms.FileField(
+        help_text="An items.csv or items.jsonl manifest, or a .zip exported from this site.",
+    )
+    images = forms.FileField(
+        required=False,
+        help_text="Optional. A .zip of the images named in the manifest's image column.",
+    )
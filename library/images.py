@@ -0,0 +1,171 @@
+"""
+Responsive image derivatives for item photos.
+
+Originals can be tens of megabytes, so pages never serve them directly.
+Instead each upload gets 4:3 crops at several widths in WebP and JPEG,
+stored next to the original. File names embed a hash of the original's
+content, so a URL always refers to the same bytes and can be cached
+forever.
+"""
+
+import hashlib
+import io
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+WIDTHS = (240, 480, 960, 1600)
+FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+ASPECT_RATIO = (4, 3)
+ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+
+
+def content_digest(file, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def derivative_name(original_name, digest, width, ext):
+    """``items/photo.jpg`` -> ``items/photo.<digest>.480w.webp``."""
+    directory, filename = posixpath.split(original_name)
+    stem = filename.rsplit(".", 1)[0]
+    return posixpath.join(directory, f"{stem}.{digest[:16]}.{width}w.{ext}")
+
+
+def check_dimensions(size):
+    """Reject images whose decoded size would be unreasonably large."""
+    width, height = size
+    if width * height > settings.LIBRARY_MAX_IMAGE_PIXELS:
+        raise ValueError(
+            f"Image is too large ({width}\u00d7{height} pixels); please upload a "
+            "smaller photo."
+        )
+
+
+def inspect_header(data):
+    """Identify an image from the leading bytes of an upload.
+
+    Returns ``(format, (width, height))``, or None if ``data`` isn't enough
+    to tell yet. Raises ValueError for unsupported formats and for images
+    whose dimensions fail ``check_dimensions``.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image_format, size = image.format, image.size
+    except Image.DecompressionBombError:
+        raise ValueError("Image is too large; please upload a smaller photo.")
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        # Usually a header that spans more bytes than we have so far
+        return None
+
+    if image_format not in ALLOWED_FORMATS:
+        raise ValueError("Please upload a JPEG, PNG, WebP or GIF image.")
+    check_dimensions(size)
+    return image_format, size
+
+
+def load_image(file):
+    """Open an upload upright and in a mode every output format accepts.
+
+    JPEGs are decoded at a reduced DCT scale (Pillow's draft mode) when the
+    largest derivative is much smaller than the original, which keeps peak
+    memory proportional to the output rather than the upload.
+    """
+    image = Image.open(file)
+    check_dimensions(image.size)
+    longest = max(WIDTHS)
+    image.draft(None, (longest, longest))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    return image
+
+
+def render_derivatives(image):
+    """Yield ``(width, ext, bytes)`` for each 4:3 rendition of ``image``.
+
+    Widths larger than the source are skipped (apart from the smallest), so
+    small uploads are never upscaled.
+    """
+    ratio_w, ratio_h = ASPECT_RATIO
+    for width in WIDTHS:
+        if width > image.width and width != WIDTHS[0]:
+            break
+        size = (width, width * ratio_h // ratio_w)
+        rendition = ImageOps.fit(image, size, method=Image.Resampling.LANCZOS)
+        for ext, options in FORMATS.items():
+            frame = rendition
+            if options["format"] == "JPEG" and frame.mode != "RGB":
+                frame = frame.convert("RGB")
+            buffer = io.BytesIO()
+            frame.save(buffer, **options)
+            yield width, ext, buffer.getvalue()
+
+
+def generate_derivatives(item, force=False):
+    """Create (or remove) the derivatives for ``item.image`` and save them.
+
+    Stores a ``{"digest": ..., "<ext>": {"<width>": name}}`` map on
+    ``item.image_derivatives``. Files from a previous image are released
+    through the storage; with ``force`` they are rebuilt even if the image
+    hasn't changed.
+    """
+    storage = item.image.storage
+    previous = item.image_derivatives or {}
+    derivatives = {}
+    renditions = []
+
+    if item.image:
+        with item.image.open("rb") as original:
+            digest = content_digest(original)
+            if previous.get("digest") == digest and not force:
+                return previous
+            renditions = list(render_derivatives(load_image(original)))
+            derivatives["digest"] = digest
+
+    # Release the old files before saving: a content-addressed storage just
+    # drops a reference (the same bytes may be saved again below), and a
+    # plain one frees the names for reuse
+    for ext in FORMATS:
+        for name in previous.get(ext, {}).values():
+            storage.delete(name)
+
+    for width, ext, data in renditions:
+        name = derivative_name(item.image.name, derivatives["digest"], width, ext)
+        name = storage.save(name, ContentFile(data))
+        derivatives.setdefault(ext, {})[str(width)] = name
+
+    item.image_derivatives = derivatives
+    item.save(update_fields=["image_derivatives"])
+    return derivatives
+
+
+def mark_failed(item, error):
+    """Record on ``item`` that its derivatives can't be generated.
+
+    Pages then show the original image instead of waiting for renditions
+    that will never arrive; ``generate_derivatives`` clears the marker when
+    it next succeeds.
+    """
+    item.image_derivatives = {"error": str(error) or type(error).__name__}
+    item.save(update_fields=["image_derivatives"])
+
+
+def srcset(item, ext):
+    """``srcset`` attribute value for one format, or "" if none exist."""
+    renditions = (item.image_derivatives or {}).get(ext, {})
+    storage = item.image.storage
+    return ", ".join(
+        f"{storage.url(name)} {width}w"
+        for width, name in sorted(renditions.items(), key=lambda r: int(r[0]))
+    )
@@ -0,0 +1,173 @@
+"""
+Lightweight background jobs backed by the database.
+
+Jobs are rows in the ``Job`` table. Workers (``manage.py run_workers``)
+claim them with ``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of
+worker processes can poll the same table without handing out a job twice
+and without an external broker.
+
+With ``LIBRARY_JOBS_SYNC`` enabled, ``enqueue`` runs the handler inline
+instead, which keeps development and tests free of a worker process.
+
+A job that fails ``MAX_ATTEMPTS`` times (or once, inline) is given up on,
+and its ``on_failure`` callback, if any, gets to record that for whatever
+is waiting on it.
+"""
+
+import logging
+import signal
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY = timedelta(seconds=30)
+# A running job not finished after this long is assumed to have lost its worker
+STALE_AFTER = timedelta(minutes=15)
+
+_handlers = {}
+_failure_handlers = {}
+
+
+def register(name, on_failure=None):
+    """Decorator registering a function as the handler for job ``name``.
+
+    ``on_failure(error, **payload)`` is called once the job has failed for
+    good, with the last exception.
+    """
+    def decorator(func):
+        _handlers[name] = func
+        if on_failure is not None:
+            _failure_handlers[name] = on_failure
+        return func
+    return decorator
+
+
+def _run_inline(name, payload):
+    # Failures are logged, not raised, as in ``execute``: the caller has
+    # done its part, and a job's failure is its on_failure handler's business
+    try:
+        _handlers[name](**payload)
+    except Exception as e:
+        logger.exception("Job %s failed", name)
+        _gave_up(name, payload, e)
+
+
+def _gave_up(name, payload, error):
+    on_failure = _failure_handlers.get(name)
+    if on_failure is None:
+        return
+    try:
+        on_failure(error, **payload)
+    except Exception:
+        logger.exception("Failure handler for job %s failed", name)
+
+
+def enqueue(name, **payload):
+    """Queue job ``name`` with keyword ``payload`` (must be JSON-serializable).
+
+    The row is written in the caller's transaction, so the job only becomes
+    visible to workers if that transaction commits.
+    """
+    if name not in _handlers:
+        raise KeyError(f"No job handler registered for {name!r}.")
+    if settings.LIBRARY_JOBS_SYNC:
+        _run_inline(name, payload)
+        return None
+    return Job.objects.create(name=name, payload=payload)
+
+
+def enqueue_many(name, payloads):
+    """Queue job ``name`` once per payload in ``payloads``, in one insert."""
+    if name not in _handlers:
+        raise KeyError(f"No job handler registered for {name!r}.")
+    if settings.LIBRARY_JOBS_SYNC:
+        for payload in payloads:
+            _run_inline(name, payload)
+        return []
+    return Job.objects.bulk_create([Job(name=name, payload=payload) for payload in payloads])
+
+
+def claim():
+    """Lock and mark as running the next runnable job, or return None."""
+    now = timezone.now()
+    runnable = Q(status=Job.Status.QUEUED, run_after__lte=now) | Q(
+        status=Job.Status.RUNNING, locked_at__lt=now - STALE_AFTER
+    )
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(runnable)
+            .order_by("run_after", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.Status.RUNNING
+        job.locked_at = now
+        job.attempts += 1
+        job.save(update_fields=["status", "locked_at", "attempts"])
+    return job
+
+
+def execute(job):
+    """Run a claimed job. Finished jobs are deleted; failures are retried."""
+    try:
+        _handlers[job.name](**job.payload)
+    except Exception as e:
+        logger.exception("Job %s failed", job)
+        job.last_error = traceback.format_exc()
+        job.locked_at = None
+        if job.attempts < MAX_ATTEMPTS:
+            job.status = Job.Status.QUEUED
+            job.run_after = timezone.now() + RETRY_DELAY * job.attempts
+        else:
+            job.status = Job.Status.FAILED
+        job.save(update_fields=["status", "run_after", "locked_at", "last_error"])
+        if job.status == Job.Status.FAILED:
+            _gave_up(job.name, job.payload, e)
+        return False
+
+    job.delete()
+    return True
+
+
+def run_pending(limit=None):
+    """Run queued jobs in this process until none are left (or ``limit``)."""
+    count = 0
+    while limit is None or count < limit:
+        job = claim()
+        if job is None:
+            break
+        execute(job)
+        count += 1
+    return count
+
+
+def work(poll_interval=1.0):
+    """Worker loop: claim and run jobs until SIGTERM/SIGINT."""
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while not stopping:
+        close_old_connections()
+        job = claim()
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        execute(job)
@@ -0,0 +1,50 @@
+"""
+Management command to archive finished borrows.
+Moves denied and returned borrows older than the cutoff from Borrow into
+BorrowArchive, in batches of short transactions, so the owner pages keep
+querying a small live table. Lending history still shows archived rows.
+Run it periodically (e.g. weekly from cron).
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from library import archive
+
+
+class Command(BaseCommand):
+    help = "Moves old denied and returned borrows into the archive table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=float,
+            default=180,
+            help="Archive borrows that finished at least this many days ago (default 180).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count what would be archived without moving anything.",
+        )
+
+    def handle(self, *args, **options):
+        if options["older_than"] < 0:
+            raise CommandError("--older-than must not be negative.")
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+
+        if options["dry_run"]:
+            count = archive.archivable(cutoff).count()
+            self.stdout.write(f"Would archive {count} borrow(s) finished before {cutoff:%Y-%m-%d}.")
+            return
+
+        total = 0
+        while moved := archive.archive(cutoff, options["batch_size"]):
+            total += moved
+            self.stdout.write(f"Archived {total} borrow(s)...")
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {total} borrow(s) finished before {cutoff:%Y-%m-%d}."
+        ))
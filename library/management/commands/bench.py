@@ -0,0 +1,324 @@
+"""
+Management command to benchmark every page in library/urls.py.
+Seeds a large synthetic library (see library.datasets), then requests each
+URL in-process as the right kind of visitor and records latency, query
+count and peak memory. Results can be written as JSON and compared with an
+earlier run to catch regressions:
+
+    SETTINGS_PROFILE=bench python manage.py bench --keep --output baseline.json
+    SETTINGS_PROFILE=bench python manage.py bench --compare baseline.json
+
+The bench settings profile measures the production middleware, template
+and connection settings.
+
+Every request runs in a savepoint that is rolled back, so pages that change
+data are measured against the same state each time. The seeded data is
+rolled back at the end too unless --keep is given; later runs reuse kept
+data instead of seeding again.
+"""
+
+import json
+import statistics
+import time
+import tracemalloc
+from http.cookies import SimpleCookie
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from library import datasets
+from library.models import User
+from library.pagination import encode_cursor
+
+from .loadtest import percentile
+
+
+class Rollback(Exception):
+    pass
+
+
+# How each URL is requested: (method, visitor, POST data). Visitors are
+# "owner" (the heavy lender), "staff", "friend" (an anonymous borrower who
+# has set a name) and "anonymous". Unlisted URLs are GETs by the owner.
+REQUESTS = {
+    "home": ("get", "anonymous", None),
+    "login": ("get", "anonymous", None),
+    "logout": ("post", "owner", None),
+    "register": ("get", "anonymous", None),
+    "registration_pending": ("get", "anonymous", None),
+    "item_delete": ("post", "owner", None),
+    "item_toggle_availability": ("post", "owner", None),
+    "borrow_batch": ("post", "owner", "batch"),
+    "borrow_approve": ("post", "owner", None),
+    "borrow_deny": ("post", "owner", None),
+    "borrow_mark_lent": ("post", "owner", None),
+    "borrow_mark_returned": ("post", "owner", None),
+    "public_lending": ("get", "friend", None),
+    "public_set_name": ("post", "friend", {"borrower_name": "Bench friend"}),
+    "public_gallery_page": ("get", "friend", None),
+    "public_search": ("get", "friend", None),
+    "public_item_detail": ("get", "friend", None),
+    "public_request_borrow": ("post", "friend", None),
+    "metrics": ("get", "staff", None),
+}
+# Statements from the per-request savepoint, not counted as the view's queries
+SAVEPOINT_SQL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+# Which of the lender's borrows each borrow_id URL acts on
+BORROW_STATUS = {
+    "borrow_approve": "requested",
+    "borrow_deny": "requested",
+    "borrow_mark_lent": "approved",
+    "borrow_mark_returned": "lent_out",
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmarks every library URL against a large synthetic dataset"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--items-per-user", type=int, default=5)
+        parser.add_argument("--heavy-lenders", type=int, default=3)
+        parser.add_argument("--items-per-lender", type=int, default=10_000)
+        parser.add_argument("--borrows", type=int, default=1_000_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=508)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--warmup", type=int, default=2,
+            help="Unmeasured requests per URL first (fills caches).",
+        )
+        parser.add_argument(
+            "--url", action="append", dest="urls", metavar="NAME",
+            help="Only benchmark this URL name (repeatable).",
+        )
+        parser.add_argument("--label", default="", help="Name for this run.")
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--compare", help="Report regressions against this JSON file.")
+        parser.add_argument(
+            "--threshold", type=float, default=20.0,
+            help="Percent slowdown in median latency that counts as a regression.",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Commit the seeded data so later runs can reuse it.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['compare']}: {e}")
+
+        try:
+            with transaction.atomic(), override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+            ):
+                dataset = datasets.Dataset.load()
+                reused = dataset is not None
+                if not reused:
+                    counts = datasets.seed(
+                        users=options["users"],
+                        items_per_user=options["items_per_user"],
+                        heavy_lenders=max(options["heavy_lenders"], 1),
+                        items_per_heavy_lender=options["items_per_lender"],
+                        borrows=options["borrows"],
+                        batch_size=options["batch_size"],
+                        seed=options["seed"],
+                        log=self.stdout.write,
+                    )
+                    dataset = datasets.Dataset.load()
+                    self.stdout.write(
+                        f"Seeded {counts['users']} users, {counts['items']} items "
+                        f"and {counts['borrows']} borrows."
+                    )
+                else:
+                    self.stdout.write("Reusing the benchmark data from an earlier --keep run.")
+
+                results = self.run(dataset, options)
+                results["dataset"]["reused"] = reused
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            if not reused:
+                self.stdout.write("Benchmark data rolled back.")
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+        if baseline is not None:
+            self.compare(results, baseline, options["threshold"])
+
+    def run(self, dataset, options):
+        names = list(self.url_patterns())
+        if options["urls"]:
+            unknown = set(options["urls"]) - set(names)
+            if unknown:
+                raise CommandError(f"Unknown URL name(s): {', '.join(sorted(unknown))}")
+            names = [name for name in names if name in options["urls"]]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{'URL':<28} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'peak KiB':>9}"
+        ))
+        urls = {}
+        for name in names:
+            method, visitor, data = REQUESTS.get(name, ("get", "owner", None))
+            url, data = self.request_for(name, dataset, data)
+            # Fresh sessions per URL: logging out ends the owner's for good
+            # when sessions are cached, rollback or not
+            urls[name] = self.measure(
+                self.clients(dataset)[visitor], method, url, data, options["repeat"], options["warmup"]
+            )
+            result = urls[name]
+            style = self.style.ERROR if result["status"] >= 500 else (lambda text: text)
+            self.stdout.write(style(
+                f"{name:<28} {result['status']:>6} {result['p50_ms']:>9.2f} "
+                f"{result['p95_ms']:>9.2f} {result['queries']:>8} {result['peak_kib']:>9}"
+            ))
+
+        return {
+            "label": options["label"],
+            "finished_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "repeat": options["repeat"],
+            "dataset": {
+                "users": options["users"] + options["heavy_lenders"],
+                "items_per_lender": options["items_per_lender"],
+                "borrows": options["borrows"],
+                "seed": options["seed"],
+            },
+            "urls": urls,
+        }
+
+    def url_patterns(self):
+        """The named library URL patterns, in urls.py order."""
+        resolver = get_resolver().namespace_dict["library"][1]
+        return {pattern.name: pattern for pattern in resolver.url_patterns if pattern.name}
+
+    def clients(self, dataset):
+        owner = Client(raise_request_exception=False)
+        owner.force_login(dataset.lender)
+        staff = Client(raise_request_exception=False)
+        staff_user, _ = User.objects.get_or_create(
+            username=f"{datasets.USERNAME_PREFIX}staff",
+            defaults={"is_staff": True, "is_approved": True},
+        )
+        staff.force_login(staff_user)
+        friend = Client(raise_request_exception=False)
+        friend.post(
+            reverse("library:public_set_name", args=[dataset.lender.lending_hash]),
+            {"borrower_name": "Bench friend"},
+        )
+        return {
+            "owner": owner,
+            "staff": staff,
+            "friend": friend,
+            "anonymous": Client(raise_request_exception=False),
+        }
+
+    def request_for(self, name, dataset, data):
+        """The URL to request for ``name``, and the POST data to send."""
+        lender, item = dataset.lender, dataset.item
+        params = self.url_patterns()[name].pattern.converters
+        kwargs = {}
+        if "lending_hash" in params:
+            kwargs["lending_hash"] = lender.lending_hash
+        if "item_id" in params:
+            kwargs["item_id"] = item.pk
+        if "borrow_id" in params:
+            ids = getattr(dataset, BORROW_STATUS[name])
+            if not ids:
+                raise CommandError(f"The dataset has no {BORROW_STATUS[name]} borrows for {name}.")
+            kwargs["borrow_id"] = ids[0]
+        url = reverse(f"library:{name}", kwargs=kwargs)
+
+        if name == "public_gallery_page":
+            # A page from deep in the heavy lender's gallery
+            middle = lender.items.filter(is_available=True).order_by("-created_at", "-pk")[
+                lender.items.count() // 2:
+            ].first()
+            url += f"?cursor={encode_cursor(middle.created_at, middle.pk)}"
+        elif name in ("public_search", "item_list"):
+            url += "?q=camping"
+        if data == "batch":
+            data = {"action": "approve", "borrow_ids": dataset.requested}
+        return url, data
+
+    def measure(self, client, method, url, data, repeat, warmup):
+        cookies = client.cookies.output(header="", sep=";")
+
+        def request():
+            # Rolled back so the next request sees the same data; the client
+            # gets its cookies back in case the view logged it out.
+            with transaction.atomic():
+                client.cookies = SimpleCookie(cookies)
+                response = getattr(client, method)(url, data or {})
+                if response.streaming:
+                    b"".join(response)
+                transaction.set_rollback(True)
+            return response
+
+        for _ in range(warmup):
+            request()
+
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = request()
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = max(queries, sum(
+                not query["sql"].startswith(SAVEPOINT_SQL)
+                for query in captured.captured_queries
+            ))
+
+        tracemalloc.start()
+        try:
+            request()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            "method": method.upper(),
+            "url": url,
+            "status": response.status_code,
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "max_ms": round(timings[-1], 3),
+            "queries": queries,
+            "peak_kib": round(peak / 1024),
+        }
+
+    def compare(self, results, baseline, threshold):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Compared with {baseline.get('label') or baseline.get('finished_at', 'baseline')}"
+        ))
+        regressions = 0
+        for name, result in results["urls"].items():
+            before = baseline.get("urls", {}).get(name)
+            if before is None:
+                continue
+            problems = []
+            if result["queries"] > before["queries"]:
+                problems.append(f"queries {before['queries']} -> {result['queries']}")
+            if result["p50_ms"] > before["p50_ms"] * (1 + threshold / 100):
+                problems.append(f"p50 {before['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms")
+            if problems:
+                regressions += 1
+                self.stdout.write(self.style.WARNING(f"  {name}: {', '.join(problems)}"))
+        if regressions:
+            raise CommandError(f"{regressions} URL(s) regressed.")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
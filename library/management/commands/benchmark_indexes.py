@@ -0,0 +1,136 @@
+"""
+Management command to benchmark the Borrow/Item indexes.
+Seeds a large synthetic dataset (see library.datasets), then reports query
+plans and latencies for the hot access paths with and without the model
+indexes.
+
+Everything runs inside a transaction that is rolled back at the end (unless
+--keep is given), so it is safe to point at a development database.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from library import datasets
+from library.models import User, Item, Borrow
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Seeds ~1M borrows and compares query plans/latency with and without indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--borrows", type=int, default=1_000_000)
+        parser.add_argument("--owners", type=int, default=200)
+        parser.add_argument("--items-per-owner", type=int, default=250)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Commit the seeded data instead of rolling it back.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("This benchmark requires PostgreSQL.")
+
+        try:
+            with transaction.atomic():
+                owner, item = self.seed(options)
+                queries = self.queries(owner, item)
+
+                self.stdout.write(self.style.MIGRATE_HEADING("With indexes (after)"))
+                after = self.run(queries, options["repeat"])
+
+                self.drop_indexes()
+                self.stdout.write(self.style.MIGRATE_HEADING("Without indexes (before)"))
+                before = self.run(queries, options["repeat"])
+
+                self.stdout.write(self.style.MIGRATE_HEADING("Summary (median ms)"))
+                for name in queries:
+                    self.stdout.write(
+                        f"  {name:<28} before={before[name]:8.2f}  after={after[name]:8.2f}"
+                    )
+
+                if not options["keep"]:
+                    raise Rollback
+                # Restore the dropped indexes before committing the seed data
+                self.create_indexes()
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS("Benchmark data rolled back."))
+
+    def seed(self, options):
+        datasets.seed(
+            users=options["owners"],
+            items_per_user=options["items_per_owner"],
+            heavy_lenders=0,
+            borrows=options["borrows"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write,
+        )
+        owner = User.objects.filter(
+            username__startswith=datasets.USERNAME_PREFIX
+        ).order_by("pk").first()
+        heavy_item = (
+            Borrow.objects.filter(status=Borrow.Status.RETURNED)
+            .values_list("item_id", flat=True)
+            .first()
+        )
+        return owner, Item.objects.get(pk=heavy_item)
+
+    def queries(self, owner, item):
+        return {
+            "requests": Borrow.objects.filter(
+                item__owner=owner, status=Borrow.Status.REQUESTED
+            ).order_by("-requested_at"),
+            "pending_pickups": Borrow.objects.filter(
+                item__owner=owner, status=Borrow.Status.APPROVED
+            ).order_by("-approved_at"),
+            "lent_out": Borrow.objects.filter(
+                item__owner=owner, status=Borrow.Status.LENT_OUT
+            ).order_by("-lent_at"),
+            "item_history": Borrow.objects.filter(
+                item=item, status=Borrow.Status.RETURNED
+            ).order_by("-returned_at"),
+            "duplicate_request_check": Borrow.objects.filter(
+                item=item,
+                borrower_name__iexact="friend 42",
+                status__in=[Borrow.Status.REQUESTED, Borrow.Status.APPROVED],
+            ),
+            "gallery": owner.items.filter(is_available=True),
+        }
+
+    def run(self, queries, repeat):
+        results = {}
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.SQL_KEYWORD(f"-- {name}"))
+            self.stdout.write(queryset.explain(analyze=True))
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            results[name] = timings[len(timings) // 2]
+        return results
+
+    def model_indexes(self):
+        return [(model, index) for model in (Item, Borrow) for index in model._meta.indexes]
+
+    def drop_indexes(self):
+        with connection.schema_editor(atomic=False) as editor:
+            for model, index in self.model_indexes():
+                editor.remove_index(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def create_indexes(self):
+        with connection.schema_editor(atomic=False) as editor:
+            for model, index in self.model_indexes():
+                editor.add_index(model, index)
@@ -0,0 +1,50 @@
+"""
+Management command to garbage-collect unreferenced media files.
+Deletes content-addressed blobs whose reference count has been zero for
+longer than the grace period. Run it periodically (e.g. daily from cron).
+"""
+
+from datetime import timedelta
+
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from library.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = "Deletes media blobs that are no longer referenced"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=24,
+            help="Only delete blobs unreferenced for at least this long (default 24).",
+        )
+        parser.add_argument(
+            "--orphans",
+            action="store_true",
+            help="Also delete hashed files on disk that have no Blob row.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List what would be deleted without deleting anything.",
+        )
+
+    def handle(self, *args, **options):
+        storage = storages["default"]
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError("The default storage is not content-addressed.")
+
+        before = timezone.now() - timedelta(hours=options["grace_hours"])
+        removed = storage.collect(
+            before, dry_run=options["dry_run"], orphans=options["orphans"]
+        )
+        for name in removed:
+            self.stdout.write(f"  {name}")
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(removed)} unreferenced file(s)."))
@@ -0,0 +1,52 @@
+"""
+Management command to export a user's items.
+Writes a CSV or JSON Lines manifest, or with --images a zip of the manifest
+and every image, which import_items (or the import page) reads back.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library import transfer
+from library.models import User
+
+
+class Command(BaseCommand):
+    help = "Exports a user's items as a manifest, or a zip with their images"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("output", help="File to write (.csv, .jsonl or .zip).")
+        parser.add_argument(
+            "--format",
+            choices=sorted(transfer.MANIFEST_NAMES),
+            help="Manifest format (default: from the output name, or csv in a zip).",
+        )
+
+    def handle(self, *args, **options):
+        owner = User.objects.filter(username=options["username"]).first()
+        if owner is None:
+            raise CommandError(f"No user named {options['username']!r}.")
+
+        output = options["output"]
+        archive = output.lower().endswith(".zip")
+        fmt = options["format"]
+        if fmt is None:
+            try:
+                fmt = "csv" if archive else transfer.manifest_format(output)
+            except transfer.ManifestError:
+                raise CommandError("Name the output .csv, .jsonl or .zip, or pass --format.")
+
+        try:
+            if archive:
+                with open(output, "wb") as f:
+                    for chunk in transfer.export_archive(owner, fmt):
+                        f.write(chunk)
+            else:
+                with open(output, "w", encoding="utf-8", newline="") as f:
+                    for line in transfer.export_manifest(owner, fmt):
+                        f.write(line)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        count = owner.items.count()
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} item(s) to {output}."))
@@ -0,0 +1,39 @@
+"""
+Management command to generate responsive image derivatives.
+Backfills renditions for items uploaded before derivatives existed or whose
+background job gave up, or regenerates all of them with --force (e.g. after
+changing the widths).
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from library.images import generate_derivatives
+from library.models import Item
+
+
+class Command(BaseCommand):
+    help = "Generates missing responsive image derivatives for item images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate derivatives even for items that already have them.",
+        )
+
+    def handle(self, *args, **options):
+        items = Item.objects.exclude(image="")
+        if not options["force"]:
+            items = items.filter(Q(image_derivatives={}) | Q(image_derivatives__has_key="error"))
+
+        count = 0
+        for item in items.iterator():
+            try:
+                generate_derivatives(item, force=options["force"])
+            except (OSError, ValueError) as e:
+                self.stdout.write(self.style.WARNING(f"Skipping item {item.pk}: {e}"))
+                continue
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {count} item(s)."))
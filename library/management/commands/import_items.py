@@ -0,0 +1,59 @@
+"""
+Management command to import items in bulk into a user's library.
+Reads a CSV or JSON Lines manifest, or a zip made by export_items, in the
+format described in library.transfer. Nothing is imported unless every row
+is valid; image derivatives are queued for the worker.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library import transfer
+from library.models import User
+
+
+class Command(BaseCommand):
+    help = "Imports items from a manifest (and image archive) into a user's library"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("manifest", help="An items.csv or items.jsonl manifest, or an export .zip.")
+        parser.add_argument("--images", help="A .zip of the images named in the manifest.")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate every row without importing anything.",
+        )
+
+    def handle(self, *args, **options):
+        owner = User.objects.filter(username=options["username"]).first()
+        if owner is None:
+            raise CommandError(f"No user named {options['username']!r}.")
+
+        try:
+            with open(options["manifest"], "rb") as manifest:
+                images = open(options["images"], "rb") if options["images"] else None
+                try:
+                    result = transfer.import_items(
+                        owner,
+                        manifest,
+                        images=images,
+                        batch_size=options["batch_size"],
+                        dry_run=options["dry_run"],
+                    )
+                finally:
+                    if images is not None:
+                        images.close()
+        except (OSError, transfer.ManifestError) as e:
+            raise CommandError(str(e))
+
+        if result.errors:
+            for line, message in result.errors:
+                self.stderr.write(f"Line {line}: {message}")
+            raise CommandError(f"{len(result.errors)} invalid row(s); nothing was imported.")
+        if options["dry_run"]:
+            self.stdout.write(f"All {result.rows} row(s) are valid.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.rows} item(s) into {owner.username}'s library."
+        ))
@@ -0,0 +1,159 @@
+"""
+Management command to load-test the public pages of a running server.
+Sends concurrent anonymous GETs for one lender's gallery, item pages and
+next gallery page, then reports throughput and latency percentiles. Run it
+against the same data with SERVER_INTERFACE=wsgi and then =asgi to compare:
+
+    SERVER_INTERFACE=asgi gunicorn &
+    python manage.py loadtest --label asgi --json results.jsonl
+"""
+
+import json
+import math
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.urls import reverse
+
+from library.models import User
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Command(BaseCommand):
+    help = "Load-tests the public lending pages and reports throughput and latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--lending-hash",
+            help="Lender to request (default: the approved user with the most items).",
+        )
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run.")
+        parser.add_argument("--timeout", type=float, default=10.0)
+        parser.add_argument("--label", default="", help="Name for this run, e.g. wsgi or asgi.")
+        parser.add_argument("--json", help="Append the results as a JSON line to this file.")
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"].rstrip("/")
+        paths = self.target_paths(base_url, options["lending_hash"])
+
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+        deadline = time.monotonic() + options["duration"]
+
+        def client(offset):
+            i = offset
+            while time.monotonic() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(
+                        base_url + path, timeout=options["timeout"]
+                    ) as response:
+                        response.read()
+                    failed = False
+                except (urllib.error.URLError, OSError):
+                    failed = True
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if failed:
+                        errors[path] += 1
+                    else:
+                        latencies[path].append(elapsed)
+
+        self.stdout.write(
+            f"Requesting {len(paths)} path(s) from {base_url} with "
+            f"{options['concurrency']} clients for {options['duration']:g}s..."
+        )
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            for offset in range(options["concurrency"]):
+                pool.submit(client, offset)
+        elapsed = time.monotonic() - started
+
+        result = self.summarize(latencies, errors, elapsed)
+        result.update(label=options["label"], concurrency=options["concurrency"])
+        self.report(result)
+        if options["json"]:
+            with open(options["json"], "a") as f:
+                f.write(json.dumps(result) + "\n")
+
+    def target_paths(self, base_url, lending_hash):
+        owners = User.objects.filter(is_approved=True)
+        if lending_hash:
+            owner = owners.filter(lending_hash=lending_hash).first()
+        else:
+            owner = owners.annotate(item_count=Count("items")).order_by("-item_count").first()
+        if owner is None:
+            raise CommandError("No approved lender found; seed some data first.")
+
+        gallery = reverse("library:public_lending", args=[owner.lending_hash])
+        paths = [gallery]
+        for item_id in owner.items.filter(is_available=True).values_list("id", flat=True)[:5]:
+            paths.append(
+                reverse("library:public_item_detail", args=[owner.lending_hash, item_id])
+            )
+
+        # Follow the gallery's load-more link, if it has one
+        try:
+            with urllib.request.urlopen(base_url + gallery, timeout=10) as response:
+                html = response.read().decode()
+        except (urllib.error.URLError, OSError) as e:
+            raise CommandError(f"Could not reach {base_url}: {e}")
+        more = re.search(r'class="load-more" hx-get="([^"]+)"', html)
+        if more:
+            paths.append(more.group(1).replace("&amp;", "&"))
+        return paths
+
+    def summarize(self, latencies, errors, elapsed):
+        everything = sorted(t for times in latencies.values() for t in times)
+        ms = lambda seconds: round(seconds * 1000, 2)
+        return {
+            "requests": len(everything),
+            "errors": sum(errors.values()),
+            "seconds": round(elapsed, 2),
+            "rps": round(len(everything) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": ms(percentile(everything, 50)),
+            "p95_ms": ms(percentile(everything, 95)),
+            "p99_ms": ms(percentile(everything, 99)),
+            "paths": {
+                path: {
+                    "requests": len(latencies.get(path, [])),
+                    "errors": errors.get(path, 0),
+                    "p99_ms": ms(percentile(sorted(latencies.get(path, [])), 99)),
+                }
+                for path in set(latencies) | set(errors)
+            },
+        }
+
+    def report(self, result):
+        label = f" [{result['label']}]" if result["label"] else ""
+        self.stdout.write(
+            f"{result['requests']} requests in {result['seconds']}s{label}: "
+            f"{result['rps']} req/s, p50 {result['p50_ms']}ms, "
+            f"p95 {result['p95_ms']}ms, p99 {result['p99_ms']}ms"
+        )
+        for path, stats in sorted(result["paths"].items()):
+            self.stdout.write(
+                f"  {path}: {stats['requests']} ok, {stats['errors']} failed, "
+                f"p99 {stats['p99_ms']}ms"
+            )
+        style = self.style.WARNING if result["errors"] else self.style.SUCCESS
+        self.stdout.write(style(f"{result['errors']} request(s) failed."))
@@ -0,0 +1,103 @@
+"""
+Management command to profile application boot time.
+Boots the app in a fresh interpreter with `python -X importtime` (this
+process has imported everything already), loads the URLconf the way the
+first request would, and reports where the import time went, per
+top-level package or per module:
+
+    python manage.py profile_boot
+    python manage.py profile_boot --by module --limit 40
+"""
+
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+BOOT_CODE = """\
+import {module}
+from django.urls import get_resolver
+get_resolver().url_patterns
+"""
+
+
+def parse_importtime(output):
+    """``[(module, self_us, cumulative_us)]`` from ``-X importtime`` output."""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = [field.strip() for field in line[len("import time:"):].split("|")]
+        if len(fields) != 3 or not fields[0].isdigit():
+            # The header line
+            continue
+        imports.append((fields[2], int(fields[0]), int(fields[1])))
+    return imports
+
+
+class Command(BaseCommand):
+    help = "Reports the import cost of booting the app, per package or module"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interface",
+            choices=["wsgi", "asgi"],
+            help="Which application to boot (default: SERVER_INTERFACE).",
+        )
+        parser.add_argument(
+            "--by",
+            choices=["package", "module"],
+            default="package",
+            help="Group self time by top-level package, or list modules by cumulative time.",
+        )
+        parser.add_argument("--limit", type=int, default=25)
+
+    def handle(self, *args, **options):
+        interface = options["interface"] or settings.SERVER_INTERFACE
+        code = BOOT_CODE.format(module=f"stuff4friends.{interface}")
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+        elapsed = time.perf_counter() - start
+        if result.returncode:
+            raise CommandError(f"Booting the {interface} app failed:\n{result.stderr[-2000:]}")
+
+        imports = parse_importtime(result.stderr)
+        total = sum(self_us for _, self_us, _ in imports)
+        self.stdout.write(
+            f"Booted the {interface} app in {elapsed * 1000:.0f} ms "
+            f"({total / 1000:.0f} ms importing {len(imports)} modules)."
+        )
+
+        if options["by"] == "package":
+            packages = defaultdict(lambda: [0, 0])
+            for module, self_us, _ in imports:
+                package = packages[module.split(".")[0]]
+                package[0] += self_us
+                package[1] += 1
+            rows = sorted(
+                ((name, us, count) for name, (us, count) in packages.items()),
+                key=lambda row: row[1],
+                reverse=True,
+            )
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{'package':<40} {'ms':>8} {'share':>6} {'modules':>8}"
+            ))
+            for name, us, count in rows[:options["limit"]]:
+                self.stdout.write(f"{name:<40} {us / 1000:>8.1f} {us / total:>6.1%} {count:>8}")
+        else:
+            rows = sorted(imports, key=lambda row: row[2], reverse=True)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{'module':<50} {'self ms':>8} {'cumul. ms':>10}"
+            ))
+            for module, self_us, cumulative_us in rows[:options["limit"]]:
+                self.stdout.write(f"{module:<50} {self_us / 1000:>8.1f} {cumulative_us / 1000:>10.1f}")
@@ -0,0 +1,62 @@
+"""
+Management command to purge session rows left by anonymous borrowers.
+Borrower names used to be kept in the session, which gave every friend who
+typed a name a django_session row. They now live in a signed cookie, so
+this deletes sessions holding nothing but borrower names, strips the names
+from the rest, and clears expired sessions.
+"""
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+LEGACY_KEY_PREFIX = "borrower_name_"
+
+
+class Command(BaseCommand):
+    help = "Deletes anonymous borrower sessions and expired sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count what would change without changing anything.",
+        )
+
+    def handle(self, *args, **options):
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        expired_count = expired.count()
+
+        anonymous, stripped = [], []
+        sessions = Session.objects.filter(expire_date__gte=timezone.now())
+        for session in sessions.iterator(chunk_size=options["batch_size"]):
+            data = session.get_decoded()
+            kept = {k: v for k, v in data.items() if not k.startswith(LEGACY_KEY_PREFIX)}
+            if len(kept) == len(data):
+                continue
+            if kept:
+                stripped.append((session, kept))
+            else:
+                anonymous.append(session.pk)
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Would delete {expired_count} expired and {len(anonymous)} "
+                f"borrower-only session(s), and strip borrower names from {len(stripped)}."
+            )
+            return
+
+        expired.delete()
+        batch_size = options["batch_size"]
+        for start in range(0, len(anonymous), batch_size):
+            Session.objects.filter(pk__in=anonymous[start:start + batch_size]).delete()
+        with transaction.atomic():
+            for session, kept in stripped:
+                Session.objects.save(session.pk, kept, session.expire_date)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {expired_count} expired and {len(anonymous)} borrower-only "
+            f"session(s); stripped borrower names from {len(stripped)}."
+        ))
@@ -0,0 +1,70 @@
+"""
+Management command to verify or rebuild Item.active_borrow.
+Compares each item's denormalized active borrow pointer against its actual
+LENT_OUT borrow and repairs any drift (e.g. from edits made in the admin).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from library.cache import invalidate_owner
+from library.models import Item, Borrow
+
+
+class Command(BaseCommand):
+    help = "Verifies Item.active_borrow against LENT_OUT borrows and rebuilds it"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drift; exit with an error if any is found.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        lent_out = Borrow.objects.filter(
+            item=OuterRef("pk"),
+            status=Borrow.Status.LENT_OUT,
+        ).order_by("-lent_at")
+        items = Item.objects.annotate(
+            expected_borrow_id=Subquery(lent_out.values("id")[:1]),
+        ).values_list(
+            "id", "active_borrow_id", "active_borrow_status", "expected_borrow_id"
+        )
+
+        drifted = {}
+        for item_id, active_id, active_status, expected_id in items.iterator():
+            expected_status = Borrow.Status.LENT_OUT if expected_id else ""
+            if active_id != expected_id or active_status != expected_status:
+                drifted[item_id] = expected_id
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All active borrow pointers are consistent."))
+            return
+
+        if options["check"]:
+            raise CommandError(f"{len(drifted)} item(s) have a stale active borrow.")
+
+        ids = list(drifted)
+        batch_size = options["batch_size"]
+        with transaction.atomic():
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start:start + batch_size]
+                Item.objects.filter(id__in=batch).update(
+                    active_borrow_id=Subquery(lent_out.values("id")[:1]),
+                )
+                Item.objects.filter(id__in=batch, active_borrow__isnull=False).update(
+                    active_borrow_status=Borrow.Status.LENT_OUT,
+                )
+                Item.objects.filter(id__in=batch, active_borrow__isnull=True).update(
+                    active_borrow_status="",
+                )
+            owner_ids = Item.objects.filter(id__in=ids).values_list("owner_id", flat=True)
+            for owner_id in set(owner_ids):
+                invalidate_owner(owner_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt active borrow for {len(drifted)} item(s).")
+        )
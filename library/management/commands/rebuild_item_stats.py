@@ -0,0 +1,68 @@
+"""
+Management command to verify or rebuild ItemStats.
+Recomputes each item's lending stats from its returned borrows and repairs
+any drift (e.g. from edits made in the admin). Also backfills the stats for
+history recorded before they existed.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from library.cache import invalidate_owner
+from library.models import Item, ItemStats
+from library.services.item_stats import expected_stats
+
+STATS_FIELDS = ["times_borrowed", "total_loan_time", "longest_loan", "last_returned_at"]
+
+
+class Command(BaseCommand):
+    help = "Verifies ItemStats against the returned borrow history and rebuilds it"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drift; exit with an error if any is found.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        item_ids = list(Item.objects.order_by("pk").values_list("pk", flat=True))
+        batch_size = options["batch_size"]
+
+        stale, orphaned = [], []
+        for start in range(0, len(item_ids), batch_size):
+            batch = item_ids[start:start + batch_size]
+            expected = expected_stats(batch)
+            current = ItemStats.objects.in_bulk(batch)
+            for item_id, stats in expected.items():
+                existing = current.get(item_id)
+                if existing is None or any(
+                    getattr(existing, field) != getattr(stats, field) for field in STATS_FIELDS
+                ):
+                    stale.append(stats)
+            orphaned += [item_id for item_id in current if item_id not in expected]
+
+        drifted = len(stale) + len(orphaned)
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All item stats are consistent."))
+            return
+
+        if options["check"]:
+            raise CommandError(f"{drifted} item(s) have stale lending stats.")
+
+        with transaction.atomic():
+            ItemStats.objects.bulk_create(
+                stale,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=["item"],
+                update_fields=STATS_FIELDS,
+            )
+            ItemStats.objects.filter(item_id__in=orphaned).delete()
+            changed = [stats.item_id for stats in stale] + orphaned
+            owner_ids = Item.objects.filter(id__in=changed).values_list("owner_id", flat=True)
+            for owner_id in set(owner_ids):
+                invalidate_owner(owner_id)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt lending stats for {drifted} item(s)."))
@@ -0,0 +1,72 @@
+"""
+Management command to run background job workers.
+Starts a pool of worker processes that claim jobs from the Job table with
+SELECT ... FOR UPDATE SKIP LOCKED, so no external broker is needed.
+"""
+
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from library import jobs
+
+
+class Command(BaseCommand):
+    help = "Runs background job workers (image processing, etc.)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.LIBRARY_JOB_WORKERS,
+            help="Number of worker processes (default: JOB_WORKERS, or 2).",
+        )
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run all pending jobs in this process, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            count = jobs.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} job(s)."))
+            return
+
+        # Children must open their own database connections, and a
+        # connection pool's threads don't survive fork()
+        connections.close_all()
+        for connection in connections.all():
+            if connection.settings_dict["OPTIONS"].get("pool"):
+                connection.close_pool()
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(
+                target=jobs.work,
+                kwargs={"poll_interval": options["poll_interval"]},
+                name=f"job-worker-{i}",
+            )
+            for i in range(options["processes"])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(
+            self.style.SUCCESS(f"Started {len(workers)} job worker(s).")
+        )
+
+        def shutdown(signum, frame):
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        # Workers finish their current job on SIGTERM before exiting
+        for worker in workers:
+            worker.join()
+        self.stdout.write("Job workers stopped.")
@@ -0,0 +1,78 @@
+"""
+Management command to start the production server.
+Replaces `migrate && ensure_root_user && gunicorn`, which booted Django
+three times and then once more in every worker. Here Django boots once:
+the schema is migrated only if migrations are pending (otherwise the
+database checks migrate would run are run directly; --no-migrate warns
+about any pending ones), the root user is ensured, and gunicorn starts in
+the same process with the app preloaded, so workers fork with everything
+already imported.
+
+Gunicorn is configured from gunicorn.conf.py as usual (SERVER_INTERFACE,
+BIND, WEB_CONCURRENCY).
+"""
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from gunicorn.app.base import Application
+from gunicorn.util import import_app
+
+
+class Server(Application):
+    """Gunicorn with gunicorn.conf.py and a preloaded app, ignoring sys.argv."""
+
+    def __init__(self, config_file):
+        self.config_file = config_file
+        super().__init__()
+
+    def load_config(self):
+        self.load_config_from_file(self.config_file)
+        self.cfg.set("preload_app", True)
+
+    def load(self):
+        return import_app(self.cfg.wsgi_app)
+
+
+class Command(BaseCommand):
+    help = "Migrates if needed, ensures the root user and runs gunicorn with the app preloaded"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--no-migrate",
+            action="store_true",
+            help="Don't apply pending migrations (e.g. when a release step runs them).",
+        )
+
+    def handle(self, *args, **options):
+        database = options["database"]
+        pending = self.pending_migrations(database)
+        if pending and not options["no_migrate"]:
+            call_command("migrate", database=database, interactive=False)
+        else:
+            self.check(databases=[database])
+            if pending:
+                self.stdout.write(self.style.WARNING(
+                    f"{len(pending)} migration(s) not applied (--no-migrate): "
+                    + ", ".join(f"{migration.app_label}.{migration.name}" for migration, _ in pending)
+                ))
+            else:
+                self.stdout.write("No migrations to apply.")
+        call_command("ensure_root_user")
+
+        # Workers must not share the connections (or pools) opened above
+        for connection in connections.all(initialized_only=True):
+            connection.close()
+            if hasattr(connection, "close_pool"):
+                connection.close_pool()
+
+        Server(str(settings.BASE_DIR / "gunicorn.conf.py")).run()
+
+    def pending_migrations(self, database):
+        """The ``(migration, backwards)`` plan ``migrate`` would apply."""
+        executor = MigrationExecutor(connections[database])
+        return executor.migration_plan(executor.loader.graph.leaf_nodes())
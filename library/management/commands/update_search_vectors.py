@@ -0,0 +1,21 @@
+"""
+Management command to rebuild Item.search_vector.
+Backfills the full-text search column for items saved before search existed
+(or after changing the search configuration). PostgreSQL only.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from library.models import Item
+from library.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Recomputes the full-text search vector for every item"
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Search vectors are only stored on PostgreSQL.")
+        count = update_search_vectors(Item.objects.all())
+        self.stdout.write(self.style.SUCCESS(f"Updated search vectors for {count} item(s)."))
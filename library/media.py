@@ -0,0 +1,169 @@
+"""
+Serving uploaded media from the application process.
+
+Production runs WhiteNoise behind gunicorn with no reverse proxy, and
+WhiteNoise only knows about files present at startup, so uploads are served
+by ``serve_media`` instead. Responses are ``FileResponse``s over the open
+file, which gunicorn sends with ``sendfile()``. The view answers
+conditional requests and single byte ranges.
+
+Content-addressed files never change under their name, so their ETag comes
+straight from the name and they are cached as immutable for a year.
+"""
+
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .storage import HASHED_NAME_RE
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# Derivatives named by images.derivative_name before storage was hashed
+LEGACY_DERIVATIVE_RE = re.compile(r"\.(?P<digest>[0-9a-f]{16})\.\d+w\.\w+$")
+RANGE_RE = re.compile(r"^bytes=(?P<start>\d*)-(?P<end>\d*)$")
+
+
+class _FileRange:
+    """A read-only window onto ``file`` covering ``length`` bytes from ``start``.
+
+    Exposes ``fileno()`` so gunicorn can still use ``sendfile()``; it sends
+    from the current offset and stops at the response's Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _validators(name, stat):
+    """``(etag, immutable)`` for a stored file."""
+    filename = os.path.basename(name)
+    if HASHED_NAME_RE.match(filename):
+        return f'"{filename.split(".", 1)[0]}"', True
+    legacy = LEGACY_DERIVATIVE_RE.search(filename)
+    if legacy:
+        return f'"{legacy["digest"]}-{filename.rsplit(".", 2)[-2]}"', True
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"', False
+
+
+def _parse_range(header, size):
+    """Return ``(start, length)`` for a single byte range, or None to send
+    the whole file. Raises ValueError if the range can't be satisfied."""
+    match = RANGE_RE.match(header.strip())
+    if not match or not (match["start"] or match["end"]):
+        # Malformed or multiple ranges: a full response is always allowed
+        return None
+    if match["start"]:
+        start = int(match["start"])
+        end = int(match["end"]) if match["end"] else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(match["end"]), 0)
+        end = size - 1
+    end = min(end, size - 1)
+    if start > end:
+        raise ValueError
+    return start, end - start + 1
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get("If-Range")
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', 'W/"')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file from MEDIA_ROOT (HEAD/GET only)."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Not found.")
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404("Not found.")
+    if not os.path.isfile(full_path):
+        raise Http404("Not found.")
+
+    etag, immutable = _validators(path, stat)
+    last_modified = int(stat.st_mtime)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": (
+            f"public, max-age={IMMUTABLE_MAX_AGE}, immutable" if immutable
+            else f"public, max-age={settings.LIBRARY_MEDIA_MAX_AGE}"
+        ),
+    }
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        for header, value in headers.items():
+            response.headers.setdefault(header, value)
+        return response
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+    size = stat.st_size
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416, headers=headers)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response["Content-Length"] = size if byte_range is None else byte_range[1]
+    elif byte_range is None:
+        response = FileResponse(
+            open(full_path, "rb"), content_type=content_type, headers=headers
+        )
+    else:
+        start, length = byte_range
+        response = FileResponse(
+            _FileRange(open(full_path, "rb"), start, length),
+            content_type=content_type,
+            headers=headers,
+        )
+        response["Content-Length"] = length
+
+    if byte_range is not None:
+        start, length = byte_range
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{start + length - 1}/{size}"
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return response
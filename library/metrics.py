@@ -0,0 +1,138 @@
+"""
+Per-view request metrics in Prometheus format.
+
+``PerformanceMiddleware`` records each request's wall time, database time
+and query count against its URL name (``library:public_lending``). Each
+process keeps cumulative histograms in memory and copies a snapshot into
+the shared cache every few seconds. ``/metrics`` sums the snapshots of all
+live processes, so any gunicorn worker can answer a scrape.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICS = {
+    # name: (help, buckets)
+    "library_request_duration_seconds": ("Wall time per view.", SECONDS_BUCKETS),
+    "library_request_db_seconds": ("Time spent in database queries per view.", SECONDS_BUCKETS),
+    "library_request_queries": ("Database queries per view.", QUERY_BUCKETS),
+}
+
+PROCESSES_KEY = "library:metrics:processes"
+SNAPSHOT_KEY = "library:metrics:{pid}"
+FLUSH_INTERVAL = 5
+# Snapshots of processes that stop flushing (exited workers) expire
+SNAPSHOT_TIMEOUT = 60 * 10
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more queries than its LIBRARY_QUERY_BUDGETS entry allows."""
+
+
+class Registry:
+    """Cumulative histograms for this process, keyed by metric and view."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.last_flush = 0.0
+
+    def observe(self, view, duration, db_time, queries):
+        values = {
+            "library_request_duration_seconds": duration,
+            "library_request_db_seconds": db_time,
+            "library_request_queries": queries,
+        }
+        with self.lock:
+            for name, value in values.items():
+                buckets = METRICS[name][1]
+                histogram = self.histograms.setdefault(
+                    (name, view), {"buckets": [0] * len(buckets), "sum": 0, "count": 0}
+                )
+                # Cumulative counts are computed when rendering
+                index = bisect_left(buckets, value)
+                if index < len(buckets):
+                    histogram["buckets"][index] += 1
+                histogram["sum"] += value
+                histogram["count"] += 1
+            flush = time.monotonic() - self.last_flush >= FLUSH_INTERVAL
+            if flush:
+                self.last_flush = time.monotonic()
+        if flush:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                key: {**histogram, "buckets": list(histogram["buckets"])}
+                for key, histogram in self.histograms.items()
+            }
+
+    def flush(self):
+        """Publish this process's snapshot for ``collect()`` in other workers."""
+        pid = os.getpid()
+        cache.set(SNAPSHOT_KEY.format(pid=pid), self.snapshot(), timeout=SNAPSHOT_TIMEOUT)
+        pids = cache.get(PROCESSES_KEY) or []
+        if pid not in pids:
+            cache.set(PROCESSES_KEY, [*pids, pid], timeout=None)
+
+
+registry = Registry()
+
+
+def collect():
+    """Sum the histograms of every process that has flushed recently."""
+    own_pid = os.getpid()
+    snapshots = [registry.snapshot()]
+    live = [own_pid]
+    for pid in cache.get(PROCESSES_KEY) or []:
+        if pid == own_pid:
+            continue
+        snapshot = cache.get(SNAPSHOT_KEY.format(pid=pid))
+        if snapshot is not None:
+            snapshots.append(snapshot)
+            live.append(pid)
+    cache.set(PROCESSES_KEY, live, timeout=None)
+
+    merged = {}
+    for snapshot in snapshots:
+        for key, histogram in snapshot.items():
+            total = merged.setdefault(
+                key, {"buckets": [0] * len(histogram["buckets"]), "sum": 0, "count": 0}
+            )
+            for i, count in enumerate(histogram["buckets"]):
+                total["buckets"][i] += count
+            total["sum"] += histogram["sum"]
+            total["count"] += histogram["count"]
+    return merged
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(histograms):
+    """Prometheus text exposition (version 0.0.4) of merged histograms."""
+    lines = []
+    for name, (help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (metric, view), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            view = _label(view)
+            cumulative = 0
+            for bound, count in zip(buckets, histogram["buckets"]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{view="{view}",le="+Inf"}} {histogram["count"]}')
+            lines.append(f'{name}_sum{{view="{view}"}} {histogram["sum"]}')
+            lines.append(f'{name}_count{{view="{view}"}} {histogram["count"]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,181 @@
+"""
+Request middleware for the library app.
+"""
+
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger("library.db")
+performance_logger = logging.getLogger("library.performance")
+
+
+def add_server_timing(response, metric):
+    """Append a metric to the response's Server-Timing header."""
+    existing = response.get("Server-Timing")
+    response["Server-Timing"] = f"{existing}, {metric}" if existing else metric
+
+
+# Connections acquired for the request ConnectionTimingMiddleware is
+# handling, if any
+_request_acquisitions = ContextVar("request_acquisitions", default=None)
+
+
+def connection_acquired(seconds):
+    """Count a connection opened (or checked out of the pool) in ``seconds``.
+
+    Called by the ``library.db.postgresql`` backend. Like ``time_query``,
+    this goes through a context variable rather than the connection, as an
+    async view acquires connections on another thread.
+    """
+    acquisitions = _request_acquisitions.get()
+    if acquisitions is not None:
+        acquisitions["count"] += 1
+        acquisitions["seconds"] += seconds
+
+
+class ConnectionTimingMiddleware:
+    """Measure how long each request waits to acquire database connections.
+
+    Counts come from the ``library.db.postgresql`` backend, which times new
+    connections and pool checkouts (see ``connection_acquired``). Every
+    request that acquired one is logged at DEBUG on ``library.db``. With
+    LIBRARY_SERVER_TIMING on, the total is also sent as a ``db-connect``
+    Server-Timing metric for browser devtools. Runs natively under both WSGI
+    and ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        acquisitions = {"count": 0, "seconds": 0.0}
+        token = _request_acquisitions.set(acquisitions)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_acquisitions.reset(token)
+        return self.report(request, response, acquisitions)
+
+    async def __acall__(self, request):
+        acquisitions = {"count": 0, "seconds": 0.0}
+        token = _request_acquisitions.set(acquisitions)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_acquisitions.reset(token)
+        return self.report(request, response, acquisitions)
+
+    def report(self, request, response, acquisitions):
+        count, seconds = acquisitions["count"], acquisitions["seconds"]
+        if count:
+            logger.debug(
+                "%s %s acquired %d connection(s) in %.1fms",
+                request.method, request.path, count, seconds * 1000,
+            )
+        if settings.LIBRARY_SERVER_TIMING:
+            add_server_timing(
+                response, f'db-connect;dur={seconds * 1000:.1f};desc="{count} acquired"'
+            )
+        return response
+
+
+# Queries run for the request PerformanceMiddleware is handling, if any
+_request_queries = ContextVar("request_queries", default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper that counts and times queries for PerformanceMiddleware.
+
+    ``library.signals`` installs it on every connection as it opens. The
+    counters live in a context variable rather than on the connection:
+    async views run their queries on another thread's connection, but
+    asgiref carries the context variable across.
+    """
+    queries = _request_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries["count"] += 1
+        queries["seconds"] += time.perf_counter() - start
+
+
+class PerformanceMiddleware:
+    """Record wall time, database time and query count for each view.
+
+    Observations go to ``library.metrics`` under the URL name, for
+    ``/metrics``. With LIBRARY_SERVER_TIMING on, they are also sent as
+    ``app`` and ``db`` Server-Timing metrics. Views listed in
+    LIBRARY_QUERY_BUDGETS that run more queries than their budget are
+    logged. With LIBRARY_QUERY_BUDGET_ACTION = "raise", as in the test
+    suite, they raise ``QueryBudgetExceeded`` instead. Work done while a
+    streaming response is consumed happens after this returns and is not
+    counted. Runs natively under both WSGI and ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        queries = {"count": 0, "seconds": 0.0}
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        return self.record(request, response, time.perf_counter() - start, queries)
+
+    async def __acall__(self, request):
+        queries = {"count": 0, "seconds": 0.0}
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        return self.record(request, response, time.perf_counter() - start, queries)
+
+    def record(self, request, response, duration, queries):
+        match = request.resolver_match
+        view = match.view_name if match else "<unresolved>"
+        metrics.registry.observe(view, duration, queries["seconds"], queries["count"])
+
+        if settings.LIBRARY_SERVER_TIMING:
+            add_server_timing(response, f"app;dur={duration * 1000:.1f}")
+            add_server_timing(
+                response,
+                f'db;dur={queries["seconds"] * 1000:.1f};desc="{queries["count"]} queries"',
+            )
+
+        budget = settings.LIBRARY_QUERY_BUDGETS.get(view)
+        if budget is not None and queries["count"] > budget:
+            message = f"{view} ran {queries['count']} queries (budget {budget})"
+            if settings.LIBRARY_QUERY_BUDGET_ACTION == "raise":
+                raise metrics.QueryBudgetExceeded(message)
+            performance_logger.warning(message)
+        return response
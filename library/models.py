@@ -1,5 +1,10 @@
 import secrets
+from datetime import timedelta
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 
@@ -39,6 +44,10 @@ class User(AbstractUser):
         help_text="Whether friends can see borrower names in lending history.",
     )
 
+    def item_summary(self):
+        """Item and borrow counts for this user's library, in one query."""
+        return self.items.summary()
+
     def regenerate_lending_hash(self):
         self.lending_hash = generate_lending_hash()
         self.save(update_fields=["lending_hash"])
@@ -47,6 +56,47 @@ class User(AbstractUser):
         return self.username
 
 
+class ItemQuerySet(models.QuerySet):
+    def with_borrow_state(self):
+        """Load each item's current LENT_OUT borrow alongside it.
+
+        Follows the denormalized ``active_borrow`` pointer, so
+        ``is_currently_borrowed`` and ``current_borrow`` answer without a
+        query per item when rendering galleries and lists.
+        """
+        return self.select_related("active_borrow")
+
+    def lendable(self):
+        """Items that are available and not currently lent out."""
+        return self.filter(is_available=True, active_borrow__isnull=True)
+
+    def summary(self):
+        """Count items and their borrows by state using conditional aggregation.
+
+        Returns a dict with ``total``, ``available``, ``borrowed``,
+        ``requested``, ``pending_pickup`` and ``lent_out`` keys. Item counts
+        are distinct because the borrows join fans out one row per borrow.
+        """
+        return self.aggregate(
+            total=models.Count("pk", distinct=True),
+            available=models.Count(
+                "pk", filter=models.Q(is_available=True), distinct=True
+            ),
+            borrowed=models.Count(
+                "pk", filter=models.Q(active_borrow__isnull=False), distinct=True
+            ),
+            requested=models.Count(
+                "borrows", filter=models.Q(borrows__status=Borrow.Status.REQUESTED)
+            ),
+            pending_pickup=models.Count(
+                "borrows", filter=models.Q(borrows__status=Borrow.Status.APPROVED)
+            ),
+            lent_out=models.Count(
+                "borrows", filter=models.Q(borrows__status=Borrow.Status.LENT_OUT)
+            ),
+        )
+
+
 class Item(models.Model):
     """An item available for lending."""
 
@@ -55,6 +105,12 @@ class Item(models.Model):
     short_description = models.CharField(max_length=500, blank=True)
     long_description = models.TextField(blank=True)
     image = models.ImageField(upload_to="items/", blank=True)
+    image_derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Resized renditions of the image, keyed by format and width.",
+    )
     borrow_time_limit = models.CharField(
         max_length=100,
         blank=True,
@@ -64,22 +120,71 @@ class Item(models.Model):
         default=True,
         help_text="Whether this item is available for borrowing (can be toggled by owner).",
     )
+    # Denormalized pointer to the LENT_OUT borrow, maintained by the lend and
+    # return transitions. Rebuild with `manage.py rebuild_active_borrows`.
+    active_borrow = models.ForeignKey(
+        "Borrow",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        help_text="The borrow this item is currently lent out under, if any.",
+    )
+    active_borrow_status = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text="Snapshot of the active borrow's status.",
+    )
+    # Weighted tsvector of the text fields, kept current by
+    # library.search.update_search_vectors (PostgreSQL only)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ItemQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Owner item list
+            models.Index(fields=["owner", "-created_at"], name="item_owner_created_idx"),
+            # Public gallery (owner's available items)
+            models.Index(
+                fields=["owner", "-created_at"],
+                condition=models.Q(is_available=True),
+                name="item_owner_available_idx",
+            ),
+            # Public gallery when borrowed items are hidden
+            models.Index(
+                fields=["owner", "-created_at"],
+                condition=models.Q(is_available=True, active_borrow__isnull=True),
+                name="item_owner_lendable_idx",
+            ),
+            # Full-text search, and typo-tolerant title matching (pg_trgm)
+            GinIndex(fields=["search_vector"], name="item_search_vector_idx"),
+            GinIndex(
+                fields=["title"],
+                opclasses=["gin_trgm_ops"],
+                name="item_title_trgm_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
     @property
     def is_currently_borrowed(self):
-        return self.borrows.filter(status=Borrow.Status.LENT_OUT).exists()
+        return self.active_borrow_id is not None
 
     @property
     def current_borrow(self):
-        return self.borrows.filter(status=Borrow.Status.LENT_OUT).first()
+        return self.active_borrow
+
+    def set_active_borrow(self, borrow):
+        """Point this item at ``borrow`` (or clear it with None) and save."""
+        self.active_borrow = borrow
+        self.active_borrow_status = borrow.status if borrow else ""
+        self.save(update_fields=["active_borrow", "active_borrow_status"])
 
 
 class Borrow(models.Model):
@@ -103,10 +208,192 @@ class Borrow(models.Model):
     approved_at = models.DateTimeField(null=True, blank=True)
     lent_at = models.DateTimeField(null=True, blank=True)
     returned_at = models.DateTimeField(null=True, blank=True)
+    request_token = models.CharField(
+        max_length=32,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Idempotency token sent by the request button.",
+    )
 
     class Meta:
         ordering = ["-requested_at"]
         verbose_name_plural = "borrows"
+        indexes = [
+            # Owner views filter item__owner + one active status and order by
+            # that status's timestamp; partial indexes keep these small.
+            models.Index(
+                fields=["item", "-requested_at"],
+                condition=models.Q(status="requested"),
+                name="borrow_requested_idx",
+            ),
+            models.Index(
+                fields=["item", "-approved_at"],
+                condition=models.Q(status="approved"),
+                name="borrow_approved_idx",
+            ),
+            models.Index(
+                fields=["item", "-lent_at"],
+                condition=models.Q(status="lent_out"),
+                name="borrow_lent_out_idx",
+            ),
+            # Public item detail lending history
+            models.Index(
+                fields=["item", "-returned_at"],
+                condition=models.Q(status="returned"),
+                name="borrow_returned_history_idx",
+            ),
+        ]
+        constraints = [
+            # One pending request per item and (case-insensitive) borrower name.
+            # Its unique index also serves the borrower_name__iexact lookup.
+            models.UniqueConstraint(
+                "item",
+                Upper("borrower_name"),
+                condition=models.Q(status__in=["requested", "approved"]),
+                name="borrow_unique_pending_request",
+            ),
+            # Makes retried request submissions idempotent
+            models.UniqueConstraint(
+                fields=["item", "request_token"],
+                name="borrow_unique_request_token",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.borrower_name} - {self.item.title} ({self.get_status_display()})"
+
+
+class BorrowArchive(models.Model):
+    """A finished (denied or returned) borrow moved out of the Borrow table.
+
+    Rows keep their original id and timestamps. `manage.py archive_borrows`
+    moves old terminal borrows here so the queries behind the owner pages
+    and dashboards only touch live rows; `library.archive` reads both tables
+    for lending history.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="archived_borrows")
+    borrower_name = models.CharField(max_length=200)
+    status = models.CharField(max_length=20, choices=Borrow.Status.choices)
+    requested_at = models.DateTimeField()
+    approved_at = models.DateTimeField(null=True, blank=True)
+    lent_at = models.DateTimeField(null=True, blank=True)
+    returned_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-requested_at"]
+        verbose_name_plural = "archived borrows"
+        indexes = [
+            # Public item detail lending history
+            models.Index(
+                fields=["item", "-returned_at"],
+                condition=models.Q(status="returned"),
+                name="borrow_archive_history_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.borrower_name} - {self.item.title} ({self.get_status_display()})"
+
+
+class ItemStats(models.Model):
+    """Running totals of an item's completed loans.
+
+    Updated by the return transition in `library.services.borrows`, so item
+    pages can show them without reading the whole lending history. Rebuild
+    with `manage.py rebuild_item_stats`.
+    """
+
+    item = models.OneToOneField(
+        Item, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    times_borrowed = models.PositiveIntegerField(default=0)
+    total_loan_time = models.DurationField(default=timedelta)
+    longest_loan = models.DurationField(default=timedelta)
+    last_returned_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "item stats"
+
+    def __str__(self):
+        return f"{self.item_id}: borrowed {self.times_borrowed} time(s)"
+
+    @property
+    def average_loan(self):
+        if not self.times_borrowed:
+            return timedelta()
+        return self.total_loan_time / self.times_borrowed
+
+    @property
+    def average_loan_days(self):
+        return round(self.average_loan / timedelta(days=1), 1)
+
+    @property
+    def longest_loan_days(self):
+        return round(self.longest_loan / timedelta(days=1), 1)
+
+
+class Job(models.Model):
+    """A unit of background work, claimed by `manage.py run_workers`."""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        FAILED = "failed", "Failed"
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.QUEUED,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["run_after", "id"]
+        indexes = [
+            # Workers poll for the oldest runnable job
+            models.Index(
+                fields=["run_after", "id"],
+                condition=models.Q(status="queued"),
+                name="job_queued_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+
+class Blob(models.Model):
+    """A stored media file and how many places reference it.
+
+    Maintained by `library.storage.ContentAddressedStorage`; blobs whose count
+    drops to zero are removed by `manage.py collect_media`.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Garbage collection looks for unreferenced blobs
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(refcount=0),
+                name="blob_unreferenced_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
@@ -0,0 +1,154 @@
+"""
+Lending hash to owner lookup for the public pages.
+
+Every public request starts by resolving the lending hash in its URL, and
+reading the full user row (password hash included) for every page view and
+every guessed hash is wasteful. ``get_public_owner`` keeps two small
+per-process LRU caches instead:
+- approved owners, loaded with only ``PUBLIC_OWNER_FIELDS``;
+- hashes that matched no approved owner, so probing random hashes costs a
+  dictionary lookup rather than a query.
+
+Cached owners are checked against their cache version (``library.cache``),
+which changes whenever the user row is saved: settings, approval and a
+regenerated lending hash all reach every process on its next request.
+``forget_owner`` also drops this process's entries right away, including a
+negative entry for the owner's hash. Other processes may keep answering
+"not found" for a newly approved owner until LIBRARY_OWNER_MISS_CACHE_TTL
+runs out.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .cache import aget_owner_version, get_owner_version
+from .models import User
+
+# Everything the public views and templates read from the owner
+PUBLIC_OWNER_FIELDS = [
+    "id",
+    "username",
+    "lending_hash",
+    "is_approved",
+    "show_borrowed_items",
+    "show_borrower_name",
+    "show_lending_history",
+    "show_history_borrower_names",
+]
+
+
+class _LRUCache:
+    """A thread-safe mapping that evicts the least recently used entries and
+    expires entries ``ttl`` seconds after they were stored. The size and TTL
+    are read from settings on each write, so tests can override them."""
+
+    def __init__(self, size_setting, ttl_setting):
+        self.size_setting = size_setting
+        self.ttl_setting = ttl_setting
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = getattr(settings, self.size_setting)
+        ttl = getattr(settings, self.ttl_setting)
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def discard_values(self, predicate):
+        with self.lock:
+            for key in [k for k, (v, _) in self.entries.items() if predicate(v)]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# lending hash -> (owner, version) and lending hash -> True
+_owners = _LRUCache("LIBRARY_OWNER_CACHE_SIZE", "LIBRARY_OWNER_CACHE_TTL")
+_missing = _LRUCache("LIBRARY_OWNER_MISS_CACHE_SIZE", "LIBRARY_OWNER_MISS_CACHE_TTL")
+
+
+def _owner_query(lending_hash):
+    return User.objects.only(*PUBLIC_OWNER_FIELDS).filter(
+        lending_hash=lending_hash, is_approved=True
+    )
+
+
+def get_public_owner(lending_hash):
+    """``(owner, cache_version)`` for an approved lending hash, else ``(None, None)``.
+
+    The owner has only ``PUBLIC_OWNER_FIELDS`` loaded and is shared between
+    requests, so treat it as read-only.
+    """
+    cached = _owners.get(lending_hash)
+    if cached is not None:
+        owner, version = cached
+        current = get_owner_version(owner.pk)
+        if current == version:
+            return owner, version
+        _owners.discard(lending_hash)
+    elif _missing.get(lending_hash):
+        return None, None
+
+    owner = _owner_query(lending_hash).first()
+    if owner is None:
+        _missing.set(lending_hash, True)
+        return None, None
+    version = get_owner_version(owner.pk)
+    _owners.set(lending_hash, (owner, version))
+    return owner, version
+
+
+async def aget_public_owner(lending_hash):
+    """Async version of ``get_public_owner``."""
+    cached = _owners.get(lending_hash)
+    if cached is not None:
+        owner, version = cached
+        current = await aget_owner_version(owner.pk)
+        if current == version:
+            return owner, version
+        _owners.discard(lending_hash)
+    elif _missing.get(lending_hash):
+        return None, None
+
+    owner = await _owner_query(lending_hash).afirst()
+    if owner is None:
+        _missing.set(lending_hash, True)
+        return None, None
+    version = await aget_owner_version(owner.pk)
+    _owners.set(lending_hash, (owner, version))
+    return owner, version
+
+
+def forget_owner(user):
+    """Drop this process's cached lookups for ``user`` after it changes."""
+    _owners.discard_values(lambda cached: cached[0].pk == user.pk)
+    _missing.discard(user.lending_hash)
+
+
+def clear():
+    _owners.clear()
+    _missing.clear()
@@ -0,0 +1,111 @@
+"""
+Keyset (cursor) pagination for newest-first listings.
+
+Pages are ordered by ``(-field, -pk)`` and the cursor encodes the last row's
+``(field, pk)``, so fetching page N costs the same as page 1 and rows added
+while someone scrolls never shift later pages. ``field`` may be nullable:
+rows without a value come after all the others, newest pk first, and their
+cursors leave the value empty.
+
+``keyset_page`` covers a single queryset. ``keyset_queryset`` and
+``keyset_result`` are its two halves, for pages assembled some other way
+(see ``archive.history_page``).
+"""
+
+import base64
+import binascii
+from collections import namedtuple
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+
+class KeysetPage(namedtuple("KeysetPage", ["items", "next_cursor"])):
+    """One page of results plus the cursor for the page after it, if any."""
+
+    def next_url(self, url, **params):
+        if not self.next_cursor:
+            return None
+        return f"{url}?{urlencode({**params, 'cursor': self.next_cursor})}"
+
+
+def encode_cursor(value, pk):
+    raw = f"{'' if value is None else value.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        raw_value, pk = raw.rsplit("|", 1)
+        value, pk = parse_datetime(raw_value), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BadRequest("Invalid cursor.")
+    # An empty value is a row whose field is null
+    if value is None and raw_value:
+        raise BadRequest("Invalid cursor.")
+    return value, pk
+
+
+def canonical_cursor(cursor):
+    """``cursor`` re-encoded, so every spelling of a position is the same.
+
+    Raises ``BadRequest`` (a 400 response) for an invalid cursor; a missing
+    one stays "".
+    """
+    if not cursor:
+        return ""
+    return encode_cursor(*decode_cursor(cursor))
+
+
+def keyset_queryset(queryset, field, cursor):
+    """Order ``queryset`` newest ``field`` first, starting after ``cursor``."""
+    nullable = queryset.model._meta.get_field(field).null
+    if nullable:
+        queryset = queryset.order_by(F(field).desc(nulls_last=True), "-pk")
+    else:
+        queryset = queryset.order_by(f"-{field}", "-pk")
+    if not cursor:
+        return queryset
+
+    value, pk = decode_cursor(cursor)
+    if value is None:
+        if not nullable:
+            raise BadRequest("Invalid cursor.")
+        return queryset.filter(**{f"{field}__isnull": True, "pk__lt": pk})
+    after = Q(**{f"{field}__lt": value}) | Q(**{field: value, "pk__lt": pk})
+    if nullable:
+        after |= Q(**{f"{field}__isnull": True})
+    return queryset.filter(after)
+
+
+def keyset_result(items, field, page_size):
+    """The ``KeysetPage`` for ``items``, fetched with one row to spare."""
+    if len(items) <= page_size:
+        return KeysetPage(items, None)
+
+    items = items[:page_size]
+    last = items[-1]
+    return KeysetPage(items, encode_cursor(getattr(last, field), last.pk))
+
+
+def keyset_page(queryset, field, cursor=None, page_size=None):
+    """Return the page of ``queryset`` after ``cursor``, newest ``field`` first.
+
+    ``field`` must be a datetime column. If it's nullable, rows where it's
+    null come last.
+    """
+    page_size = page_size or settings.LIBRARY_PAGE_SIZE
+    queryset = keyset_queryset(queryset, field, cursor)
+    return keyset_result(list(queryset[:page_size + 1]), field, page_size)
+
+
+async def akeyset_page(queryset, field, cursor=None, page_size=None):
+    """Async version of ``keyset_page``."""
+    page_size = page_size or settings.LIBRARY_PAGE_SIZE
+    queryset = keyset_queryset(queryset, field, cursor)
+    items = [item async for item in queryset[:page_size + 1]]
+    return keyset_result(items, field, page_size)
@@ -0,0 +1 @@
+"""Domain services that coordinate multi-row changes to library models."""
@@ -0,0 +1,190 @@
+"""
+Borrow state machine.
+
+Every status change goes through here so that transitions are validated
+against the current database state under a row lock, and the item's
+denormalized active borrow pointer and lending stats are kept in step.
+An item has at most one approved request at a time; approving locks the
+item so that two approvals can't race.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..cache import invalidate_owner
+from ..models import Borrow, Item
+from . import item_stats
+
+# target status -> (required current status, timestamp field to set)
+TRANSITIONS = {
+    Borrow.Status.APPROVED: (Borrow.Status.REQUESTED, "approved_at"),
+    Borrow.Status.DENIED: (Borrow.Status.REQUESTED, None),
+    Borrow.Status.LENT_OUT: (Borrow.Status.APPROVED, "lent_at"),
+    Borrow.Status.RETURNED: (Borrow.Status.LENT_OUT, "returned_at"),
+}
+
+# Transitions that only touch the borrow row and can be applied in bulk
+BULK_TRANSITIONS = {Borrow.Status.APPROVED, Borrow.Status.DENIED}
+
+
+class TransitionError(Exception):
+    """Raised when a borrow cannot move to the requested status."""
+
+
+def request_borrow(item, borrower_name, request_token=None):
+    """Create a borrow request, letting the database reject duplicates.
+
+    Inserts straight away instead of checking for an existing request first;
+    the pending-request and request-token unique constraints turn concurrent
+    or retried submissions into an ``IntegrityError``. Returns
+    ``(borrow, created)``, where on conflict ``borrow`` is the request that
+    already exists (or None if it vanished in the meantime).
+    """
+    try:
+        with transaction.atomic():
+            borrow = Borrow.objects.create(
+                item=item,
+                borrower_name=borrower_name,
+                status=Borrow.Status.REQUESTED,
+                request_token=request_token or None,
+            )
+        return borrow, True
+    except IntegrityError:
+        conflict = Q(
+            borrower_name__iexact=borrower_name,
+            status__in=[Borrow.Status.REQUESTED, Borrow.Status.APPROVED],
+        )
+        if request_token:
+            conflict |= Q(request_token=request_token)
+        return Borrow.objects.filter(conflict, item=item).first(), False
+
+
+def transition(borrow, status):
+    """Move ``borrow`` to ``status``, locking the rows involved.
+
+    The borrow is re-read with ``SELECT ... FOR UPDATE`` so that two
+    concurrent requests cannot both act on the same starting state. Lending
+    and returning also lock the item, which serializes them against other
+    borrows of the same item. Updates ``borrow`` in place and returns it.
+    """
+    required, timestamp_field = TRANSITIONS[status]
+
+    with transaction.atomic():
+        locked = Borrow.objects.select_for_update().get(pk=borrow.pk)
+        if locked.status != required:
+            raise TransitionError(
+                f"Cannot mark a {locked.get_status_display().lower()} borrow as "
+                f"{Borrow.Status(status).label.lower()}."
+            )
+
+        item = None
+        if status != Borrow.Status.DENIED:
+            item = Item.objects.select_for_update().get(pk=locked.item_id)
+            if status == Borrow.Status.APPROVED and _approved_items([item.pk]):
+                raise TransitionError("Another request for this item is already approved.")
+            if status == Borrow.Status.LENT_OUT and item.active_borrow_id is not None:
+                raise TransitionError("This item is already lent out.")
+
+        borrow.status = status
+        update_fields = ["status"]
+        if timestamp_field:
+            setattr(borrow, timestamp_field, timezone.now())
+            update_fields.append(timestamp_field)
+        borrow.save(update_fields=update_fields)
+
+        if status == Borrow.Status.LENT_OUT:
+            item.set_active_borrow(borrow)
+        elif status == Borrow.Status.RETURNED:
+            if item.active_borrow_id == borrow.pk:
+                item.set_active_borrow(None)
+            item_stats.record_return(borrow)
+
+    return borrow
+
+
+def approve(borrow):
+    return transition(borrow, Borrow.Status.APPROVED)
+
+
+def deny(borrow):
+    return transition(borrow, Borrow.Status.DENIED)
+
+
+def mark_lent(borrow):
+    return transition(borrow, Borrow.Status.LENT_OUT)
+
+
+def mark_returned(borrow):
+    return transition(borrow, Borrow.Status.RETURNED)
+
+
+def bulk_transition(owner, borrow_ids, status):
+    """Apply an approve/deny transition to many of ``owner``'s borrows at once.
+
+    Locks the matching rows and applies a single ``UPDATE`` to them. Borrows
+    that are no longer in the required status (e.g. handled in another tab)
+    are skipped rather than overwritten, and so are approvals beyond one per
+    item (the oldest request wins). Returns the ids that were actually
+    transitioned.
+    """
+    if status not in BULK_TRANSITIONS:
+        raise TransitionError(
+            f"{Borrow.Status(status).label} cannot be applied in bulk."
+        )
+    required, timestamp_field = TRANSITIONS[status]
+
+    values = {"status": status}
+    if timestamp_field:
+        values[timestamp_field] = timezone.now()
+
+    with transaction.atomic():
+        candidates = Borrow.objects.select_for_update(of=("self",)).filter(
+            id__in=borrow_ids,
+            item__owner=owner,
+            status=required,
+        )
+        rows = list(candidates.order_by("requested_at", "pk").values_list("id", "item_id"))
+        if status == Borrow.Status.APPROVED:
+            rows = _one_per_item(rows)
+        ids = [borrow_id for borrow_id, _ in rows]
+        Borrow.objects.filter(id__in=ids).update(**values)
+        # update() skips the post_save signal that normally does this
+        invalidate_owner(owner.pk)
+    return ids
+
+
+def _approved_items(item_ids):
+    """Which of ``item_ids`` already have an approved request."""
+    return set(
+        Borrow.objects.filter(item_id__in=item_ids, status=Borrow.Status.APPROVED)
+        .values_list("item_id", flat=True)
+    )
+
+
+def _one_per_item(rows):
+    """The first ``(borrow_id, item_id)`` row for each item not yet approved.
+
+    Locks the items, in id order, as a single approval does.
+    """
+    item_ids = list(
+        Item.objects.select_for_update()
+        .filter(pk__in={item_id for _, item_id in rows})
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    taken = _approved_items(item_ids)
+    kept = []
+    for borrow_id, item_id in rows:
+        if item_id not in taken:
+            taken.add(item_id)
+            kept.append((borrow_id, item_id))
+    return kept
+
+
+def bulk_approve(owner, borrow_ids):
+    return bulk_transition(owner, borrow_ids, Borrow.Status.APPROVED)
+
+
+def bulk_deny(owner, borrow_ids):
+    return bulk_transition(owner, borrow_ids, Borrow.Status.DENIED)
@@ -0,0 +1,60 @@
+"""
+Per-item lending statistics.
+
+``record_return`` folds one returned borrow into the item's ``ItemStats``
+row as part of the return transition. ``expected_stats`` recomputes the
+same totals from the live and archived borrow history, to backfill or
+repair them.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, Sum
+
+from ..models import Borrow, BorrowArchive, ItemStats
+
+
+def record_return(borrow):
+    """Add the just-returned ``borrow`` to its item's stats.
+
+    Callers hold the item's row lock (as ``borrows.transition`` does), so the
+    read-modify-write cannot race with another return of the same item.
+    """
+    stats, _ = ItemStats.objects.get_or_create(item_id=borrow.item_id)
+    loan = borrow.returned_at - borrow.lent_at if borrow.lent_at else timedelta()
+    stats.times_borrowed += 1
+    stats.total_loan_time += loan
+    stats.longest_loan = max(stats.longest_loan, loan)
+    if stats.last_returned_at is None or borrow.returned_at > stats.last_returned_at:
+        stats.last_returned_at = borrow.returned_at
+    stats.save()
+    return stats
+
+
+def expected_stats(item_ids):
+    """Unsaved ``ItemStats`` computed from history, for items with returns.
+
+    Counts archived borrows as well as live ones.
+    """
+    expected = {}
+    for model in (Borrow, BorrowArchive):
+        loan = ExpressionWrapper(F("returned_at") - F("lent_at"), output_field=DurationField())
+        rows = (
+            model.objects.filter(item_id__in=item_ids, status=Borrow.Status.RETURNED)
+            .values("item_id")
+            .annotate(
+                times_borrowed=Count("pk"),
+                total_loan_time=Sum(loan),
+                longest_loan=Max(loan),
+                last_returned_at=Max("returned_at"),
+            )
+            .order_by()
+        )
+        for row in rows:
+            stats = expected.setdefault(row["item_id"], ItemStats(item_id=row["item_id"]))
+            stats.times_borrowed += row["times_borrowed"]
+            stats.total_loan_time += row["total_loan_time"] or timedelta()
+            stats.longest_loan = max(stats.longest_loan, row["longest_loan"] or timedelta())
+            if stats.last_returned_at is None or row["last_returned_at"] > stats.last_returned_at:
+                stats.last_returned_at = row["last_returned_at"]
+    return expected
@@ -0,0 +1,124 @@
+"""
+Signal receivers that keep the public page cache versions and owner lookups
+current, release stored files that items no longer use, and let the
+request metrics see every query.
+"""
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_owner
+from .images import FORMATS
+from .middleware import time_query
+from .models import User, Item, Borrow
+from .owners import forget_owner
+from .search import update_search_vectors
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which the public pages don't show
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    invalidate_owner(instance.pk)
+    # Settings, approval or a regenerated lending hash
+    forget_owner(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    forget_owner(instance)
+
+
+@receiver([post_save, post_delete], sender=Item)
+def item_changed(sender, instance, **kwargs):
+    invalidate_owner(instance.owner_id)
+
+
+@receiver([post_save, post_delete], sender=Borrow)
+def borrow_changed(sender, instance, **kwargs):
+    if Borrow.item.is_cached(instance):
+        owner_id = instance.item.owner_id
+    else:
+        owner_id = (
+            Item.objects.filter(pk=instance.item_id)
+            .values_list("owner_id", flat=True)
+            .first()
+        )
+    # Borrows deleted along with their item are covered by the item's signal
+    if owner_id is not None:
+        invalidate_owner(owner_id)
+
+
+# =============================================================================
+# Stored files
+# =============================================================================
+
+def _release_files(storage, names):
+    """Drop the storage's references to ``names`` once the change commits."""
+    names = [name for name in names if name]
+
+    def release():
+        for name in names:
+            storage.delete(name)
+
+    if names:
+        transaction.on_commit(release)
+
+
+def _stored_image_name(instance):
+    # Raw column value, or a FieldFile once accessed; None if deferred
+    value = instance.__dict__.get("image")
+    return getattr(value, "name", value)
+
+
+@receiver(post_init, sender=Item)
+def item_loaded(sender, instance, **kwargs):
+    instance._stored_image = _stored_image_name(instance)
+
+
+@receiver(post_save, sender=Item)
+def item_image_replaced(sender, instance, **kwargs):
+    previous = getattr(instance, "_stored_image", None)
+    if "image" not in instance.__dict__:
+        return
+    current = instance.image.name
+    if previous and previous != current:
+        _release_files(instance.image.storage, [previous])
+    instance._stored_image = current
+
+
+@receiver(post_delete, sender=Item)
+def item_deleted(sender, instance, **kwargs):
+    derivatives = instance.__dict__.get("image_derivatives") or {}
+    names = [_stored_image_name(instance)]
+    names += [name for ext in FORMATS for name in derivatives.get(ext, {}).values()]
+    _release_files(Item._meta.get_field("image").storage, names)
+
+
+# =============================================================================
+# Search
+# =============================================================================
+
+SEARCHED_FIELDS = {"title", "short_description", "long_description"}
+
+
+@receiver(post_save, sender=Item)
+def item_reindex(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCHED_FIELDS & set(update_fields):
+        return
+    update_search_vectors(Item.objects.filter(pk=instance.pk))
+
+
+# =============================================================================
+# Request metrics
+# =============================================================================
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    # First in line, so the last-in-first-out execute_wrapper() context
+    # managers of other code never pop it; kept across reconnects
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
@@ -0,0 +1,127 @@
+"""
+Content-addressed storage for uploaded media.
+
+Files are named after the SHA-256 of their contents
+(``items/3f/3fa9...c2.jpg``), so identical uploads are stored once and a URL
+always refers to the same bytes, which lets browsers cache media forever.
+
+Each stored file has a ``Blob`` row with a reference count: ``save`` adds a
+reference and ``delete`` drops one. Nothing is removed from disk until
+``manage.py collect_media`` finds blobs that have stayed unreferenced for a
+grace period, so a delete never races an upload that reuses the same bytes.
+"""
+
+import os
+import posixpath
+import re
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .images import content_digest
+from .models import Blob
+
+HASHED_NAME_RE = re.compile(r"^(?P<prefix>[0-9a-f]{2})[0-9a-f]{62}(\.\w+)?$")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that deduplicates files by content."""
+
+    def hashed_name(self, name, digest):
+        """``items/photo.JPG`` -> ``items/<digest[:2]>/<digest>.jpg``."""
+        directory, filename = posixpath.split(name)
+        ext = posixpath.splitext(filename)[1].lower()
+        parent, prefix = posixpath.split(directory)
+        if re.fullmatch(r"[0-9a-f]{2}", prefix) and filename.startswith(prefix):
+            # Derived from a stored file (e.g. an image rendition): file it
+            # alongside its source rather than one level deeper
+            directory = parent
+        return posixpath.join(directory, digest[:2], f"{digest}{ext}")
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        validate_file_name(name, allow_relative_path=True)
+
+        name = self.hashed_name(name, content_digest(content))
+        if max_length is not None and len(name) > max_length:
+            raise SuspiciousFileOperation(
+                f'Storage can not find an available filename for "{name}".'
+            )
+
+        # The row lock serialises savers of the same content with each other
+        # and with collect(), so the file is written exactly once
+        with transaction.atomic():
+            blob, _ = Blob.objects.select_for_update().get_or_create(
+                name=name, defaults={"size": content.size}
+            )
+            Blob.objects.filter(pk=blob.pk).update(
+                refcount=F("refcount") + 1, updated_at=timezone.now()
+            )
+            if not self.exists(name):
+                super()._save(name, content)
+        return name
+
+    def delete(self, name):
+        """Drop one reference to ``name``; the file stays until collected."""
+        if not name:
+            raise ValueError("The name must be given to delete().")
+        blobs = Blob.objects.filter(name=name)
+        if not blobs.exists():
+            # Stored before this backend was enabled, so nothing shares it
+            super().delete(name)
+            return
+        blobs.filter(refcount__gt=0).update(
+            refcount=F("refcount") - 1, updated_at=timezone.now()
+        )
+
+    def collect(self, before, dry_run=False, orphans=False):
+        """Remove blobs unreferenced since ``before`` and return their names.
+
+        With ``orphans``, also remove content-addressed files last modified
+        before ``before`` that have no ``Blob`` row, e.g. written by an
+        upload whose transaction rolled back.
+        """
+        removed = []
+        stale = Blob.objects.filter(refcount=0, updated_at__lt=before)
+        for pk in list(stale.values_list("pk", flat=True)):
+            with transaction.atomic():
+                blob = (
+                    Blob.objects.select_for_update(skip_locked=True)
+                    .filter(pk=pk, refcount=0)
+                    .first()
+                )
+                if blob is None:
+                    continue
+                if not dry_run:
+                    super().delete(blob.name)
+                    blob.delete()
+            removed.append(blob.name)
+
+        if orphans:
+            for name in self._orphaned_files(before):
+                if not dry_run:
+                    super().delete(name)
+                removed.append(name)
+        return removed
+
+    def _orphaned_files(self, before):
+        cutoff = before.timestamp()
+        for root, dirs, files in os.walk(self.location):
+            for filename in files:
+                match = HASHED_NAME_RE.match(filename)
+                if not match or match["prefix"] != os.path.basename(root):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.location).replace(os.sep, "/")
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                if not Blob.objects.filter(name=name).exists():
+                    yield name
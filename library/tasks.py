@@ -0,0 +1,21 @@
+"""
+Background job handlers. Imported at startup so the handlers are registered.
+"""
+
+from .images import generate_derivatives, mark_failed
+from .jobs import register
+from .models import Item
+
+
+def derivatives_failed(error, item_id):
+    item = Item.objects.filter(pk=item_id).first()
+    if item is not None:
+        mark_failed(item, error)
+
+
+@register("generate_derivatives", on_failure=derivatives_failed)
+def generate_item_derivatives(item_id):
+    item = Item.objects.filter(pk=item_id).first()
+    # The item may have been deleted before the job ran
+    if item is not None:
+        generate_derivatives(item)
@@ -0,0 +1,40 @@
+from django import template
+
+from .. import images
+
+register = template.Library()
+
+
+@register.inclusion_tag("library/partials/item_picture.html")
+def item_picture(item, sizes="100vw", width=480):
+    """Responsive <picture> for an item's image, preferring WebP derivatives.
+
+    ``width`` picks the JPEG used as the plain ``src`` fallback. Items whose
+    derivatives haven't been generated yet get a placeholder rather than
+    the (possibly huge) original, unless generating them failed for good.
+    """
+    derivatives = item.image_derivatives or {}
+    if "error" in derivatives:
+        return {"src": item.image.url, "alt": item.title}
+    jpegs = derivatives.get("jpeg", {})
+    if not jpegs:
+        # Derivatives are still being generated in the background
+        return {"pending": True, "alt": item.title}
+
+    widths = sorted(int(w) for w in jpegs)
+    best = next((w for w in widths if w >= width), widths[-1])
+    src = item.image.storage.url(jpegs[str(best)])
+
+    return {
+        "src": src,
+        "alt": item.title,
+        "sizes": sizes,
+        "webp_srcset": images.srcset(item, "webp"),
+        "jpeg_srcset": images.srcset(item, "jpeg"),
+    }
+
+
+@register.filter
+def srcset(item, ext="webp"):
+    """``{{ item|srcset:"jpeg" }}`` for hand-written <img> tags."""
+    return images.srcset(item, ext)
@@ -0,0 +1,55 @@
+"""
+Archiving old borrows, and lending history across both tables.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from library import archive
+from library.cache import get_owner_version
+from library.models import Borrow, BorrowArchive
+
+
+@pytest.fixture
+def returned_borrows(item_factory):
+    """An item with 5 borrows returned on consecutive days, oldest first."""
+    item = item_factory(title="Tent")
+    start = timezone.now() - timedelta(days=30)
+    for day in range(5):
+        Borrow.objects.create(
+            item=item,
+            borrower_name=f"Friend {day}",
+            status=Borrow.Status.RETURNED,
+            returned_at=start + timedelta(days=day),
+        )
+    return item
+
+
+def test_archive_moves_old_borrows(returned_borrows, approved_user):
+    cutoff = timezone.now() - timedelta(days=27, hours=12)
+    version = get_owner_version(approved_user.pk)
+
+    assert archive.archive(cutoff, batch_size=2) == 2
+    assert archive.archive(cutoff, batch_size=2) == 1
+    assert archive.archive(cutoff, batch_size=2) == 0
+
+    assert Borrow.objects.count() == 2
+    assert BorrowArchive.objects.count() == 3
+    # Archiving changes nothing visitors see, so cached pages stay valid
+    assert get_owner_version(approved_user.pk) == version
+
+
+def test_history_pages_span_both_tables(returned_borrows):
+    archive.archive(timezone.now() - timedelta(days=27, hours=12))
+
+    names, cursor = [], None
+    while True:
+        page = archive.history_page(returned_borrows, cursor, page_size=2)
+        names += [borrow.borrower_name for borrow in page.items]
+        cursor = page.next_cursor
+        if not cursor:
+            break
+
+    assert names == [f"Friend {day}" for day in reversed(range(5))]
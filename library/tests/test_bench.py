@@ -0,0 +1,29 @@
+"""
+The bench command against the synthetic large library.
+"""
+
+import json
+from io import StringIO
+
+from django.core.management import call_command
+
+from library.management.commands.bench import Command as BenchCommand
+
+
+def test_large_library_dataset(large_library):
+    lender, item = large_library.lender, large_library.item
+    assert lender.items.count() == 200
+    assert item.owner == lender and item.is_available
+    assert large_library.requested and large_library.approved and large_library.lent_out
+
+
+def test_bench_every_url(large_library, tmp_path):
+    output = tmp_path / "bench.json"
+
+    call_command("bench", repeat=1, warmup=0, output=str(output), stdout=StringIO())
+
+    results = json.loads(output.read_text())
+    assert results["dataset"]["reused"]
+    assert set(results["urls"]) == set(BenchCommand().url_patterns())
+    failed = {name: url["status"] for name, url in results["urls"].items() if url["status"] >= 500}
+    assert not failed
@@ -0,0 +1,130 @@
+"""
+Concurrent borrow requests: the database constraints, not a check-then-insert
+in the view, decide which submission creates the request. Request tokens
+make retries idempotent without swallowing a renamed visitor's request.
+"""
+
+import re
+import threading
+
+import pytest
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from library.models import Borrow
+
+THREADS = 8
+TOKEN_RE = re.compile(r'"request_token": "([^"]+)"')
+
+
+def post_concurrently(cookies, url, tokens):
+    """POST each request token to ``url`` from its own client, all at once.
+
+    Returns ``(status, body)`` for each.
+    """
+    barrier = threading.Barrier(len(tokens))
+    responses = [None] * len(tokens)
+
+    def post(index):
+        client = Client()
+        client.cookies = cookies
+        try:
+            barrier.wait()
+            responses[index] = client.post(url, {"request_token": tokens[index]})
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(len(tokens))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [(response.status_code, response.content.decode()) for response in responses]
+
+
+@pytest.fixture
+def friend(client, approved_user):
+    """Cookies of a visitor who has set their borrower name to "Ann"."""
+    client.post(
+        reverse("library:public_set_name", args=[approved_user.lending_hash]),
+        {"borrower_name": "Ann"},
+    )
+    return client.cookies
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_requests_after_an_earlier_request(friend, approved_user, item_factory):
+    item = item_factory()
+    Borrow.objects.create(item=item, borrower_name="Ann", request_token="earlier-tab")
+    url = reverse("library:public_request_borrow", args=[approved_user.lending_hash, item.pk])
+
+    responses = post_concurrently(friend, url, ["same-token"] * THREADS)
+
+    assert Borrow.objects.filter(item=item).count() == 1
+    for status, body in responses:
+        assert status == 200
+        assert "Already Requested" in body
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_retries_of_one_submission(friend, approved_user, item_factory):
+    item = item_factory()
+    url = reverse("library:public_request_borrow", args=[approved_user.lending_hash, item.pk])
+
+    responses = post_concurrently(friend, url, ["same-token"] * THREADS)
+
+    # The retries are the same submission, so they all report it as sent
+    assert Borrow.objects.filter(item=item).count() == 1
+    for status, body in responses:
+        assert status == 200
+        assert "Request Sent" in body
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_requests_from_different_tabs(friend, approved_user, item_factory):
+    item = item_factory()
+    url = reverse("library:public_request_borrow", args=[approved_user.lending_hash, item.pk])
+    responses = post_concurrently(friend, url, [f"tab-{i}" for i in range(THREADS)])
+
+    assert Borrow.objects.filter(item=item).count() == 1
+    bodies = [body for _, body in responses]
+    assert sum("Request Sent" in body for body in bodies) == 1
+    assert sum("Already Requested" in body for body in bodies) == THREADS - 1
+
+
+def test_request_after_renaming(client, approved_user, item_factory):
+    item = item_factory()
+    lending_hash = approved_user.lending_hash
+    set_name_url = reverse("library:public_set_name", args=[lending_hash])
+    request_url = reverse("library:public_request_borrow", args=[lending_hash, item.pk])
+
+    response = client.post(set_name_url, {"borrower_name": "Ann"})
+    ann_token = TOKEN_RE.search(response.content.decode())[1]
+    response = client.post(request_url, {"request_token": ann_token})
+    assert "Request Sent" in response.content.decode()
+
+    # Setting the name again hands out a new token
+    response = client.post(set_name_url, {"borrower_name": "Bob"})
+    bob_token = TOKEN_RE.search(response.content.decode())[1]
+    assert bob_token != ann_token
+    response = client.post(request_url, {"request_token": bob_token})
+
+    assert "Request Sent" in response.content.decode()
+    assert sorted(item.borrows.values_list("borrower_name", flat=True)) == ["Ann", "Bob"]
+
+
+def test_stale_token_after_renaming_is_not_a_replay(client, approved_user, item_factory):
+    item = item_factory()
+    lending_hash = approved_user.lending_hash
+    Borrow.objects.create(item=item, borrower_name="Ann", request_token="ann-page")
+    client.post(reverse("library:public_set_name", args=[lending_hash]), {"borrower_name": "Bob"})
+
+    # A page rendered before the rename still carries Ann's token
+    response = client.post(
+        reverse("library:public_request_borrow", args=[lending_hash, item.pk]),
+        {"request_token": "ann-page"},
+    )
+
+    assert "Request Sent" not in response.content.decode()
+    assert not item.borrows.filter(borrower_name="Bob").exists()
@@ -0,0 +1,102 @@
+"""
+Borrow transitions, one at a time and in batches, are checked against the
+current database state.
+"""
+
+import pytest
+from django.urls import reverse
+
+from library.models import Borrow
+from library.services import borrows
+
+
+@pytest.fixture
+def owner_client(client, approved_user):
+    client.force_login(approved_user)
+    return client
+
+
+@pytest.fixture
+def item(item_factory):
+    return item_factory(title="Tent")
+
+
+def request_from(item, name):
+    return Borrow.objects.create(item=item, borrower_name=name)
+
+
+def statuses(item):
+    return dict(item.borrows.values_list("borrower_name", "status"))
+
+
+def test_batch_approves_one_request_per_item(owner_client, item, item_factory):
+    ann, bob = request_from(item, "Ann"), request_from(item, "Bob")
+    other = request_from(item_factory(title="Drill"), "Bob")
+
+    response = owner_client.post(reverse("library:borrow_batch"), {
+        "action": "approve", "borrow_ids": [bob.pk, ann.pk, other.pk],
+    })
+
+    assert response.status_code == 200
+    # The oldest request for the tent wins
+    assert statuses(item) == {"Ann": "approved", "Bob": "requested"}
+    other.refresh_from_db()
+    assert other.status == Borrow.Status.APPROVED
+
+
+def test_batch_skips_items_already_approved(owner_client, item):
+    request_from(item, "Ann")
+    borrows.approve(item.borrows.get())
+    bob = request_from(item, "Bob")
+
+    owner_client.post(reverse("library:borrow_batch"), {"action": "approve", "borrow_ids": [bob.pk]})
+
+    assert statuses(item) == {"Ann": "approved", "Bob": "requested"}
+
+
+def test_approve_rejected_while_another_is_approved(owner_client, item):
+    borrows.approve(request_from(item, "Ann"))
+    bob = request_from(item, "Bob")
+
+    response = owner_client.post(reverse("library:borrow_approve", args=[bob.pk]))
+
+    assert response.status_code == 409
+    assert statuses(item) == {"Ann": "approved", "Bob": "requested"}
+
+
+@pytest.mark.parametrize("transition", [borrows.approve, borrows.deny])
+@pytest.mark.parametrize("status", [Borrow.Status.APPROVED, Borrow.Status.DENIED])
+def test_transition_requires_requested(item, transition, status):
+    borrow = request_from(item, "Ann")
+    # Handled elsewhere (another tab) after this copy was read
+    Borrow.objects.filter(pk=borrow.pk).update(status=status)
+
+    with pytest.raises(borrows.TransitionError):
+        transition(borrow)
+
+    borrow.refresh_from_db()
+    assert borrow.status == status
+
+
+@pytest.mark.parametrize("action", ["approve", "deny"])
+def test_batch_skips_handled_requests(owner_client, item, action):
+    borrow = request_from(item, "Ann")
+    borrows.deny(borrow)
+
+    response = owner_client.post(
+        reverse("library:borrow_batch"), {"action": action, "borrow_ids": [borrow.pk]}
+    )
+
+    assert response.status_code == 200
+    assert statuses(item) == {"Ann": "denied"}
+
+
+@pytest.mark.parametrize("view", ["borrow_approve", "borrow_deny"])
+def test_views_reject_handled_requests(owner_client, item, view):
+    borrow = request_from(item, "Ann")
+    borrows.deny(borrow)
+
+    response = owner_client.post(reverse(f"library:{view}", args=[borrow.pk]))
+
+    assert response.status_code == 404
+    assert statuses(item) == {"Ann": "denied"}
@@ -0,0 +1,76 @@
+"""
+The borrower name cookie: scoped and signed per lending page, with no
+session behind it.
+"""
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library.borrowers import COOKIE_NAME, get_borrower_name
+from library.models import Borrow
+
+
+@pytest.fixture
+def named_client(client, approved_user):
+    """A client that told ``approved_user``'s page its name is Ann."""
+    client.post(
+        reverse("library:public_set_name", args=[approved_user.lending_hash]),
+        {"borrower_name": "Ann"},
+    )
+    return client
+
+
+def name_from(rf, cookie, lending_hash):
+    request = rf.get("/")
+    request.COOKIES[COOKIE_NAME] = cookie
+    return get_borrower_name(request, lending_hash)
+
+
+def test_cookie_scoped_to_lending_page(named_client, approved_user):
+    cookie = named_client.cookies[COOKIE_NAME]
+
+    assert cookie["path"] == reverse("library:public_lending", args=[approved_user.lending_hash])
+    assert cookie["httponly"]
+    assert cookie["samesite"] == "Lax"
+
+
+def test_cookie_rejected_by_other_lender(rf, named_client, approved_user, user_factory):
+    other = user_factory(username="other")
+    cookie = named_client.cookies[COOKIE_NAME].value
+
+    assert name_from(rf, cookie, approved_user.lending_hash) == "Ann"
+    assert name_from(rf, cookie, other.lending_hash) == ""
+
+
+def test_tampered_cookie_rejected(rf, named_client, approved_user):
+    cookie = named_client.cookies[COOKIE_NAME].value
+    tampered = cookie.replace("Ann", "Bob", 1)
+
+    assert tampered != cookie
+    assert name_from(rf, tampered, approved_user.lending_hash) == ""
+
+
+def test_empty_name_forgets_cookie(named_client, approved_user):
+    named_client.post(
+        reverse("library:public_set_name", args=[approved_user.lending_hash]),
+        {"borrower_name": ""},
+    )
+
+    assert named_client.cookies[COOKIE_NAME].value == ""
+
+
+def test_anonymous_borrower_needs_no_session(named_client, approved_user, item_factory):
+    item = item_factory(title="Tent")
+    lending_hash = approved_user.lending_hash
+
+    with CaptureQueriesContext(connection) as queries:
+        named_client.get(reverse("library:public_lending", args=[lending_hash]))
+        named_client.post(reverse("library:public_request_borrow", args=[lending_hash, item.pk]))
+
+    assert Borrow.objects.get().borrower_name == "Ann"
+    assert not any("django_session" in query["sql"] for query in queries)
+    assert not Session.objects.exists()
+    assert "sessionid" not in named_client.cookies
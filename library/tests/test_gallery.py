@@ -0,0 +1,83 @@
+"""
+The public gallery: its query count doesn't grow with the library, and
+page cursors are validated before they reach the fragment cache.
+"""
+
+import base64
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.exceptions import BadRequest
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+
+from library import async_views, owners
+from library.cache import bump_owner_version, get_gallery_fragment, get_owner_version
+from library.models import Borrow
+from library.pagination import encode_cursor
+
+BAD_CURSORS = ["!!!", "bm90IGEgY3Vyc29y", base64.urlsafe_b64encode(b"yesterday|1").decode()]
+
+
+@pytest.fixture
+def grow_library(approved_user, item_factory):
+    """Start with one item; calling the result adds 49 more, some on loan."""
+    item_factory(title="Item 0")
+
+    def grow():
+        for i in range(1, 50):
+            item = item_factory(title=f"Item {i}", short_description="Something to lend")
+            if i % 5 == 0:
+                Borrow.objects.create(item=item, borrower_name="Ann", status="approved")
+
+    return grow
+
+
+@pytest.mark.parametrize("borrower_name", ["", "Ann"])
+def test_gallery_queries_constant(
+    client, approved_user, grow_library, assert_constant_queries, borrower_name
+):
+    lending_hash = approved_user.lending_hash
+    if borrower_name:
+        client.post(
+            reverse("library:public_set_name", args=[lending_hash]),
+            {"borrower_name": borrower_name},
+        )
+    url = reverse("library:public_lending", args=[lending_hash])
+
+    def render_uncached():
+        owners.clear()
+        bump_owner_version(approved_user.pk)
+        assert client.get(url).status_code == 200
+
+    assert_constant_queries(render_uncached, grow=grow_library)
+
+
+@pytest.mark.parametrize("cursor", BAD_CURSORS)
+def test_gallery_page_rejects_bad_cursor(client, approved_user, cursor):
+    url = reverse("library:public_gallery_page", args=[approved_user.lending_hash])
+
+    assert client.get(url, {"cursor": cursor}).status_code == 400
+
+
+@pytest.mark.parametrize("cursor", BAD_CURSORS)
+def test_async_gallery_page_rejects_bad_cursor(approved_user, cursor):
+    request = AsyncRequestFactory().get("/", {"cursor": cursor})
+
+    with pytest.raises(BadRequest):
+        async_to_sync(async_views.public_gallery_page)(request, approved_user.lending_hash)
+
+
+def test_gallery_cursor_spellings_share_cache_entry(client, approved_user, item_factory):
+    item = item_factory()
+    cursor = encode_cursor(item.created_at, item.pk)
+    # The same position, with the pk zero-padded
+    padded = f"{item.created_at.isoformat()}|{item.pk:05d}".encode()
+    padded = base64.urlsafe_b64encode(padded).decode().rstrip("=")
+    url = reverse("library:public_gallery_page", args=[approved_user.lending_hash])
+
+    assert client.get(url, {"cursor": padded}).status_code == 200
+
+    version = get_owner_version(approved_user.pk)
+    assert get_gallery_fragment(approved_user.pk, version, False, cursor) is not None
+    assert get_gallery_fragment(approved_user.pk, version, False, padded) is None
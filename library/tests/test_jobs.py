@@ -0,0 +1,89 @@
+"""
+Background jobs that fail for good, and what a failed derivatives job leaves
+behind for the pages showing the item.
+"""
+
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from library import jobs
+from library.models import Job
+
+
+@pytest.fixture
+def broken_image_item(item_factory, settings, tmp_path):
+    """An item whose stored image can't be decoded."""
+    settings.MEDIA_ROOT = tmp_path
+    return item_factory(image=SimpleUploadedFile("broken.jpg", b"not a jpeg", "image/jpeg"))
+
+
+def truncated_jpeg():
+    buffer = io.BytesIO()
+    Image.effect_noise((400, 300), 64).convert("RGB").save(buffer, "JPEG")
+    return buffer.getvalue()[:buffer.tell() // 2]
+
+
+def render_picture(item):
+    return Template("{% load library_images %}{% item_picture item %}").render(
+        Context({"item": item})
+    )
+
+
+def test_worker_gives_up_and_marks_item(broken_image_item, settings):
+    settings.LIBRARY_JOBS_SYNC = False
+    jobs.enqueue("generate_derivatives", item_id=broken_image_item.pk)
+
+    for _ in range(jobs.MAX_ATTEMPTS):
+        broken_image_item.refresh_from_db()
+        assert "error" not in broken_image_item.image_derivatives
+        Job.objects.update(run_after=timezone.now())
+        assert jobs.run_pending() == 1
+
+    assert Job.objects.get().status == Job.Status.FAILED
+    broken_image_item.refresh_from_db()
+    assert "error" in broken_image_item.image_derivatives
+    html = render_picture(broken_image_item)
+    assert "Preparing image" not in html
+    assert f'src="{broken_image_item.image.url}"' in html
+
+
+def test_inline_job_failure_marks_item(broken_image_item, settings):
+    settings.LIBRARY_JOBS_SYNC = True
+    assert "Preparing image" in render_picture(broken_image_item)
+
+    assert jobs.enqueue("generate_derivatives", item_id=broken_image_item.pk) is None
+
+    broken_image_item.refresh_from_db()
+    assert "error" in broken_image_item.image_derivatives
+    assert f'src="{broken_image_item.image.url}"' in render_picture(broken_image_item)
+
+
+def test_item_add_survives_undecodable_image(client, approved_user, settings, tmp_path):
+    # The header passes ImageUploadHandler's checks, the body doesn't decode
+    settings.MEDIA_ROOT = tmp_path
+    settings.LIBRARY_JOBS_SYNC = True
+    client.force_login(approved_user)
+    image = SimpleUploadedFile("truncated.jpg", truncated_jpeg(), "image/jpeg")
+
+    response = client.post(reverse("library:item_add"), {"title": "Tent", "image": image})
+
+    assert response.status_code == 302
+    item = approved_user.items.get()
+    assert "error" in item.image_derivatives
+
+
+def test_generate_derivatives_retries_failed_items(broken_image_item):
+    broken_image_item.image_derivatives = {"error": "cannot identify image file"}
+    broken_image_item.save(update_fields=["image_derivatives"])
+
+    stdout = io.StringIO()
+    call_command("generate_derivatives", stdout=stdout)
+
+    assert f"Skipping item {broken_image_item.pk}" in stdout.getvalue()
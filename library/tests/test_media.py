@@ -0,0 +1,97 @@
+"""
+Serving uploads: byte ranges, conditional requests and cache lifetimes.
+"""
+
+import pytest
+
+from library.media import IMMUTABLE_MAX_AGE, serve_media
+
+CONTENT = bytes(range(256)) * 4
+HASHED_NAME = "ab" + "0" * 62 + ".jpg"
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.LIBRARY_MEDIA_MAX_AGE = 600
+    (tmp_path / "items").mkdir()
+    for name in ["photo.jpg", HASHED_NAME]:
+        (tmp_path / "items" / name).write_bytes(CONTENT)
+    return tmp_path
+
+
+def get(rf, name, **headers):
+    return serve_media(rf.get("/", headers=headers), f"items/{name}")
+
+
+def head(rf, name, **headers):
+    """Headers without opening the file."""
+    return serve_media(rf.head("/", headers=headers), f"items/{name}")
+
+
+def body(response):
+    try:
+        return b"".join(response.streaming_content)
+    finally:
+        response.close()
+
+
+def test_full_file(rf, media_root):
+    response = get(rf, "photo.jpg")
+
+    assert response.status_code == 200
+    assert body(response) == CONTENT
+    assert response["Accept-Ranges"] == "bytes"
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=1000-", 1000, 1023),
+    ("bytes=-24", 1000, 1023),
+    ("bytes=1000-5000", 1000, 1023),
+])
+def test_range_gets_206(rf, media_root, header, start, end):
+    response = get(rf, "photo.jpg", Range=header)
+
+    assert response.status_code == 206
+    assert response["Content-Range"] == f"bytes {start}-{end}/1024"
+    assert response["Content-Length"] == str(end - start + 1)
+    assert body(response) == CONTENT[start:end + 1]
+
+
+def test_unsatisfiable_range_gets_416(rf, media_root):
+    response = get(rf, "photo.jpg", Range="bytes=2000-")
+
+    assert response.status_code == 416
+    assert response["Content-Range"] == "bytes */1024"
+
+
+def test_range_ignored_when_if_range_is_stale(rf, media_root):
+    response = get(rf, "photo.jpg", Range="bytes=0-99", If_Range='"stale"')
+
+    assert response.status_code == 200
+    assert body(response) == CONTENT
+
+
+@pytest.mark.parametrize("name", ["photo.jpg", HASHED_NAME])
+def test_matching_etag_gets_304(rf, media_root, name):
+    etag = head(rf, name)["ETag"]
+
+    response = get(rf, name, If_None_Match=etag)
+
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert "max-age" in response["Cache-Control"]
+
+
+def test_content_addressed_name_is_immutable(rf, media_root):
+    response = head(rf, HASHED_NAME)
+
+    assert response["ETag"] == f'"{HASHED_NAME.split(".")[0]}"'
+    assert response["Cache-Control"] == f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+
+
+def test_other_names_use_media_max_age(rf, media_root):
+    response = head(rf, "photo.jpg")
+
+    assert response["Cache-Control"] == "public, max-age=600"
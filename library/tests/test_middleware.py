@@ -0,0 +1,137 @@
+"""
+Request middleware runs natively under ASGI as well as WSGI.
+"""
+
+import logging
+import time
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory
+
+from library.middleware import (
+    ConnectionTimingMiddleware,
+    PerformanceMiddleware,
+    connection_acquired,
+)
+from library.models import User
+
+
+def sync_view(request):
+    return HttpResponse()
+
+
+async def async_view(request):
+    return HttpResponse()
+
+
+def sync_query_view(request):
+    User.objects.count()
+    return HttpResponse()
+
+
+async def async_query_view(request):
+    await User.objects.acount()
+    return HttpResponse()
+
+
+def sync_connecting_view(request):
+    connection.close()
+    User.objects.count()
+    return HttpResponse()
+
+
+def open_connection():
+    # A fresh thread has no connection yet, so this opens one
+    try:
+        User.objects.count()
+    finally:
+        connections.close_all()
+
+
+async def async_connecting_view(request):
+    await sync_to_async(open_connection, thread_sensitive=False)()
+    return HttpResponse()
+
+
+@pytest.fixture
+def timed_connections(monkeypatch):
+    """Time new connections as the library.db.postgresql backend does, on
+    whatever database the tests run against."""
+    wrapper = type(connections["default"])
+    if wrapper.__module__.startswith("library.db."):
+        return
+    get_new_connection = wrapper.get_new_connection
+
+    def timed(self, conn_params):
+        start = time.perf_counter()
+        try:
+            return get_new_connection(self, conn_params)
+        finally:
+            connection_acquired(time.perf_counter() - start)
+
+    monkeypatch.setattr(wrapper, "get_new_connection", timed)
+
+
+@pytest.mark.parametrize("middleware", [ConnectionTimingMiddleware, PerformanceMiddleware])
+def test_middleware_is_not_adapted_under_asgi(middleware, settings, caplog):
+    settings.MIDDLEWARE = [f"{middleware.__module__}.{middleware.__name__}"]
+    # Django only logs adaptations in debug mode
+    settings.DEBUG = True
+    with caplog.at_level(logging.DEBUG, logger="django.request"):
+        ASGIHandler().load_middleware(is_async=True)
+    assert not [record for record in caplog.records if "adapted" in record.getMessage()]
+
+
+def test_connection_timing_sync(settings):
+    settings.LIBRARY_SERVER_TIMING = True
+    middleware = ConnectionTimingMiddleware(sync_view)
+    assert not iscoroutinefunction(middleware)
+    response = middleware(RequestFactory().get("/"))
+    assert "db-connect;" in response["Server-Timing"]
+
+
+def test_connection_timing_async(settings):
+    settings.LIBRARY_SERVER_TIMING = True
+    middleware = ConnectionTimingMiddleware(async_view)
+    assert iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(AsyncRequestFactory().get("/"))
+    assert "db-connect;" in response["Server-Timing"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_connection_timing_sync_counts_connections(settings, timed_connections):
+    settings.LIBRARY_SERVER_TIMING = True
+    middleware = ConnectionTimingMiddleware(sync_connecting_view)
+    response = middleware(RequestFactory().get("/"))
+    assert 'desc="1 acquired"' in response["Server-Timing"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_connection_timing_async_counts_connections(settings, timed_connections):
+    # The connection is opened on a worker thread, not the event loop's
+    settings.LIBRARY_SERVER_TIMING = True
+    middleware = ConnectionTimingMiddleware(async_connecting_view)
+    response = async_to_sync(middleware)(AsyncRequestFactory().get("/"))
+    assert 'desc="1 acquired"' in response["Server-Timing"]
+
+
+def test_performance_sync(db, settings):
+    settings.LIBRARY_SERVER_TIMING = True
+    middleware = PerformanceMiddleware(sync_query_view)
+    assert not iscoroutinefunction(middleware)
+    response = middleware(RequestFactory().get("/"))
+    assert 'desc="1 queries"' in response["Server-Timing"]
+
+
+def test_performance_async_counts_queries(db, settings):
+    # The async ORM runs the query in a worker thread; it is still counted
+    settings.LIBRARY_SERVER_TIMING = True
+    middleware = PerformanceMiddleware(async_query_view)
+    assert iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(AsyncRequestFactory().get("/"))
+    assert 'desc="1 queries"' in response["Server-Timing"]
+    assert "app;dur=" in response["Server-Timing"]
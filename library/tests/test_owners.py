@@ -0,0 +1,132 @@
+"""
+Lending hash lookups are cached per process, both hits and misses, and
+never outlive a change to the owner.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from library import owners
+from library.cache import invalidate_owner
+from library.models import User
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Stand-in for the monotonic clock; advance it with ``clock.now += n``."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(owners, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def pending_user(user_factory):
+    return user_factory(username="pending", is_approved=False)
+
+
+def test_owner_cached(approved_user, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        owner, version = owners.get_public_owner(approved_user.lending_hash)
+
+    with django_assert_num_queries(0):
+        assert owners.get_public_owner(approved_user.lending_hash) == (owner, version)
+    assert owner.pk == approved_user.pk
+
+
+def test_async_lookup_shares_cache(approved_user, django_assert_num_queries):
+    owner, version = owners.get_public_owner(approved_user.lending_hash)
+
+    with django_assert_num_queries(0):
+        assert async_to_sync(owners.aget_public_owner)(approved_user.lending_hash) == (owner, version)
+
+
+def test_miss_cached(pending_user, django_assert_num_queries):
+    """Unknown hashes and owners awaiting approval alike."""
+    hashes = ["no-such-hash", pending_user.lending_hash]
+    with django_assert_num_queries(2):
+        assert [owners.get_public_owner(h) for h in hashes] == [(None, None)] * 2
+
+    with django_assert_num_queries(0):
+        assert [owners.get_public_owner(h) for h in hashes] == [(None, None)] * 2
+
+
+def test_entries_expire(clock, settings, approved_user, django_assert_num_queries):
+    settings.LIBRARY_OWNER_CACHE_TTL = 60
+    settings.LIBRARY_OWNER_MISS_CACHE_TTL = 10
+    owners.get_public_owner(approved_user.lending_hash)
+    owners.get_public_owner("no-such-hash")
+
+    clock.now += 10
+    with django_assert_num_queries(1):
+        owners.get_public_owner(approved_user.lending_hash)
+        owners.get_public_owner("no-such-hash")
+
+    clock.now += 60
+    with django_assert_num_queries(1):
+        owners.get_public_owner(approved_user.lending_hash)
+
+
+def test_approval_clears_miss(pending_user):
+    owners.get_public_owner(pending_user.lending_hash)
+
+    pending_user.is_approved = True
+    pending_user.save()
+
+    owner, _ = owners.get_public_owner(pending_user.lending_hash)
+    assert owner.pk == pending_user.pk
+
+
+def test_approval_elsewhere_found_after_miss_ttl(clock, settings, pending_user):
+    """Another process approved the owner; this one's miss runs out."""
+    settings.LIBRARY_OWNER_MISS_CACHE_TTL = 30
+    owners.get_public_owner(pending_user.lending_hash)
+    User.objects.filter(pk=pending_user.pk).update(is_approved=True)
+
+    assert owners.get_public_owner(pending_user.lending_hash) == (None, None)
+
+    clock.now += 30
+    owner, _ = owners.get_public_owner(pending_user.lending_hash)
+    assert owner.pk == pending_user.pk
+
+
+def test_rename_replaces_cached_owner(approved_user):
+    owners.get_public_owner(approved_user.lending_hash)
+
+    approved_user.username = "renamed"
+    approved_user.save()
+
+    owner, _ = owners.get_public_owner(approved_user.lending_hash)
+    assert owner.username == "renamed"
+
+
+def test_change_elsewhere_seen_through_version(approved_user):
+    """Another process saved the owner and bumped its shared cache version."""
+    owners.get_public_owner(approved_user.lending_hash)
+    User.objects.filter(pk=approved_user.pk).update(username="renamed")
+
+    invalidate_owner(approved_user.pk)
+
+    owner, _ = owners.get_public_owner(approved_user.lending_hash)
+    assert owner.username == "renamed"
+
+
+def test_regenerated_hash(approved_user):
+    old_hash = approved_user.lending_hash
+    owners.get_public_owner(old_hash)
+
+    approved_user.regenerate_lending_hash()
+
+    assert owners.get_public_owner(old_hash) == (None, None)
+    owner, _ = owners.get_public_owner(approved_user.lending_hash)
+    assert owner.pk == approved_user.pk
+
+
+def test_unapproved_owner_not_served(approved_user):
+    owners.get_public_owner(approved_user.lending_hash)
+
+    approved_user.is_approved = False
+    approved_user.save()
+
+    assert owners.get_public_owner(approved_user.lending_hash) == (None, None)
@@ -0,0 +1,69 @@
+"""
+Conditional responses and the versioned gallery fragment cache, on the
+local-memory and file-based cache backends.
+"""
+
+import pytest
+from django.urls import reverse
+
+from library.cache import invalidate_owner
+
+
+@pytest.fixture(params=["locmem", "filebased"])
+def cache_backend(request, settings, tmp_path):
+    """Run the test against each cache backend the deployment may use."""
+    if request.param == "locmem":
+        backend = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    else:
+        backend = {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        }
+    settings.CACHES = {"default": backend}
+    return request.param
+
+
+@pytest.fixture
+def gallery_url(approved_user, item_factory):
+    item_factory(title="Camping tent")
+    return reverse("library:public_lending", args=[approved_user.lending_hash])
+
+
+def test_matching_etag_gets_304(cache_backend, client, gallery_url):
+    etag = client.get(gallery_url)["ETag"]
+
+    response = client.get(gallery_url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+
+def test_invalidate_owner_changes_etag(cache_backend, client, approved_user, gallery_url):
+    etag = client.get(gallery_url)["ETag"]
+
+    invalidate_owner(approved_user.pk)
+    response = client.get(gallery_url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_item_change_invalidates_fragment(cache_backend, client, approved_user, gallery_url):
+    assert b"Camping tent" in client.get(gallery_url).content
+
+    item = approved_user.items.get()
+    item.title = "Hiking tent"
+    item.save()
+    content = client.get(gallery_url).content
+
+    assert b"Hiking tent" in content
+    assert b"Camping tent" not in content
+
+
+def test_fragment_served_from_cache(cache_backend, client, approved_user, gallery_url):
+    client.get(gallery_url)
+
+    # An update that bypasses the signals leaves the cached render in place
+    approved_user.items.update(title="Hiking tent")
+
+    assert b"Camping tent" in client.get(gallery_url).content
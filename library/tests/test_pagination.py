@@ -0,0 +1,75 @@
+"""
+Keyset pagination over nullable timestamps: rows without one come last and
+no row is skipped or repeated across pages.
+"""
+
+import re
+from datetime import timedelta
+from html import unescape
+
+import pytest
+from django.core.exceptions import BadRequest
+from django.urls import reverse
+from django.utils import timezone
+
+from library.models import Borrow, Item
+from library.pagination import encode_cursor, keyset_page
+
+MORE_URL_RE = re.compile(r'hx-get="([^"]*cursor=[^"]*)"')
+NAME_RE = re.compile(r"<td>(Friend \d+)</td>")
+
+
+@pytest.fixture
+def approved_borrows(item_factory):
+    """Approved borrows of separate items, every other one with no approved_at.
+
+    Returns their borrower names in page order.
+    """
+    now = timezone.now()
+    dated, undated = [], []
+    for i in range(7):
+        approved_at = now - timedelta(hours=i) if i % 2 == 0 else None
+        Borrow.objects.create(
+            item=item_factory(title=f"Item {i}"),
+            borrower_name=f"Friend {i}",
+            status=Borrow.Status.APPROVED,
+            approved_at=approved_at,
+        )
+        (dated if approved_at else undated).append(f"Friend {i}")
+    return dated + list(reversed(undated))
+
+
+def all_pages(queryset, field, page_size):
+    names, cursor = [], None
+    while True:
+        page = keyset_page(queryset, field, cursor, page_size)
+        names += [borrow.borrower_name for borrow in page.items]
+        cursor = page.next_cursor
+        if not cursor:
+            return names
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 10])
+def test_nullable_field_pages(approved_borrows, page_size):
+    assert all_pages(Borrow.objects.all(), "approved_at", page_size) == approved_borrows
+
+
+def test_null_cursor_rejected_for_non_null_field(item_factory):
+    item = item_factory()
+
+    with pytest.raises(BadRequest):
+        keyset_page(Item.objects.all(), "created_at", encode_cursor(None, item.pk))
+
+
+def test_current_lendings_pages_through_undated(client, approved_user, approved_borrows, settings):
+    settings.LIBRARY_PAGE_SIZE = 2
+    client.force_login(approved_user)
+
+    names, url = [], reverse("library:current_lendings")
+    while url:
+        content = client.get(url).content.decode()
+        names += NAME_RE.findall(content)
+        more = MORE_URL_RE.search(content)
+        url = more and unescape(more[1])
+
+    assert names == approved_borrows
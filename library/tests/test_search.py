@@ -0,0 +1,65 @@
+"""
+Item search on both branches: PostgreSQL full text and trigram search, and
+the Python fallback used on other databases.
+"""
+
+import pytest
+from django.db import connection
+
+from library.checks import check_search_extensions
+from library.search import _python_search, search_items, search_terms
+
+postgres_only = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="needs PostgreSQL"
+)
+
+
+@pytest.fixture(params=[
+    pytest.param("postgres", marks=postgres_only),
+    "python",
+])
+def search(request):
+    """``search(queryset, query)`` on one branch, whatever the database."""
+    if request.param == "python":
+        return lambda queryset, query: _python_search(queryset, search_terms(query))
+    return search_items
+
+
+@pytest.fixture
+def items(approved_user, item_factory, user_factory):
+    item_factory(title="Cordless drill", short_description="Makita 18V")
+    item_factory(title="Bicycle pump", long_description="Works with presta valves")
+    item_factory(title="Camping tent", short_description="Fits four, drill holes")
+    item_factory(title="Wheelbarrow")
+    item_factory(owner=user_factory(username="other"), title="Drill press")
+    return approved_user.items.all()
+
+
+@pytest.mark.parametrize("query, titles", [
+    # Prefixes match while typing; title matches rank first
+    ("dri", ["Cordless drill", "Camping tent"]),
+    # Every term must match, in any field
+    ("presta pump", ["Bicycle pump"]),
+    ("tent drill", ["Camping tent"]),
+    # Typos in titles are tolerated
+    ("wheelbarow", ["Wheelbarrow"]),
+    ("zzz", []),
+])
+def test_search(search, items, query, titles):
+    assert [item.title for item in search(items, query)] == titles
+
+
+def test_search_without_terms_finds_nothing(items):
+    assert not search_items(items, "  ?! ").exists()
+
+
+@postgres_only
+@pytest.mark.django_db
+def test_search_extensions_installed():
+    assert check_search_extensions(None, databases=["default"]) == []
+
+
+@pytest.mark.skipif(connection.vendor == "postgresql", reason="needs another database")
+@pytest.mark.django_db
+def test_search_extensions_not_checked_elsewhere():
+    assert check_search_extensions(None, databases=["default"]) == []
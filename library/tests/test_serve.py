@@ -0,0 +1,50 @@
+"""
+The serve command's migration step, with gunicorn itself stubbed out.
+"""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.migrations import Migration
+
+from library.management.commands import serve
+
+
+@pytest.fixture
+def run_serve(db, monkeypatch):
+    """Run ``serve`` with ``plan`` pending; returns its output."""
+    monkeypatch.setattr(serve.Server, "run", lambda self: None)
+    monkeypatch.delenv("ROOT_PASSWORD", raising=False)
+
+    def run(plan, *args):
+        monkeypatch.setattr(serve.Command, "pending_migrations", lambda self, database: plan)
+        migrated = []
+        monkeypatch.setattr(
+            serve, "call_command",
+            lambda name, **kwargs: migrated.append(name) if name == "migrate" else None,
+        )
+        stdout = StringIO()
+        call_command("serve", *args, stdout=stdout)
+        return stdout.getvalue(), migrated
+
+    return run
+
+
+def test_serve_without_pending_migrations(run_serve):
+    output, migrated = run_serve([])
+    assert "No migrations to apply." in output
+    assert not migrated
+
+
+def test_serve_applies_pending_migrations(run_serve):
+    output, migrated = run_serve([(Migration("0002_stats", "library"), False)])
+    assert migrated == ["migrate"]
+    assert "No migrations to apply." not in output
+
+
+def test_serve_no_migrate_warns_about_pending(run_serve):
+    output, migrated = run_serve([(Migration("0002_stats", "library"), False)], "--no-migrate")
+    assert not migrated
+    assert "1 migration(s) not applied (--no-migrate): library.0002_stats" in output
+    assert "No migrations to apply." not in output
@@ -0,0 +1,97 @@
+"""
+The production settings profile keeps the per-request path lean.
+"""
+
+import importlib
+import statistics
+import time
+
+import pytest
+from django.test import RequestFactory
+
+from library.management.commands.profile_middleware import build_stack
+
+PROD_MIDDLEWARE = [
+    "library.middleware.PerformanceMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "django_htmx.middleware.HtmxMiddleware",
+]
+# Most a request may spend in the production middleware before its view
+MIDDLEWARE_BUDGET_US = 1000
+
+
+@pytest.fixture
+def load_prod(monkeypatch):
+    """Import the prod profile afresh with the given environment variables."""
+    from stuff4friends.settings import base, prod
+
+    def load(**env):
+        monkeypatch.setenv("SETTINGS_PROFILE", "prod")
+        for name in ("DEBUG", "SERVER_TIMING", "DB_CONN_MAX_AGE", "DB_POOL"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        importlib.reload(base)
+        return importlib.reload(prod)
+
+    yield load
+    monkeypatch.undo()
+    importlib.reload(base)
+    importlib.reload(prod)
+
+
+def test_prod_middleware(load_prod):
+    prod = load_prod()
+    assert prod.DEBUG is False
+    assert prod.MIDDLEWARE == PROD_MIDDLEWARE
+    assert "django_browser_reload" not in prod.INSTALLED_APPS
+    assert "whitenoise.runserver_nostatic" not in prod.INSTALLED_APPS
+
+
+def test_prod_connection_timing_needs_server_timing(load_prod):
+    prod = load_prod(SERVER_TIMING="true")
+    assert prod.MIDDLEWARE == [
+        PROD_MIDDLEWARE[0], "library.middleware.ConnectionTimingMiddleware", *PROD_MIDDLEWARE[1:]
+    ]
+
+
+def test_prod_templates_and_connections(load_prod):
+    prod = load_prod()
+    template_options = prod.TEMPLATES[0]["OPTIONS"]
+    assert prod.TEMPLATES[0]["APP_DIRS"] is False
+    assert template_options["loaders"][0][0] == "django.template.loaders.cached.Loader"
+    assert "django.template.context_processors.debug" not in template_options["context_processors"]
+    assert prod.DATABASES["default"]["CONN_MAX_AGE"] > 0
+
+    # A pool replaces persistent connections
+    prod = load_prod(DB_POOL="true")
+    assert prod.DATABASES["default"]["CONN_MAX_AGE"] == 0
+
+
+def test_prod_storages(load_prod):
+    prod = load_prod()
+    assert not hasattr(prod, "STATICFILES_STORAGE")
+    assert prod.STORAGES["default"]["BACKEND"] == "library.storage.ContentAddressedStorage"
+    assert prod.STORAGES["staticfiles"]["BACKEND"] == (
+        "whitenoise.storage.CompressedManifestStaticFilesStorage"
+    )
+
+
+@pytest.mark.django_db
+def test_prod_middleware_overhead(load_prod):
+    handler = build_stack(load_prod().MIDDLEWARE)
+    factory = RequestFactory()
+    samples = []
+    for _ in range(200):
+        request = factory.get("/")
+        start = time.perf_counter()
+        handler(request)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    assert statistics.median(samples) < MIDDLEWARE_BUDGET_US
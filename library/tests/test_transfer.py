@@ -0,0 +1,92 @@
+"""
+Importing and exporting libraries: an export imports into another account
+unchanged, and an import is all or nothing.
+"""
+
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from library import transfer
+from library.models import Item
+
+
+def jpeg(name="photo.jpg", color="red"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (80, 60), color).save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+def manifest(*rows):
+    text = "title,short_description,borrow_time_limit\n" + "".join(f"{row}\n" for row in rows)
+    return SimpleUploadedFile("items.csv", text.encode(), "text/csv")
+
+
+def manifest_rows(owner):
+    return [{**row, "image": bool(row["image"])} for row in transfer.export_rows(owner, images=True)]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.LIBRARY_JOBS_SYNC = True
+
+
+@pytest.fixture
+def other_user(user_factory):
+    return user_factory(username="other")
+
+
+@pytest.fixture
+def library(approved_user, item_factory):
+    """Items exercising each manifest column, two with images."""
+    item_factory(title="Tent", short_description="Sleeps 4, with \"fly\"", image=jpeg())
+    item_factory(title="Drill", long_description="Bits included.\nCharge first.", borrow_time_limit=7)
+    item_factory(title="Ladder", is_available=False, image=jpeg("ladder.jpg", "blue"))
+    item_factory(title="Ümlaut-Kocher")
+    return approved_user
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_export_imports_into_other_account(library, other_user, fmt):
+    archive = b"".join(transfer.export_archive(library, fmt))
+
+    result = transfer.import_items(other_user, SimpleUploadedFile("library.zip", archive))
+
+    assert result == transfer.ImportResult(4, [])
+    assert manifest_rows(other_user) == manifest_rows(library)
+    originals = library.items.order_by("created_at", "pk")
+    copies = other_user.items.order_by("created_at", "pk")
+    for original, copy in zip(originals, copies):
+        if original.image:
+            with original.image.open("rb") as a, copy.image.open("rb") as b:
+                assert a.read() == b.read()
+        else:
+            assert not copy.image
+
+
+def test_bad_row_rolls_back_import(approved_user):
+    upload = manifest("Tent,Sleeps 4,", "Drill,,", ",No title,", "Ladder,,A week")
+
+    # A batch of one inserts the first rows before the bad one is read
+    result = transfer.import_items(approved_user, upload, batch_size=1)
+
+    # Rows after the bad one are still validated
+    assert result == transfer.ImportResult(3, [(4, "title: This field is required.")])
+    assert not Item.objects.exists()
+
+
+def test_dry_run_inserts_nothing(approved_user):
+    result = transfer.import_items(approved_user, manifest("Tent,,", "Drill,,3"), dry_run=True)
+
+    assert result == transfer.ImportResult(2, [])
+    assert not Item.objects.exists()
+
+
+def test_unreadable_manifest(approved_user):
+    upload = SimpleUploadedFile("items.csv", b"name,colour\nTent,green\n")
+
+    with pytest.raises(transfer.ManifestError):
+        transfer.import_items(approved_user, upload)
@@ -0,0 +1,79 @@
+"""
+Image uploads are vetted by ImageUploadHandler in the item views only.
+"""
+
+import io
+
+import pytest
+from django.conf import settings as django_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import MemoryFileUploadHandler
+from django.test import Client
+from django.test.client import RequestFactory
+from django.urls import reverse
+from PIL import Image
+
+from library.forms import ItemForm, ItemImportForm
+from library.models import Item
+
+
+def jpeg(name="photo.jpg"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (80, 60), "red").save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/jpeg")
+
+
+@pytest.fixture
+def owner_client(client, approved_user, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.LIBRARY_JOBS_SYNC = True
+    client.force_login(approved_user)
+    return client
+
+
+def test_default_upload_handlers_elsewhere():
+    assert "library.uploads.ImageUploadHandler" not in django_settings.FILE_UPLOAD_HANDLERS
+    request = RequestFactory().post("/", {"file": SimpleUploadedFile("notes.txt", b"notes")})
+    assert isinstance(request.upload_handlers[0], MemoryFileUploadHandler)
+
+
+def test_item_add_accepts_image(owner_client):
+    response = owner_client.post(reverse("library:item_add"), {"title": "Tent", "image": jpeg()})
+
+    assert response.status_code == 302
+    assert Item.objects.get().image
+
+
+@pytest.mark.parametrize("view", ["item_add", "item_edit"])
+def test_item_views_reject_oversized_image(owner_client, item_factory, settings, view):
+    settings.LIBRARY_MAX_UPLOAD_SIZE = 100
+    args = [item_factory(title="Tent").pk] if view == "item_edit" else []
+
+    response = owner_client.post(reverse(f"library:{view}", args=args), {"title": "Tent", "image": jpeg()})
+
+    assert response.status_code == 200
+    assert b"or smaller" in response.content
+    assert not Item.objects.exclude(image="").exists()
+
+
+@pytest.mark.parametrize("view", ["item_add", "item_edit"])
+def test_item_views_check_csrf(approved_user, item_factory, view):
+    client = Client(enforce_csrf_checks=True)
+    client.force_login(approved_user)
+    args = [item_factory(title="Tent").pk] if view == "item_edit" else []
+
+    response = client.post(reverse(f"library:{view}", args=args), {"title": "Tent", "image": jpeg()})
+
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize("form_class, field", [(ItemForm, "image"), (ItemImportForm, "manifest")])
+def test_forms_report_upload_errors(rf, form_class, field):
+    request = rf.post("/")
+    request.upload_errors = {field: "Too big.", "elsewhere": "Ignored."}
+
+    form = form_class({"title": "Tent"}, {}, request=request)
+
+    assert not form.is_valid()
+    assert "Too big." in form.errors[field]
+    assert "elsewhere" not in form.errors
@@ -0,0 +1,348 @@
+"""
+Bulk item import and export.
+
+A library moves as a manifest with one row per item, in CSV (``items.csv``)
+or JSON Lines (``items.jsonl``, one object per line), with the columns in
+``MANIFEST_FIELDS``. The ``image`` column names a file in an accompanying
+zip. An export with images is a single zip holding the manifest and an
+``images/`` directory, and ``import_items`` accepts exactly that archive,
+so a library exported from one account can be imported into another.
+
+Both directions stream: manifests are read and written a row at a time,
+images are copied between the zip and storage in chunks, and rows are
+inserted with ``bulk_create`` in batches, so memory stays flat however
+large the library is. Rows are validated with ``ItemForm``, like items
+added one at a time.
+"""
+
+import csv
+import io
+import json
+import mimetypes
+import posixpath
+import shutil
+import zipfile
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import transaction
+from django.template.defaultfilters import filesizeformat
+
+from . import jobs
+from .cache import invalidate_owner
+from .forms import ItemForm
+from .images import inspect_header
+from .models import Item
+from .search import update_search_vectors
+from .uploads import HEADER_LIMIT
+
+MANIFEST_FIELDS = [
+    "title",
+    "short_description",
+    "long_description",
+    "borrow_time_limit",
+    "is_available",
+    "image",
+]
+MANIFEST_NAMES = {"csv": "items.csv", "jsonl": "items.jsonl"}
+IMAGE_DIRECTORY = "images"
+CHUNK_SIZE = 64 * 1024
+# Stop validating an import after this many bad rows
+MAX_ERRORS = 50
+
+ImportResult = namedtuple("ImportResult", ["rows", "errors"])
+ImportResult.__doc__ = """\
+``rows`` valid rows, imported unless there were ``errors`` (a list of
+``(line, message)``) or it was a dry run."""
+
+
+class ManifestError(ValueError):
+    """The import as a whole can't be read (as opposed to a bad row)."""
+
+
+def manifest_format(name):
+    """``"csv"`` or ``"jsonl"`` from a manifest's file name."""
+    ext = posixpath.splitext(name or "")[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ManifestError("Upload a .csv or .jsonl manifest, or a .zip exported from this site.")
+
+
+# =============================================================================
+# Import
+# =============================================================================
+
+def _open_sources(upload, images):
+    """``(manifest file, format, images zip or None)`` for an import."""
+    if images is not None:
+        if not zipfile.is_zipfile(images):
+            raise ManifestError("The images must be a .zip file.")
+        images = zipfile.ZipFile(images)
+
+    if zipfile.is_zipfile(upload):
+        bundle = zipfile.ZipFile(upload)
+        for fmt, name in MANIFEST_NAMES.items():
+            if name in bundle.NameToInfo:
+                return bundle.open(name), fmt, images or bundle
+        raise ManifestError(
+            f"The archive has no {' or '.join(MANIFEST_NAMES.values())} manifest."
+        )
+    upload.seek(0)
+    return upload, manifest_format(upload.name), images
+
+
+def _read_manifest(file, fmt):
+    """Yield ``(line, row)`` for each row of a manifest."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            if reader.fieldnames is None or "title" not in reader.fieldnames:
+                raise ManifestError("The manifest needs a header row with a title column.")
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line, data in enumerate(text, start=1):
+                if not data.strip():
+                    continue
+                try:
+                    row = json.loads(data)
+                except ValueError:
+                    row = None
+                if not isinstance(row, dict):
+                    raise ManifestError(f"Line {line} is not a JSON object.")
+                yield line, row
+    except UnicodeDecodeError:
+        raise ManifestError("The manifest must be UTF-8 text.")
+    except csv.Error as e:
+        raise ManifestError(f"The manifest is not valid CSV: {e}")
+    finally:
+        text.detach()
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    value = _text(value).lower()
+    return value in ("true", "1", "yes") if value else True
+
+
+def _extract_image(images, name):
+    """Copy ``name`` out of the ``images`` zip into a temporary upload."""
+    try:
+        info = images.getinfo(name)
+    except KeyError:
+        raise ValueError(f"image: {name} is not in the archive.")
+    if info.file_size > settings.LIBRARY_MAX_UPLOAD_SIZE:
+        limit = filesizeformat(settings.LIBRARY_MAX_UPLOAD_SIZE)
+        raise ValueError(f"image: Images must be {limit} or smaller.")
+
+    filename = posixpath.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    upload = TemporaryUploadedFile(filename, content_type, info.file_size, None)
+    try:
+        with images.open(info) as member:
+            shutil.copyfileobj(member, upload.file, CHUNK_SIZE)
+        upload.seek(0)
+        try:
+            # Same checks as ImageUploadHandler: format and decoded size
+            if inspect_header(upload.read(HEADER_LIMIT)) is None:
+                raise ValueError("not an image or a corrupted image.")
+        except ValueError as e:
+            raise ValueError(f"image: {name}: {e}")
+        upload.seek(0)
+    except (ValueError, zipfile.BadZipFile, OSError) as e:
+        upload.close()
+        if isinstance(e, ValueError):
+            raise
+        raise ValueError(f"image: {name} could not be read from the archive.")
+    return upload
+
+
+def _build_item(owner, row, images):
+    """``(unsaved item, its temporary image or None)`` for a manifest row.
+
+    Raises ValueError if the row is invalid.
+    """
+    data = {field: _text(row.get(field)) for field in ItemForm.Meta.fields if field != "image"}
+    files = {}
+    image_name = _text(row.get("image"))
+    if image_name:
+        if images is None:
+            raise ValueError(f"image: {image_name} was named but no images were uploaded.")
+        files["image"] = _extract_image(images, image_name)
+
+    form = ItemForm(data, files)
+    if not form.is_valid():
+        for upload in files.values():
+            upload.close()
+        raise ValueError("; ".join(
+            " ".join(messages) if field == "__all__" else f"{field}: {' '.join(messages)}"
+            for field, messages in form.errors.items()
+        ))
+    item = form.save(commit=False)
+    item.owner = owner
+    item.is_available = _parse_bool(row.get("is_available"))
+    return item, files.get("image")
+
+
+def _discard(pending):
+    """Delete the temporary images of ``(item, image)`` pairs and forget them."""
+    for _, upload in pending:
+        if upload is not None:
+            upload.close()
+    pending.clear()
+
+
+def _insert(pending):
+    """Insert ``(item, image)`` pairs, storing the images, and queue derivatives."""
+    try:
+        # bulk_create skips the Item signals; import_items covers them
+        created = Item.objects.bulk_create([item for item, _ in pending])
+    finally:
+        _discard(pending)
+    ids = [item.pk for item in created]
+    update_search_vectors(Item.objects.filter(pk__in=ids))
+    jobs.enqueue_many(
+        "generate_derivatives",
+        [{"item_id": item.pk} for item in created if item.image],
+    )
+    return len(created)
+
+
+def import_items(owner, upload, images=None, batch_size=500, dry_run=False):
+    """Import the items in ``upload`` into ``owner``'s library.
+
+    ``upload`` is a manifest file (its name gives the format) or a zip
+    holding a manifest and its images; ``images`` is an optional separate
+    zip of images. Nothing is imported unless every row is valid: after the
+    first bad row the rest are only validated, up to ``MAX_ERRORS`` errors.
+    Raises ManifestError if the files themselves can't be read.
+    """
+    manifest, fmt, images = _open_sources(upload, images)
+    rows, errors, pending = 0, [], []
+    with transaction.atomic():
+        for line, row in _read_manifest(manifest, fmt):
+            try:
+                pending.append(_build_item(owner, row, images))
+            except ValueError as e:
+                errors.append((line, str(e)))
+                if len(errors) >= MAX_ERRORS:
+                    break
+                continue
+            rows += 1
+            if errors or dry_run:
+                # Only validating from here on
+                _discard(pending)
+            elif len(pending) >= batch_size:
+                _insert(pending)
+        if errors or dry_run:
+            _discard(pending)
+            transaction.set_rollback(True)
+        else:
+            if pending:
+                _insert(pending)
+            invalidate_owner(owner.pk)
+    return ImportResult(rows, errors)
+
+
+# =============================================================================
+# Export
+# =============================================================================
+
+class _Echo:
+    """A file-like object that hands back what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+class _ZipStream:
+    """Write-only stream that collects a zip as it is written, for
+    ``zipfile`` to write to without seeking."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _export_items(owner):
+    return (
+        owner.items.order_by("created_at", "pk")
+        .only("pk", "created_at", "updated_at", "image", *MANIFEST_FIELDS)
+        .iterator(chunk_size=2000)
+    )
+
+
+def _image_member(item):
+    ext = posixpath.splitext(item.image.name)[1].lower()
+    return posixpath.join(IMAGE_DIRECTORY, f"{item.pk}{ext}")
+
+
+def export_rows(owner, images=False):
+    """Yield a manifest row (a dict) for each of ``owner``'s items, oldest first.
+
+    With ``images``, the image column names each image's file in
+    ``export_archive``; otherwise it is left empty.
+    """
+    for item in _export_items(owner):
+        row = {field: getattr(item, field) for field in MANIFEST_FIELDS if field != "image"}
+        has_image = images and item.image and item.image.storage.exists(item.image.name)
+        row["image"] = _image_member(item) if has_image else ""
+        yield row
+
+
+def export_manifest(owner, fmt, images=False):
+    """Yield a manifest of ``owner``'s items in ``fmt`` as lines of text."""
+    rows = export_rows(owner, images)
+    if fmt == "csv":
+        writer = csv.DictWriter(_Echo(), fieldnames=MANIFEST_FIELDS)
+        yield writer.writeheader()
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def export_archive(owner, fmt):
+    """Yield a zip of ``owner``'s manifest and images in chunks of bytes."""
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(MANIFEST_NAMES[fmt], "w") as entry:
+            for line in export_manifest(owner, fmt, images=True):
+                entry.write(line.encode())
+                if len(stream.chunks) > 16:
+                    yield stream.drain()
+        yield stream.drain()
+
+        for item in _export_items(owner):
+            if not item.image or not item.image.storage.exists(item.image.name):
+                continue
+            info = zipfile.ZipInfo(_image_member(item), item.updated_at.timetuple()[:6])
+            # Photos are already compressed
+            info.compress_type = zipfile.ZIP_STORED
+            with item.image.open("rb") as image, archive.open(info, "w") as entry:
+                for chunk in image.chunks(CHUNK_SIZE):
+                    entry.write(chunk)
+                    yield stream.drain()
+            yield stream.drain()
+    yield stream.drain()
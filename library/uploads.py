@@ -0,0 +1,95 @@
+"""
+Upload handling for item images.
+
+Uploads are streamed to a temporary file in chunks instead of being
+buffered in memory, and the image header is checked as soon as enough of it
+has arrived. Non-images, unsupported formats, oversized files and
+decompression bombs are dropped before the rest of the body is stored.
+The item add and edit views install ``ImageUploadHandler``; bulk imports use
+``ArchiveUploadHandler`` instead, which only caps the size. Other uploads
+get Django's default handlers.
+"""
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+
+from .images import inspect_header
+
+# Give up identifying an upload after this many bytes
+HEADER_LIMIT = 512 * 1024
+
+
+class _RejectingUploadHandler(TemporaryFileUploadHandler):
+    """Spool uploads to disk; subclasses call ``reject`` to drop a file.
+
+    Rejections are recorded on ``request.upload_errors`` (field name ->
+    message) so forms can report them; see ``UploadErrorsMixin``.
+    """
+
+    def reject(self, message):
+        if self.request is not None:
+            if not hasattr(self.request, "upload_errors"):
+                self.request.upload_errors = {}
+            self.request.upload_errors[self.field_name] = message
+        self.file.close()
+        raise SkipFile(message)
+
+
+class ImageUploadHandler(_RejectingUploadHandler):
+    """Spool uploads to disk, rejecting bad images from their first bytes."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header = b""
+        self.vetted = False
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.LIBRARY_MAX_UPLOAD_SIZE:
+            limit = filesizeformat(settings.LIBRARY_MAX_UPLOAD_SIZE)
+            self.reject(f"Images must be {limit} or smaller.")
+
+        if not self.vetted:
+            self.header += raw_data[:HEADER_LIMIT - len(self.header)]
+            self.vet(final=len(self.header) >= HEADER_LIMIT)
+
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if not self.vetted:
+            try:
+                self.vet(final=True)
+            except SkipFile:
+                # Too late to skip; returning nothing leaves the file out
+                return None
+        return super().file_complete(file_size)
+
+    def vet(self, final):
+        try:
+            result = inspect_header(self.header)
+        except ValueError as e:
+            self.reject(str(e))
+        if result is not None:
+            self.vetted = True
+        elif final:
+            self.reject("Upload a valid image. The file you uploaded was either "
+                        "not an image or a corrupted image.")
+
+
+class ArchiveUploadHandler(_RejectingUploadHandler):
+    """Spool item import manifests and archives to disk, up to
+    LIBRARY_MAX_IMPORT_SIZE each. Their contents are vetted by
+    ``library.transfer`` as they are read."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.LIBRARY_MAX_IMPORT_SIZE:
+            limit = filesizeformat(settings.LIBRARY_MAX_IMPORT_SIZE)
+            self.reject(f"Imports must be {limit} or smaller.")
+        return super().receive_data_chunk(raw_data, start)
@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = "library"
 
+# Read-only public pages have async versions for ASGI deployments
+public_views = async_views if settings.LIBRARY_ASYNC_VIEWS else views
+
 urlpatterns = [
     # Public pages
     path("", views.home, name="home"),
@@ -20,6 +24,8 @@ urlpatterns = [
     # Item management
     path("items/", views.item_list_view, name="item_list"),
     path("items/add/", views.item_add_view, name="item_add"),
+    path("items/import/", views.item_import_view, name="item_import"),
+    path("items/export/", views.item_export_view, name="item_export"),
     path("items/<int:item_id>/edit/", views.item_edit_view, name="item_edit"),
     path("items/<int:item_id>/delete/", views.item_delete_view, name="item_delete"),
     path("items/<int:item_id>/toggle-availability/", views.item_toggle_availability_view, name="item_toggle_availability"),
@@ -27,14 +33,21 @@ urlpatterns = [
     # Borrow management
     path("requests/", views.borrow_requests_view, name="borrow_requests"),
     path("lendings/", views.current_lendings_view, name="current_lendings"),
+    path("requests/batch/", views.borrow_batch_view, name="borrow_batch"),
     path("borrow/<int:borrow_id>/approve/", views.borrow_approve_view, name="borrow_approve"),
     path("borrow/<int:borrow_id>/deny/", views.borrow_deny_view, name="borrow_deny"),
     path("borrow/<int:borrow_id>/mark-lent/", views.borrow_mark_lent_view, name="borrow_mark_lent"),
     path("borrow/<int:borrow_id>/mark-returned/", views.borrow_mark_returned_view, name="borrow_mark_returned"),
 
     # Public lending pages (no login required)
-    path("lend/<str:lending_hash>/", views.public_lending_page, name="public_lending"),
+    path("lend/<str:lending_hash>/", public_views.public_lending_page, name="public_lending"),
     path("lend/<str:lending_hash>/set-name/", views.public_set_borrower_name, name="public_set_name"),
-    path("lend/<str:lending_hash>/<int:item_id>/", views.public_item_detail, name="public_item_detail"),
+    path("lend/<str:lending_hash>/items/", public_views.public_gallery_page, name="public_gallery_page"),
+    path("lend/<str:lending_hash>/search/", public_views.public_search, name="public_search"),
+    path("lend/<str:lending_hash>/<int:item_id>/", public_views.public_item_detail, name="public_item_detail"),
+    path("lend/<str:lending_hash>/<int:item_id>/history/", public_views.public_item_history, name="public_item_history"),
     path("lend/<str:lending_hash>/<int:item_id>/request/", views.public_request_borrow, name="public_request_borrow"),
+
+    # Operations
+    path("metrics", views.metrics_view, name="metrics"),
 ]
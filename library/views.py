@@ -1,12 +1,37 @@
+import secrets
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
-from django.utils import timezone
-
-from .forms import LoginForm, RegistrationForm, UserSettingsForm, ItemForm
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from django.utils.safestring import mark_safe
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import condition
+
+from .cache import (
+    get_gallery_fragment,
+    get_owner_version,
+    set_gallery_fragment,
+    version_etag,
+    version_last_modified,
+)
+from . import archive, jobs, metrics, transfer
+from .borrowers import get_borrower_name, set_borrower_name
+from .forms import LoginForm, RegistrationForm, UserSettingsForm, ItemForm, ItemImportForm
 from .models import User, Item, Borrow
+from .owners import get_public_owner
+from .pagination import canonical_cursor, keyset_page
+from .search import search_items
+from .uploads import ArchiveUploadHandler, ImageUploadHandler
+from .services import borrows
+
+HISTORY_PAGE_SIZE = 20
 
 
 def home(request):
@@ -88,20 +113,17 @@ def dashboard_view(request):
         status=Borrow.Status.LENT_OUT,
     ).select_related("item")[:5]
 
-    # Item counts
-    total_items = user.items.count()
-    available_items = user.items.filter(is_available=True).count()
-    borrowed_items = user.items.filter(
-        borrows__status=Borrow.Status.LENT_OUT
-    ).distinct().count()
+    # Item and borrow counts in a single aggregate query
+    summary = user.item_summary()
 
     context = {
         "recent_requests": recent_requests,
         "pending_pickups": pending_pickups,
         "current_lendings": current_lendings,
-        "total_items": total_items,
-        "available_items": available_items,
-        "borrowed_items": borrowed_items,
+        "summary": summary,
+        "total_items": summary["total"],
+        "available_items": summary["available"],
+        "borrowed_items": summary["borrowed"],
         "lending_url": request.build_absolute_uri(f"/lend/{user.lending_hash}/"),
     }
     return render(request, "library/dashboard.html", context)
@@ -135,20 +157,43 @@ def settings_view(request):
 
 @login_required
 def item_list_view(request):
-    """View all items owned by the current user."""
-    items = request.user.items.all()
-    return render(request, "library/item_list.html", {"items": items})
+    """View all items owned by the current user, or those matching ``q``."""
+    items = request.user.items.with_borrow_state()
+    cursor = request.GET.get("cursor")
+    query = request.GET.get("q", "").strip()
+    if query:
+        results = search_items(items, query)[:settings.LIBRARY_PAGE_SIZE]
+        context = {"items": results, "query": query}
+    else:
+        page = keyset_page(items, "created_at", cursor)
+        context = {"items": page.items, "more_url": page.next_url(request.path)}
+
+    # Load-more and search-as-you-type requests only need the rows
+    if cursor or (request.htmx and "q" in request.GET):
+        return render(request, "library/partials/item_rows.html", context)
+    return render(request, "library/item_list.html", context)
 
 
 @login_required
+@csrf_exempt
 def item_add_view(request):
     """Add a new item."""
+    # Images are vetted as they stream in; the handler has to be set before
+    # CSRF protection reads the body
+    request.upload_handlers = [ImageUploadHandler(request)]
+    return _item_add(request)
+
+
+@csrf_protect
+def _item_add(request):
     if request.method == "POST":
-        form = ItemForm(request.POST, request.FILES)
+        form = ItemForm(request.POST, request.FILES, request=request)
         if form.is_valid():
             item = form.save(commit=False)
             item.owner = request.user
             item.save()
+            if item.image:
+                jobs.enqueue("generate_derivatives", item_id=item.pk)
             messages.success(request, f'"{item.title}" has been added to your library.')
             return redirect("library:item_list")
     else:
@@ -161,14 +206,23 @@ def item_add_view(request):
 
 
 @login_required
+@csrf_exempt
 def item_edit_view(request, item_id):
     """Edit an existing item."""
+    request.upload_handlers = [ImageUploadHandler(request)]
+    return _item_edit(request, item_id)
+
+
+@csrf_protect
+def _item_edit(request, item_id):
     item = get_object_or_404(Item, id=item_id, owner=request.user)
 
     if request.method == "POST":
-        form = ItemForm(request.POST, request.FILES, instance=item)
+        form = ItemForm(request.POST, request.FILES, instance=item, request=request)
         if form.is_valid():
             form.save()
+            if "image" in form.changed_data:
+                jobs.enqueue("generate_derivatives", item_id=item.pk)
             messages.success(request, f'"{item.title}" has been updated.')
             return redirect("library:item_list")
     else:
@@ -198,7 +252,9 @@ def item_delete_view(request, item_id):
 @login_required
 def item_toggle_availability_view(request, item_id):
     """Toggle item availability (HTMX endpoint)."""
-    item = get_object_or_404(Item, id=item_id, owner=request.user)
+    item = get_object_or_404(
+        Item.objects.with_borrow_state(), id=item_id, owner=request.user
+    )
 
     if request.method == "POST":
         item.is_available = not item.is_available
@@ -210,52 +266,255 @@ def item_toggle_availability_view(request, item_id):
         })
 
 
+@login_required
+@csrf_exempt
+def item_import_view(request):
+    """Import items in bulk from a manifest and an image archive."""
+    # Manifests and archives aren't images and can be far larger, so they
+    # need a different upload handler, set before the body is read
+    request.upload_handlers = [ArchiveUploadHandler(request)]
+    return _item_import(request)
+
+
+@csrf_protect
+def _item_import(request):
+    errors = []
+    if request.method == "POST":
+        form = ItemImportForm(request.POST, request.FILES, request=request)
+        if form.is_valid():
+            try:
+                result = transfer.import_items(
+                    request.user,
+                    form.cleaned_data["manifest"],
+                    images=form.cleaned_data["images"],
+                )
+            except transfer.ManifestError as e:
+                form.add_error("manifest", str(e))
+            else:
+                errors = result.errors
+                if not errors:
+                    messages.success(request, f"Imported {result.rows} item(s) into your library.")
+                    return redirect("library:item_list")
+    else:
+        form = ItemImportForm()
+
+    return render(request, "library/item_import.html", {
+        "form": form,
+        "errors": errors,
+        "max_errors": transfer.MAX_ERRORS,
+    })
+
+
+@login_required
+def item_export_view(request):
+    """Download all of the user's items as a manifest, or a zip with images."""
+    fmt = request.GET.get("format", "csv")
+    if fmt not in transfer.MANIFEST_NAMES:
+        raise Http404
+    filename = f"{request.user.username}-items"
+    if request.GET.get("images"):
+        response = StreamingHttpResponse(
+            transfer.export_archive(request.user, fmt), content_type="application/zip"
+        )
+        filename += ".zip"
+    else:
+        response = StreamingHttpResponse(
+            transfer.export_manifest(request.user, fmt),
+            content_type="text/csv" if fmt == "csv" else "application/jsonl",
+        )
+        filename += f".{fmt}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
 # =============================================================================
 # Public Lending Pages (no login required)
 # =============================================================================
 
-def public_lending_page(request, lending_hash):
-    """Public gallery view of a user's lending library."""
-    owner = get_object_or_404(User, lending_hash=lending_hash, is_approved=True)
-
+def _public_gallery_items(owner):
+    """Items shown on an owner's public gallery, with borrow state annotated."""
     # Get items based on owner's visibility settings
     if owner.show_borrowed_items:
         # Show all available items (including currently borrowed)
         items = owner.items.filter(is_available=True)
     else:
         # Only show items that are available AND not currently borrowed
-        items = owner.items.filter(
-            is_available=True
-        ).exclude(
-            borrows__status=Borrow.Status.LENT_OUT
-        )
+        items = owner.items.lendable()
+    return items.with_borrow_state()
 
-    # Get borrower name from session or cookie
-    borrower_name = request.session.get(f"borrower_name_{lending_hash}", "")
+
+def _public_search_results(owner, query):
+    """The first page of an owner's public items matching ``query``."""
+    items = search_items(_public_gallery_items(owner), query)
+    return list(items[:settings.LIBRARY_PAGE_SIZE])
+
+
+def _public_owner_lookup(request, lending_hash):
+    """``(owner, cache_version)`` for ``lending_hash``, memoized per request."""
+    if not hasattr(request, "_public_owner"):
+        request._public_owner = get_public_owner(lending_hash)
+    return request._public_owner
+
+
+def _public_owner(request, lending_hash):
+    """The approved owner behind ``lending_hash`` (public fields only), or 404."""
+    owner, _ = _public_owner_lookup(request, lending_hash)
+    if owner is None:
+        raise Http404("No User matches the given query.")
+    return owner
+
+
+def _public_owner_version(request, lending_hash):
+    """Cache version for the owner behind ``lending_hash``, or None."""
+    return _public_owner_lookup(request, lending_hash)[1]
+
+
+def _public_etag(request, lending_hash, item_id=None):
+    version = _public_owner_version(request, lending_hash)
+    if version is None:
+        return None
+    # The page also shows the visitor's own name, so vary on it
+    borrower_name = get_borrower_name(request, lending_hash)
+    return version_etag(version, borrower_name, str(item_id or ""))
+
+
+def _public_last_modified(request, lending_hash, item_id=None):
+    version = _public_owner_version(request, lending_hash)
+    return None if version is None else version_last_modified(version)
+
+
+def _gallery_items_html(owner, lending_hash, borrower_name, page, cursor=""):
+    """Render a page of the gallery items fragment (shared with async_views)."""
+    more_url = reverse("library:public_gallery_page", args=[lending_hash])
+    return render_to_string("library/public/partials/gallery_items.html", {
+        "owner": owner,
+        "items": page.items,
+        "more_url": page.next_url(more_url),
+        "page_only": bool(cursor),
+        "borrower_name": borrower_name,
+        "lending_hash": lending_hash,
+    })
+
+
+def _render_gallery_items(owner, lending_hash, borrower_name, cursor=""):
+    """Render one page of the gallery items fragment, cached per owner version.
+
+    The fragment only depends on whether the visitor has entered a name, so
+    every visitor shares one of two cached renders per page. The cursor is
+    validated before it becomes part of a cache key.
+    """
+    cursor = canonical_cursor(cursor)
+    version = get_owner_version(owner.pk)
+    named = bool(borrower_name)
+    html = get_gallery_fragment(owner.pk, version, named, cursor)
+    if html is None:
+        page = keyset_page(_public_gallery_items(owner), "created_at", cursor)
+        html = _gallery_items_html(owner, lending_hash, borrower_name, page, cursor)
+        set_gallery_fragment(owner.pk, version, named, html, cursor)
+    return mark_safe(html)
+
+
+def _split_template(request, template_name, context, slot):
+    """Render ``template_name`` around ``context[slot]``, returning the HTML
+    before and after the slot so that the slot can be streamed separately."""
+    marker = f"<!--stream-{secrets.token_hex(8)}-->"
+    html = render_to_string(
+        template_name, {**context, slot: mark_safe(marker)}, request=request
+    )
+    return html.split(marker, 1)
+
+
+def _stream_render(request, template_name, context, slot, render_slot):
+    """Stream ``template_name`` with ``context[slot]`` produced lazily.
+
+    Everything before the slot is sent before ``render_slot()`` runs its
+    queries.
+    """
+    head, tail = _split_template(request, template_name, context, slot)
+
+    def chunks():
+        yield head
+        yield render_slot()
+        yield tail
+
+    return StreamingHttpResponse(chunks())
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_public_etag, last_modified_func=_public_last_modified)
+def public_lending_page(request, lending_hash):
+    """Public gallery view of a user's lending library."""
+    owner = _public_owner(request, lending_hash)
+
+    # Get borrower name from its signed cookie
+    borrower_name = get_borrower_name(request, lending_hash)
 
     context = {
         "owner": owner,
-        "items": items,
         "borrower_name": borrower_name,
         "lending_hash": lending_hash,
+        "request_token": secrets.token_urlsafe(16),
     }
+
+    if settings.LIBRARY_STREAM_FIRST_PAGE:
+        return _stream_render(
+            request,
+            "library/public/gallery.html",
+            context,
+            "items_html",
+            lambda: _render_gallery_items(owner, lending_hash, borrower_name),
+        )
+
+    context["items_html"] = _render_gallery_items(owner, lending_hash, borrower_name)
     return render(request, "library/public/gallery.html", context)
 
 
+def public_gallery_page(request, lending_hash):
+    """HTMX endpoint returning the next page of gallery items."""
+    owner = _public_owner(request, lending_hash)
+    borrower_name = get_borrower_name(request, lending_hash)
+    cursor = request.GET.get("cursor", "")
+    return HttpResponse(_render_gallery_items(owner, lending_hash, borrower_name, cursor))
+
+
+def public_search(request, lending_hash):
+    """HTMX search-as-you-type endpoint for the public gallery."""
+    owner = _public_owner(request, lending_hash)
+    borrower_name = get_borrower_name(request, lending_hash)
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return HttpResponse(_render_gallery_items(owner, lending_hash, borrower_name))
+
+    return render(request, "library/public/partials/gallery_items.html", {
+        "owner": owner,
+        "items": _public_search_results(owner, query),
+        "query": query,
+        "borrower_name": borrower_name,
+        "lending_hash": lending_hash,
+    })
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_public_etag, last_modified_func=_public_last_modified)
 def public_item_detail(request, lending_hash, item_id):
     """Public detail view of a single item."""
-    owner = get_object_or_404(User, lending_hash=lending_hash, is_approved=True)
-    item = get_object_or_404(Item, id=item_id, owner=owner, is_available=True)
+    owner = _public_owner(request, lending_hash)
+    item = get_object_or_404(
+        Item.objects.with_borrow_state().select_related("stats"),
+        id=item_id, owner=owner, is_available=True,
+    )
 
-    # Get borrower name from session
-    borrower_name = request.session.get(f"borrower_name_{lending_hash}", "")
+    # Get borrower name from its signed cookie
+    borrower_name = get_borrower_name(request, lending_hash)
 
-    # Get lending history if owner allows it
-    lending_history = None
+    # First page of lending history if owner allows it; the rest loads on scroll
+    lending_history = history_more_url = None
     if owner.show_lending_history:
-        lending_history = item.borrows.filter(
-            status=Borrow.Status.RETURNED
-        ).order_by("-returned_at")
+        page = archive.history_page(item, page_size=HISTORY_PAGE_SIZE)
+        lending_history = page.items
+        history_more_url = page.next_url(
+            reverse("library:public_item_history", args=[lending_hash, item.pk])
+        )
 
     context = {
         "owner": owner,
@@ -263,42 +522,51 @@ def public_item_detail(request, lending_hash, item_id):
         "borrower_name": borrower_name,
         "lending_hash": lending_hash,
         "lending_history": lending_history,
+        "history_more_url": history_more_url,
+        "request_token": secrets.token_urlsafe(16),
     }
     return render(request, "library/public/item_detail.html", context)
 
 
+def public_item_history(request, lending_hash, item_id):
+    """HTMX endpoint returning the next page of an item's lending history."""
+    owner = _public_owner(request, lending_hash)
+    if not owner.show_lending_history:
+        raise Http404("No lending history.")
+    item = get_object_or_404(Item, id=item_id, owner=owner, is_available=True)
+    page = archive.history_page(item, request.GET.get("cursor"), HISTORY_PAGE_SIZE)
+    return render(request, "library/public/partials/history_items.html", {
+        "owner": owner,
+        "lending_history": page.items,
+        "more_url": page.next_url(request.path),
+    })
+
+
 def public_set_borrower_name(request, lending_hash):
-    """HTMX endpoint to set borrower name in session."""
-    owner = get_object_or_404(User, lending_hash=lending_hash, is_approved=True)
+    """HTMX endpoint to set the borrower name cookie."""
+    owner = _public_owner(request, lending_hash)
 
     if request.method == "POST":
         borrower_name = request.POST.get("borrower_name", "").strip()
-        request.session[f"borrower_name_{lending_hash}"] = borrower_name
-
-        # Return updated gallery with request buttons enabled/disabled
-        if owner.show_borrowed_items:
-            items = owner.items.filter(is_available=True)
-        else:
-            items = owner.items.filter(
-                is_available=True
-            ).exclude(
-                borrows__status=Borrow.Status.LENT_OUT
-            )
-
-        return render(request, "library/public/partials/gallery_items.html", {
-            "owner": owner,
-            "items": items,
-            "borrower_name": borrower_name,
-            "lending_hash": lending_hash,
+        # Return updated gallery with request buttons enabled/disabled, and
+        # a new request token: under the old one, the new name's first
+        # request would collide with the old name's
+        response = render(request, "library/public/partials/gallery_container.html", {
+            "items_html": _render_gallery_items(owner, lending_hash, borrower_name),
+            "request_token": secrets.token_urlsafe(16),
         })
+        set_borrower_name(response, lending_hash, borrower_name)
+        return response
 
 
 def public_request_borrow(request, lending_hash, item_id):
     """HTMX endpoint to request borrowing an item."""
-    owner = get_object_or_404(User, lending_hash=lending_hash, is_approved=True)
-    item = get_object_or_404(Item, id=item_id, owner=owner, is_available=True)
+    owner = _public_owner(request, lending_hash)
+    item = get_object_or_404(
+        Item.objects.with_borrow_state(), id=item_id, owner=owner, is_available=True
+    )
 
-    borrower_name = request.session.get(f"borrower_name_{lending_hash}", "").strip()
+    borrower_name = get_borrower_name(request, lending_hash).strip()
 
     if request.method == "POST" and borrower_name:
         # Check if item is already borrowed
@@ -310,14 +578,15 @@ def public_request_borrow(request, lending_hash, item_id):
                 "error": "This item is currently borrowed.",
             })
 
-        # Check for existing pending request from same borrower
-        existing = Borrow.objects.filter(
-            item=item,
-            borrower_name__iexact=borrower_name,
-            status__in=[Borrow.Status.REQUESTED, Borrow.Status.APPROVED],
-        ).exists()
+        # Create the borrow request; duplicates are rejected by the database
+        request_token = request.POST.get("request_token", "")[:32]
+        borrow, created = borrows.request_borrow(item, borrower_name, request_token)
+        replayed = bool(request_token) and borrow is not None and (
+            borrow.request_token == request_token
+            and borrow.borrower_name.lower() == borrower_name.lower()
+        )
 
-        if existing:
+        if not created and not replayed:
             return render(request, "library/public/partials/request_button.html", {
                 "item": item,
                 "lending_hash": lending_hash,
@@ -325,13 +594,6 @@ def public_request_borrow(request, lending_hash, item_id):
                 "already_requested": True,
             })
 
-        # Create borrow request
-        Borrow.objects.create(
-            item=item,
-            borrower_name=borrower_name,
-            status=Borrow.Status.REQUESTED,
-        )
-
         return render(request, "library/public/partials/request_button.html", {
             "item": item,
             "lending_hash": lending_hash,
@@ -350,9 +612,45 @@ def borrow_requests_view(request):
     requests = Borrow.objects.filter(
         item__owner=request.user,
         status=Borrow.Status.REQUESTED,
-    ).select_related("item").order_by("-requested_at")
+    ).select_related("item")
+
+    cursor = request.GET.get("cursor")
+    page = keyset_page(requests, "requested_at", cursor)
+
+    # Load-more requests only need the next batch of rows
+    if cursor:
+        return render(request, "library/partials/borrow_rows.html", {
+            "borrows": page.items,
+            "more_url": page.next_url(request.path),
+            "selectable": True,
+        })
+
+    return render(request, "library/borrow_requests.html", {
+        "requests": page.items,
+        "more_url": page.next_url(request.path),
+    })
 
-    return render(request, "library/borrow_requests.html", {"requests": requests})
+
+@login_required
+def borrow_batch_view(request):
+    """Approve or deny several borrow requests at once (HTMX endpoint)."""
+    if request.method == "POST":
+        action = request.POST.get("action")
+        borrow_ids = [i for i in request.POST.getlist("borrow_ids") if i.isdigit()]
+
+        if action == "approve":
+            handled = borrows.bulk_approve(request.user, borrow_ids)
+        elif action == "deny":
+            handled = borrows.bulk_deny(request.user, borrow_ids)
+        else:
+            return HttpResponse("Unknown action.", status=400)
+
+        # Swap just the handled rows in place
+        handled = Borrow.objects.filter(id__in=handled).select_related("item")
+
+        return render(request, "library/partials/borrow_batch_result.html", {
+            "handled": handled,
+        })
 
 
 def _is_dashboard_request(request):
@@ -365,16 +663,17 @@ def _is_dashboard_request(request):
 def borrow_approve_view(request, borrow_id):
     """Approve a borrow request (HTMX endpoint)."""
     borrow = get_object_or_404(
-        Borrow,
+        Borrow.objects.select_related("item"),
         id=borrow_id,
         item__owner=request.user,
         status=Borrow.Status.REQUESTED,
     )
 
     if request.method == "POST":
-        borrow.status = Borrow.Status.APPROVED
-        borrow.approved_at = timezone.now()
-        borrow.save(update_fields=["status", "approved_at"])
+        try:
+            borrows.approve(borrow)
+        except borrows.TransitionError as e:
+            return HttpResponse(str(e), status=409)
 
         if _is_dashboard_request(request):
             return render(request, "library/partials/dashboard_request_item.html", {
@@ -392,15 +691,17 @@ def borrow_approve_view(request, borrow_id):
 def borrow_deny_view(request, borrow_id):
     """Deny a borrow request (HTMX endpoint)."""
     borrow = get_object_or_404(
-        Borrow,
+        Borrow.objects.select_related("item"),
         id=borrow_id,
         item__owner=request.user,
         status=Borrow.Status.REQUESTED,
     )
 
     if request.method == "POST":
-        borrow.status = Borrow.Status.DENIED
-        borrow.save(update_fields=["status"])
+        try:
+            borrows.deny(borrow)
+        except borrows.TransitionError as e:
+            return HttpResponse(str(e), status=409)
 
         if _is_dashboard_request(request):
             return render(request, "library/partials/dashboard_request_item.html", {
@@ -419,16 +720,17 @@ def borrow_deny_view(request, borrow_id):
 def borrow_mark_lent_view(request, borrow_id):
     """Mark an approved borrow as lent out (HTMX endpoint)."""
     borrow = get_object_or_404(
-        Borrow,
+        Borrow.objects.select_related("item"),
         id=borrow_id,
         item__owner=request.user,
         status=Borrow.Status.APPROVED,
     )
 
     if request.method == "POST":
-        borrow.status = Borrow.Status.LENT_OUT
-        borrow.lent_at = timezone.now()
-        borrow.save(update_fields=["status", "lent_at"])
+        try:
+            borrows.mark_lent(borrow)
+        except borrows.TransitionError as e:
+            return HttpResponse(str(e), status=409)
 
         if _is_dashboard_request(request):
             return render(request, "library/partials/dashboard_pickup_item.html", {
@@ -446,16 +748,17 @@ def borrow_mark_lent_view(request, borrow_id):
 def borrow_mark_returned_view(request, borrow_id):
     """Mark a lent item as returned (HTMX endpoint)."""
     borrow = get_object_or_404(
-        Borrow,
+        Borrow.objects.select_related("item"),
         id=borrow_id,
         item__owner=request.user,
         status=Borrow.Status.LENT_OUT,
     )
 
     if request.method == "POST":
-        borrow.status = Borrow.Status.RETURNED
-        borrow.returned_at = timezone.now()
-        borrow.save(update_fields=["status", "returned_at"])
+        try:
+            borrows.mark_returned(borrow)
+        except borrows.TransitionError as e:
+            return HttpResponse(str(e), status=409)
 
         if _is_dashboard_request(request):
             return render(request, "library/partials/dashboard_lending_item.html", {
@@ -476,14 +779,51 @@ def current_lendings_view(request):
     pending_pickups = Borrow.objects.filter(
         item__owner=request.user,
         status=Borrow.Status.APPROVED,
-    ).select_related("item").order_by("-approved_at")
+    ).select_related("item")
 
     lent_out = Borrow.objects.filter(
         item__owner=request.user,
         status=Borrow.Status.LENT_OUT,
-    ).select_related("item").order_by("-lent_at")
+    ).select_related("item")
+
+    # Load-more requests name the list they continue
+    cursor = request.GET.get("cursor")
+    if cursor:
+        if request.GET.get("list") == "lent_out":
+            page = keyset_page(lent_out, "lent_at", cursor)
+        else:
+            page = keyset_page(pending_pickups, "approved_at", cursor)
+        return render(request, "library/partials/borrow_rows.html", {
+            "borrows": page.items,
+            "more_url": page.next_url(request.path, list=request.GET.get("list", "")),
+        })
+
+    pickups_page = keyset_page(pending_pickups, "approved_at")
+    lent_out_page = keyset_page(lent_out, "lent_at")
 
     return render(request, "library/current_lendings.html", {
-        "pending_pickups": pending_pickups,
-        "lent_out": lent_out,
+        "pending_pickups": pickups_page.items,
+        "pickups_more_url": pickups_page.next_url(request.path, list="pending_pickups"),
+        "lent_out": lent_out_page.items,
+        "lent_out_more_url": lent_out_page.next_url(request.path, list="lent_out"),
     })
+
+
+# =============================================================================
+# Operations
+# =============================================================================
+
+def _has_metrics_token(request):
+    token = settings.LIBRARY_METRICS_TOKEN
+    header = request.headers.get("Authorization", "")
+    return bool(token) and constant_time_compare(header, f"Bearer {token}")
+
+
+def metrics_view(request):
+    """Per-view request metrics for Prometheus (staff or bearer token only)."""
+    if not (request.user.is_staff or _has_metrics_token(request)):
+        raise Http404
+    return HttpResponse(
+        metrics.render_prometheus(metrics.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
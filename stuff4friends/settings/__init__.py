@@ -0,0 +1,27 @@
+"""
+Django settings for stuff4friends project.
+
+Settings are layered: ``base`` holds everything shared, and one profile
+module on top of it adjusts it for where the app runs. SETTINGS_PROFILE
+picks the profile:
+- ``dev``: browser auto-reload and runserver without static file handling;
+- ``prod``: the minimal middleware stack, cached templates and persistent
+  database connections;
+- ``bench``: prod, adjusted for `manage.py bench`.
+Without SETTINGS_PROFILE, DEBUG picks dev (the default) or prod.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import PROFILE
+
+if PROFILE == "dev":
+    from .dev import *  # noqa: F401,F403
+elif PROFILE == "prod":
+    from .prod import *  # noqa: F401,F403
+elif PROFILE == "bench":
+    from .bench import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(
+        f"SETTINGS_PROFILE must be 'dev', 'prod' or 'bench', not {PROFILE!r}."
+    )
@@ -0,0 +1,257 @@
+"""
+Settings shared by every profile (see __init__.py).
+"""
+
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+# The profile layered on top of these settings: "dev", "prod" or "bench".
+# Without SETTINGS_PROFILE, DEBUG picks dev (the default) or prod.
+PROFILE = os.environ.get("SETTINGS_PROFILE") or (
+    "dev" if os.environ.get("DEBUG", "true").lower() in ("true", "1", "yes") else "prod"
+)
+
+# Security
+SECRET_KEY = os.environ.get(
+    "SECRET_KEY", "django-insecure-dev-key-change-in-production"
+)
+DEBUG = os.environ.get("DEBUG", str(PROFILE == "dev")).lower() in ("true", "1", "yes")
+ALLOWED_HOSTS = os.environ.get("ALLOWED_HOSTS", "localhost,127.0.0.1").split(",")
+CSRF_TRUSTED_ORIGINS = os.environ.get("CSRF_TRUSTED_ORIGINS", "").split(",")
+CSRF_TRUSTED_ORIGINS = [o for o in CSRF_TRUSTED_ORIGINS if o]  # Filter empty strings
+
+# Application definition
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "django.contrib.postgres",
+    # Third-party
+    "django_htmx",
+    # Local
+    "library",
+]
+
+MIDDLEWARE = [
+    "library.middleware.PerformanceMiddleware",
+    "library.middleware.ConnectionTimingMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "django_htmx.middleware.HtmxMiddleware",
+]
+
+ROOT_URLCONF = "stuff4friends.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [BASE_DIR / "templates"],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "stuff4friends.wsgi.application"
+
+# Database
+# ENGINE is Django's PostgreSQL backend plus connection-acquisition timing
+# (reported per request by library.middleware.ConnectionTimingMiddleware).
+DATABASES = {
+    "default": {
+        "ENGINE": "library.db.postgresql",
+        "NAME": os.environ.get("POSTGRES_DB", "stuff4friends"),
+        "USER": os.environ.get("POSTGRES_USER", "stuff4friends"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", "stuff4friends"),
+        "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        # Seconds to keep a connection open between requests (0 closes it
+        # after each request, None keeps it forever)
+        "CONN_MAX_AGE": (
+            None if os.environ.get("DB_CONN_MAX_AGE", "0").lower() == "none"
+            else int(os.environ.get("DB_CONN_MAX_AGE", "0"))
+        ),
+        # Check persistent/pooled connections are alive before reusing them
+        "CONN_HEALTH_CHECKS": os.environ.get(
+            "DB_CONN_HEALTH_CHECKS", "true"
+        ).lower() in ("true", "1", "yes"),
+        "OPTIONS": {},
+    }
+}
+
+# psycopg's connection pool, one per worker process. Replaces persistent
+# connections (Django requires CONN_MAX_AGE=0 with a pool).
+if os.environ.get("DB_POOL", "false").lower() in ("true", "1", "yes"):
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "4")),
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+    }
+
+# Expected worker counts, used by the startup check that compares the
+# connections they can hold with PostgreSQL's max_connections
+LIBRARY_WEB_WORKERS = int(os.environ.get("WEB_CONCURRENCY", "1"))
+LIBRARY_JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# Without a pool: connections each web worker can hold (its thread count)
+LIBRARY_DB_CONNECTIONS_PER_WORKER = int(os.environ.get("DB_CONNECTIONS_PER_WORKER", "1"))
+# Send Server-Timing headers (view and database time, connection time)
+LIBRARY_SERVER_TIMING = os.environ.get(
+    "SERVER_TIMING", str(DEBUG)
+).lower() in ("true", "1", "yes")
+
+# Most queries a view may run per request (by URL name). Including session
+# and auth lookups; on a cold cache. Exceeding one is logged, or raises
+# QueryBudgetExceeded with QUERY_BUDGET_ACTION=raise (the test default).
+LIBRARY_QUERY_BUDGETS = {
+    "library:public_lending": 6,
+    "library:public_gallery_page": 4,
+    "library:public_item_detail": 6,
+    "library:public_item_history": 4,
+    "library:public_search": 5,
+    "library:public_request_borrow": 10,
+    "library:dashboard": 8,
+    "library:item_list": 6,
+    "library:borrow_requests": 5,
+    "library:current_lendings": 6,
+}
+LIBRARY_QUERY_BUDGET_ACTION = os.environ.get("QUERY_BUDGET_ACTION", "log").lower()
+# Bearer token that lets a Prometheus scraper read /metrics without a
+# staff session
+LIBRARY_METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Cache (public page render cache and version counters). Must be shared by
+# all gunicorn workers, so the default is file-based rather than local-memory.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "/var/tmp/stuff4friends_cache"),
+    }
+}
+
+# Sessions are only needed by logged-in owners; borrowers are identified by
+# a signed cookie per lending page (library/borrowers.py). SESSION_BACKEND is
+# "cached_db", "db", "cache" or "signed_cookies".
+SESSION_ENGINE = "django.contrib.sessions.backends." + os.environ.get(
+    "SESSION_BACKEND", "cached_db"
+)
+LIBRARY_BORROWER_COOKIE_AGE = 60 * 60 * 24 * 365
+
+# Custom user model
+AUTH_USER_MODEL = "library.User"
+
+# Password validation
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+# Internationalization
+LANGUAGE_CODE = "en-us"
+TIME_ZONE = "UTC"
+USE_I18N = True
+USE_TZ = True
+
+# Static files (CSS, JavaScript, Images)
+STATIC_URL = "static/"
+STATIC_ROOT = BASE_DIR / "staticfiles"
+STATICFILES_DIRS = [BASE_DIR / "static"]
+
+# Media files (user uploads)
+MEDIA_URL = "media/"
+MEDIA_ROOT = BASE_DIR / "media"
+
+# Uploads are stored once per distinct content under a SHA-256 name and
+# garbage-collected by `manage.py collect_media`. STORAGES replaces Django's
+# defaults as a whole, so the staticfiles entry is restated here; the prod
+# profile swaps in WhiteNoise's compressed, hashed storage.
+STORAGES = {
+    "default": {
+        "BACKEND": "library.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Serve MEDIA_URL from Django (library/media.py). Turn this off when a
+# reverse proxy serves MEDIA_ROOT instead.
+LIBRARY_SERVE_MEDIA = os.environ.get("SERVE_MEDIA", "true").lower() in ("true", "1", "yes")
+# Browser cache lifetime for media that isn't content-addressed
+LIBRARY_MEDIA_MAX_AGE = int(os.environ.get("MEDIA_MAX_AGE", "3600"))
+
+# Django's default upload handlers apply; the item image and import views
+# install their own (see library/uploads.py)
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB of non-file form data
+
+# Image limits (70MB as per spec)
+LIBRARY_MAX_UPLOAD_SIZE = 73400320  # 70MB
+LIBRARY_MAX_IMAGE_PIXELS = int(os.environ.get("LIBRARY_MAX_IMAGE_PIXELS", "64000000"))
+# Bulk item imports: a manifest, or a zip of a manifest and its images
+LIBRARY_MAX_IMPORT_SIZE = int(os.environ.get("LIBRARY_MAX_IMPORT_SIZE", str(2 * 1024 ** 3)))
+
+# Pagination for galleries and owner lists
+LIBRARY_PAGE_SIZE = int(os.environ.get("LIBRARY_PAGE_SIZE", "48"))
+# Stream the public gallery so the page shell is sent before items are loaded
+LIBRARY_STREAM_FIRST_PAGE = os.environ.get(
+    "LIBRARY_STREAM_FIRST_PAGE", "false"
+).lower() in ("true", "1", "yes")
+
+# Per-process cache of lending hash -> public owner (see library/owners.py),
+# and of hashes that matched no approved owner. Sizes are entry counts, TTLs
+# seconds.
+LIBRARY_OWNER_CACHE_SIZE = 1024
+LIBRARY_OWNER_CACHE_TTL = 300
+LIBRARY_OWNER_MISS_CACHE_SIZE = 4096
+LIBRARY_OWNER_MISS_CACHE_TTL = 30
+
+# Background jobs: run them inline instead of queueing for `run_workers`.
+# On by default in development so no worker process is needed.
+LIBRARY_JOBS_SYNC = os.environ.get("JOBS_SYNC", str(DEBUG)).lower() in (
+    "true", "1", "yes"
+)
+
+# Server interface: "wsgi" (gunicorn sync workers) or "asgi" (gunicorn with
+# uvicorn workers); read by gunicorn.conf.py. Under ASGI the public pages
+# use the async views in library/async_views.py unless ASYNC_VIEWS=false.
+SERVER_INTERFACE = os.environ.get("SERVER_INTERFACE", "wsgi").lower()
+LIBRARY_ASYNC_VIEWS = os.environ.get(
+    "ASYNC_VIEWS", str(SERVER_INTERFACE == "asgi")
+).lower() in ("true", "1", "yes")
+
+# Default primary key field type
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Login settings
+LOGIN_URL = "library:login"
+LOGIN_REDIRECT_URL = "library:dashboard"
+LOGOUT_REDIRECT_URL = "library:home"
@@ -0,0 +1,11 @@
+"""
+Benchmark settings for `manage.py bench`: production settings, measured
+in-process by the test client, with query budget overruns only logged so
+every URL gets measured.
+"""
+
+from .prod import *  # noqa: F401,F403
+from .prod import ALLOWED_HOSTS
+
+ALLOWED_HOSTS = [*ALLOWED_HOSTS, "testserver"]
+LIBRARY_QUERY_BUDGET_ACTION = "log"
@@ -0,0 +1,16 @@
+"""
+Development settings: runserver serves static files through WhiteNoise, and
+pages reload in the browser when code or templates change.
+"""
+
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE
+
+# Must come before staticfiles to replace its runserver
+INSTALLED_APPS = list(INSTALLED_APPS)
+INSTALLED_APPS.insert(
+    INSTALLED_APPS.index("django.contrib.staticfiles"), "whitenoise.runserver_nostatic"
+)
+INSTALLED_APPS.append("django_browser_reload")
+
+MIDDLEWARE = [*MIDDLEWARE, "django_browser_reload.middleware.BrowserReloadMiddleware"]
@@ -0,0 +1,57 @@
+"""
+Production settings: only the middleware every request needs, templates
+compiled once per process, database connections kept between requests, and
+compressed static files with hashed names.
+"""
+
+import copy
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import DATABASES, LIBRARY_SERVER_TIMING, STORAGES, TEMPLATES
+
+# ConnectionTimingMiddleware only reports through Server-Timing and DEBUG
+# logging, so it is left out unless SERVER_TIMING is on
+MIDDLEWARE = [
+    "library.middleware.PerformanceMiddleware",
+    *(["library.middleware.ConnectionTimingMiddleware"] if LIBRARY_SERVER_TIMING else []),
+    "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "django_htmx.middleware.HtmxMiddleware",
+]
+
+# Stated explicitly rather than relying on DEBUG being off: templates are
+# parsed once per process, and the debug context processor is dropped
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]["APP_DIRS"] = False
+TEMPLATES[0]["OPTIONS"]["loaders"] = [
+    ("django.template.loaders.cached.Loader", [
+        "django.template.loaders.filesystem.Loader",
+        "django.template.loaders.app_directories.Loader",
+    ]),
+]
+TEMPLATES[0]["OPTIONS"]["context_processors"] = [
+    processor for processor in TEMPLATES[0]["OPTIONS"]["context_processors"]
+    if processor != "django.template.context_processors.debug"
+]
+
+# Keep connections for a minute unless DB_CONN_MAX_AGE says otherwise
+# (a pool requires CONN_MAX_AGE=0)
+DATABASES = copy.deepcopy(DATABASES)
+if "DB_CONN_MAX_AGE" not in os.environ and not DATABASES["default"]["OPTIONS"].get("pool"):
+    DATABASES["default"]["CONN_MAX_AGE"] = 60
+
+# Needs the manifest from `collectstatic`, which the Dockerfile runs with
+# this profile
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
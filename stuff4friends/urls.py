@@ -1,15 +1,20 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+
+from library.media import serve_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("library.urls")),
 ]
 
-if settings.DEBUG:
+if "django_browser_reload" in settings.INSTALLED_APPS:
     urlpatterns += [
         path("__reload__/", include("django_browser_reload.urls")),
     ]
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.LIBRARY_SERVE_MEDIA:
+    urlpatterns += [
+        re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", serve_media),
+    ]